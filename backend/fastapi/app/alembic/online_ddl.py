@@ -0,0 +1,319 @@
+"""Schema changes that keep large tables writable, for use in revisions.
+
+    from app.alembic.online_ddl import backfill, create_index_concurrently
+
+Plain ``op.create_index`` blocks writes to the table for the whole build, and
+adding a validated constraint holds a lock while every row is checked. These
+helpers split such changes into steps that only take short locks:
+
+- ``create_index_concurrently`` / ``drop_index_concurrently`` build and drop
+  indexes with ``CONCURRENTLY``. On a partitioned table (``messages``) the
+  index is created on the parent only, built concurrently on each partition
+  and attached, since Postgres cannot build it concurrently on the parent.
+- ``backfill`` fills a column in primary key ranges of ``batch_size`` rows,
+  one transaction per batch, pausing between batches and logging progress.
+- ``add_check_constraint`` / ``add_foreign_key`` add constraints ``NOT
+  VALID`` (only new writes are checked), ``validate_constraint`` then checks
+  the existing rows without blocking writes, and ``set_not_null`` uses a
+  validated CHECK so ``SET NOT NULL`` does not scan the table.
+
+Every helper runs outside the migration transaction and commits what the
+revision did before it, so a revision using them is not atomic. Keep such
+revisions to one change and let the helpers make a re-run safe: they skip
+work that is already done and rebuild indexes a failed concurrent build left
+invalid. Statements that need a strong lock, however briefly, run with
+``MIGRATION_LOCK_TIMEOUT`` so they fail instead of queueing behind a long
+transaction and stalling every query queued behind them.
+"""
+
+import hashlib
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from alembic.operations import schemaobj
+
+
+MIGRATION_LOCK_TIMEOUT = os.environ.get("MIGRATION_LOCK_TIMEOUT", "5s")
+BACKFILL_BATCH_SIZE = int(os.environ.get("MIGRATION_BACKFILL_BATCH_SIZE", "5000"))
+BACKFILL_PAUSE_SECONDS = float(os.environ.get("MIGRATION_BACKFILL_PAUSE_SECONDS", "0.05"))
+# Seconds between progress lines while a backfill runs.
+PROGRESS_INTERVAL = 10.0
+
+logger = logging.getLogger("alembic.online_ddl")
+
+Columns = Sequence[Union[str, sa.sql.ClauseElement]]
+
+
+def _offline() -> bool:
+    """``alembic upgrade --sql``: statements are printed, nothing can be queried."""
+    return op.get_context().as_sql
+
+
+def _quote(name: str) -> str:
+    return op.get_context().dialect.identifier_preparer.quote(name)
+
+
+def _scalar(sql: str, **params):
+    return op.get_bind().execute(sa.text(sql), params).scalar()
+
+
+@contextmanager
+def _lock_timeout() -> Iterator[None]:
+    op.execute(f"SET lock_timeout = '{MIGRATION_LOCK_TIMEOUT}'")
+    try:
+        yield
+    finally:
+        op.execute("RESET lock_timeout")
+
+
+def _index_valid(name: str) -> Optional[bool]:
+    """True/False for a valid/invalid index, None when there is none."""
+    return _scalar(
+        "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)", name=name
+    )
+
+
+def _is_partitioned(table: str) -> bool:
+    relkind = _scalar("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)", table=table)
+    return relkind == "p"
+
+
+def _partitions(table: str) -> List[str]:
+    return list(
+        op.get_bind().execute(
+            sa.text(
+                "SELECT inhrelid::regclass::text FROM pg_inherits "
+                "WHERE inhparent = to_regclass(:table) ORDER BY 1"
+            ),
+            {"table": table},
+        ).scalars()
+    )
+
+
+def _partition_index_name(index_name: str, partition: str) -> str:
+    name = f"{partition}_{index_name.removeprefix('ix_')}"
+    if len(name) > 63:
+        digest = hashlib.md5(name.encode()).hexdigest()[:8]
+        name = f"{name[:54]}_{digest}"
+    return name
+
+
+def _build_concurrently(index_name: str, table: str, columns: Columns, **kw) -> None:
+    if _index_valid(index_name) is False:
+        logger.info("dropping invalid index %s left by an earlier build", index_name)
+        op.drop_index(index_name, table_name=table, postgresql_concurrently=True)
+    op.create_index(
+        index_name, table, columns, postgresql_concurrently=True, if_not_exists=True, **kw
+    )
+
+
+def create_index_concurrently(
+    index_name: str, table: str, columns: Columns, unique: bool = False, **kw
+) -> None:
+    """``op.create_index`` without blocking writes; takes the same ``postgresql_*``
+    options (``postgresql_where``, ``postgresql_using``, ...)."""
+    if _offline():
+        with op.get_context().autocommit_block():
+            op.create_index(
+                index_name, table, columns, unique=unique, postgresql_concurrently=True, **kw
+            )
+        return
+
+    with op.get_context().autocommit_block():
+        if not _is_partitioned(table):
+            _build_concurrently(index_name, table, columns, unique=unique, **kw)
+            return
+
+        # An index created ON ONLY the parent stays invalid until every
+        # partition has a matching index attached; partitions created later
+        # get one automatically.
+        index = schemaobj.SchemaObjects(op.get_context()).index(
+            index_name, table, columns, unique=unique, **kw
+        )
+        ddl = str(
+            sa.schema.CreateIndex(index, if_not_exists=True).compile(
+                dialect=op.get_context().dialect
+            )
+        )
+        with _lock_timeout():
+            op.execute(ddl.replace(f" ON {_quote(table)} ", f" ON ONLY {_quote(table)} ", 1))
+
+        for partition in _partitions(table):
+            partition_index = _partition_index_name(index_name, partition)
+            _build_concurrently(partition_index, partition, columns, unique=unique, **kw)
+            attached = _scalar(
+                "SELECT count(*) FROM pg_inherits "
+                "WHERE inhrelid = to_regclass(:child) AND inhparent = to_regclass(:parent)",
+                child=partition_index,
+                parent=index_name,
+            )
+            if not attached:
+                op.execute(
+                    f"ALTER INDEX {_quote(index_name)} ATTACH PARTITION {_quote(partition_index)}"
+                )
+
+
+def drop_index_concurrently(index_name: str, table: str) -> None:
+    """Drop an index without blocking writes.
+
+    Indexes on partitioned tables cannot be dropped concurrently; those are
+    dropped in one statement under ``MIGRATION_LOCK_TIMEOUT``.
+    """
+    with op.get_context().autocommit_block():
+        if not _offline() and _is_partitioned(table):
+            with _lock_timeout():
+                op.drop_index(index_name, table_name=table, if_exists=True)
+            return
+        op.drop_index(index_name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def backfill(
+    table: str,
+    set_: str,
+    where: Optional[str] = None,
+    key: str = "id",
+    batch_size: Optional[int] = None,
+    pause: Optional[float] = None,
+) -> int:
+    """``UPDATE table SET set_ WHERE where`` in ``key`` ranges, committing each batch.
+
+    ``set_`` and ``where`` are SQL fragments, e.g. ``backfill("jobs",
+    "version = 1", where="version IS NULL")``. Batches walk ``key`` upwards,
+    so each one is an index range scan no matter how much is already filled.
+    ``where`` should exclude rows that are already done, which keeps a re-run
+    cheap. Returns the number of rows updated.
+    """
+    batch_size = batch_size or BACKFILL_BATCH_SIZE
+    pause = BACKFILL_PAUSE_SECONDS if pause is None else pause
+    quoted_table, quoted_key = _quote(table), _quote(key)
+    condition = f" AND ({where})" if where else ""
+
+    if _offline():
+        op.execute(f"UPDATE {quoted_table} SET {set_} WHERE true{condition}")
+        return 0
+
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        estimate = max(
+            _scalar("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:t)", t=table)
+            or 0,
+            0,
+        )
+        started = last_report = time.monotonic()
+        lower, scanned, updated = None, 0, 0
+
+        while True:
+            after = f" AND {quoted_key} > :lower" if lower is not None else ""
+            upper, rows = bind.execute(
+                sa.text(
+                    f"SELECT max({quoted_key}), count(*) FROM (SELECT {quoted_key} "
+                    f"FROM {quoted_table} WHERE true{after} ORDER BY {quoted_key} LIMIT :n) AS batch"
+                ),
+                {"lower": lower, "n": batch_size},
+            ).one()
+            if not rows:
+                break
+
+            updated += bind.execute(
+                sa.text(
+                    f"UPDATE {quoted_table} SET {set_} "
+                    f"WHERE {quoted_key} <= :upper{after}{condition}"
+                ),
+                {"lower": lower, "upper": upper},
+            ).rowcount
+            scanned += rows
+            lower = upper
+
+            now = time.monotonic()
+            if now - last_report >= PROGRESS_INTERVAL:
+                last_report = now
+                progress = f" of ~{estimate} ({min(scanned / estimate, 1):.0%})" if estimate else ""
+                logger.info(
+                    "backfill %s: %d rows scanned%s, %d updated, %.0f rows/s",
+                    table, scanned, progress, updated, scanned / (now - started),
+                )
+            if rows < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+
+        logger.info(
+            "backfill %s done: %d rows scanned, %d updated in %.1fs",
+            table, scanned, updated, time.monotonic() - started,
+        )
+        return updated
+
+
+def _constraint_validated(name: str, table: str) -> Optional[bool]:
+    return _scalar(
+        "SELECT convalidated FROM pg_constraint "
+        "WHERE conname = :name AND conrelid = to_regclass(:table)",
+        name=name,
+        table=table,
+    )
+
+
+def add_check_constraint(name: str, table: str, condition: str) -> None:
+    """Add ``CHECK (condition)`` as ``NOT VALID``: enforced for new writes at
+    once, existing rows are checked by ``validate_constraint``."""
+    with op.get_context().autocommit_block():
+        if not _offline() and _constraint_validated(name, table) is not None:
+            return
+        with _lock_timeout():
+            op.create_check_constraint(name, table, sa.text(condition), postgresql_not_valid=True)
+
+
+def add_foreign_key(
+    name: str,
+    source_table: str,
+    referent_table: str,
+    local_cols: List[str],
+    remote_cols: List[str],
+    **kw,
+) -> None:
+    """``op.create_foreign_key`` as ``NOT VALID``; follow with ``validate_constraint``."""
+    with op.get_context().autocommit_block():
+        if not _offline() and _constraint_validated(name, source_table) is not None:
+            return
+        with _lock_timeout():
+            op.create_foreign_key(
+                name,
+                source_table,
+                referent_table,
+                local_cols,
+                remote_cols,
+                postgresql_not_valid=True,
+                **kw,
+            )
+
+
+def validate_constraint(name: str, table: str) -> None:
+    """Check existing rows against a ``NOT VALID`` constraint.
+
+    Takes a SHARE UPDATE EXCLUSIVE lock, which lets reads and writes carry on
+    during the scan.
+    """
+    with op.get_context().autocommit_block():
+        if not _offline() and _constraint_validated(name, table):
+            return
+        with _lock_timeout():
+            op.execute(f"ALTER TABLE {_quote(table)} VALIDATE CONSTRAINT {_quote(name)}")
+
+
+def set_not_null(table: str, column: str) -> None:
+    """``SET NOT NULL`` without a scan under an exclusive lock.
+
+    A validated ``CHECK (column IS NOT NULL)`` lets Postgres skip the scan;
+    the check is dropped again afterwards.
+    """
+    check = f"ck_{table}_{column}_not_null"[:63]
+    add_check_constraint(check, table, f"{_quote(column)} IS NOT NULL")
+    validate_constraint(check, table)
+    with op.get_context().autocommit_block(), _lock_timeout():
+        op.alter_column(table, column, nullable=False)
+        op.drop_constraint(check, table, type_="check")
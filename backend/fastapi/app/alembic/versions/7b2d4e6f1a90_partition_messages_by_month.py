@@ -0,0 +1,132 @@
+"""partition messages by month and add message_archives
+
+Revision ID: 7b2d4e6f1a90
+Revises: 3f1c9a7d2e84
+Create Date: 2026-10-19 10:15:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b2d4e6f1a90'
+down_revision: Union[str, Sequence[str], None] = '3f1c9a7d2e84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Creates one monthly partition per month from ``start_month`` up to
+# ``months_ahead`` months after the current month. Safe to call repeatedly;
+# MessageArchiveService.ensure_partitions calls it on a schedule.
+ENSURE_PARTITIONS_FUNCTION = """
+CREATE OR REPLACE FUNCTION ensure_message_partitions(start_month date, months_ahead integer)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start date := date_trunc('month', start_month)::date;
+    last_month date := (date_trunc('month', now()) + make_interval(months => months_ahead))::date;
+    partition_name text;
+    created integer := 0;
+BEGIN
+    WHILE month_start <= last_month LOOP
+        partition_name := format('messages_y%sm%s', to_char(month_start, 'YYYY'), to_char(month_start, 'MM'));
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF messages FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month_start, (month_start + interval '1 month')::date
+            );
+            created := created + 1;
+        END IF;
+        month_start := (month_start + interval '1 month')::date;
+    END LOOP;
+    RETURN created;
+END;
+$$;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A foreign key to a partitioned table has to cover the partition key, so
+    # attachments keep message_id without a database level constraint.
+    op.drop_constraint('message_attachments_message_id_fkey', 'message_attachments', type_='foreignkey')
+    op.create_index('ix_message_attachments_message_id', 'message_attachments', ['message_id'], unique=False)
+
+    op.execute("ALTER TABLE messages RENAME TO messages_unpartitioned")
+    op.execute("ALTER INDEX messages_pkey RENAME TO messages_unpartitioned_pkey")
+
+    op.execute("""
+        CREATE TABLE messages (
+            id integer NOT NULL DEFAULT nextval('messages_id_seq'),
+            job_id integer NOT NULL REFERENCES jobs (id),
+            sender_id uuid NOT NULL REFERENCES users (id),
+            message_type messagetype NOT NULL,
+            message_status messagestatus NOT NULL,
+            content text,
+            created_at timestamp without time zone NOT NULL,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("ALTER SEQUENCE messages_id_seq OWNED BY messages.id")
+    op.create_index('ix_messages_job_id_created_at', 'messages', ['job_id', 'created_at'], unique=False)
+    op.execute("CREATE TABLE messages_default PARTITION OF messages DEFAULT")
+
+    op.execute(ENSURE_PARTITIONS_FUNCTION)
+    op.execute("""
+        SELECT ensure_message_partitions(
+            COALESCE((SELECT min(created_at) FROM messages_unpartitioned), now())::date, 3
+        )
+    """)
+
+    op.execute("""
+        INSERT INTO messages (id, job_id, sender_id, message_type, message_status, content, created_at)
+        SELECT id, job_id, sender_id, message_type, message_status, content, created_at
+        FROM messages_unpartitioned
+    """)
+    op.execute("DROP TABLE messages_unpartitioned")
+
+    op.create_table('message_archives',
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('message_count', sa.Integer(), nullable=False),
+    sa.Column('payload', sa.LargeBinary(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['job_id'], ['jobs.id'], ),
+    sa.PrimaryKeyConstraint('job_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('message_archives')
+
+    op.execute("""
+        CREATE TABLE messages_unpartitioned (
+            id integer NOT NULL DEFAULT nextval('messages_id_seq'),
+            job_id integer NOT NULL REFERENCES jobs (id),
+            sender_id uuid NOT NULL REFERENCES users (id),
+            message_type messagetype NOT NULL,
+            message_status messagestatus NOT NULL,
+            content text,
+            created_at timestamp without time zone NOT NULL,
+            CONSTRAINT messages_unpartitioned_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute("""
+        INSERT INTO messages_unpartitioned (id, job_id, sender_id, message_type, message_status, content, created_at)
+        SELECT id, job_id, sender_id, message_type, message_status, content, created_at
+        FROM messages
+    """)
+    op.execute("ALTER SEQUENCE messages_id_seq OWNED BY messages_unpartitioned.id")
+    op.execute("DROP TABLE messages")
+    op.execute("DROP FUNCTION ensure_message_partitions(date, integer)")
+    op.execute("ALTER TABLE messages_unpartitioned RENAME TO messages")
+    op.execute("ALTER INDEX messages_unpartitioned_pkey RENAME TO messages_pkey")
+    op.execute("ALTER TABLE messages RENAME CONSTRAINT messages_unpartitioned_job_id_fkey TO messages_job_id_fkey")
+    op.execute("ALTER TABLE messages RENAME CONSTRAINT messages_unpartitioned_sender_id_fkey TO messages_sender_id_fkey")
+
+    op.drop_index('ix_message_attachments_message_id', table_name='message_attachments')
+    op.create_foreign_key('message_attachments_message_id_fkey', 'message_attachments', 'messages', ['message_id'], ['id'])
@@ -0,0 +1,47 @@
+"""add reward status/expiry and partial indexes for expiry sweeps
+
+Revision ID: 9c4e1b7a3d52
+Revises: 7b2d4e6f1a90
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4e1b7a3d52'
+down_revision: Union[str, Sequence[str], None] = '7b2d4e6f1a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    rewardstatus = sa.Enum('ACTIVE', 'DISABLED', 'OUT_OF_STOCK', 'EXPIRED', name='rewardstatus')
+    rewardstatus.create(op.get_bind(), checkfirst=True)
+
+    op.add_column('rewards', sa.Column('status', rewardstatus, nullable=False, server_default='ACTIVE'))
+    op.alter_column('rewards', 'status', server_default=None)
+    op.add_column('rewards', sa.Column('expires_at', sa.DateTime(), nullable=True))
+
+    op.create_index('ix_rewards_active_expires_at', 'rewards', ['expires_at'], unique=False, postgresql_where=sa.text("status = 'ACTIVE'"))
+    op.create_index('ix_offers_pending_created_at', 'offers', ['created_at', 'id'], unique=False, postgresql_where=sa.text("status = 'PENDING'"))
+    op.create_index('ix_offers_pending_item_id', 'offers', ['item_id'], unique=False, postgresql_where=sa.text("status = 'PENDING'"))
+    op.create_index('ix_jobs_active_started_at', 'jobs', ['started_at', 'id'], unique=False, postgresql_where=sa.text("status = 'ACTIVE'"))
+    op.create_index('ix_items_pending', 'items', ['id'], unique=False, postgresql_where=sa.text("status = 'PENDING'"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_items_pending', table_name='items', postgresql_where=sa.text("status = 'PENDING'"))
+    op.drop_index('ix_jobs_active_started_at', table_name='jobs', postgresql_where=sa.text("status = 'ACTIVE'"))
+    op.drop_index('ix_offers_pending_item_id', table_name='offers', postgresql_where=sa.text("status = 'PENDING'"))
+    op.drop_index('ix_offers_pending_created_at', table_name='offers', postgresql_where=sa.text("status = 'PENDING'"))
+    op.drop_index('ix_rewards_active_expires_at', table_name='rewards', postgresql_where=sa.text("status = 'ACTIVE'"))
+
+    op.drop_column('rewards', 'expires_at')
+    op.drop_column('rewards', 'status')
+    sa.Enum(name='rewardstatus').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,54 @@
+"""add user activity and streak rollups
+
+Revision ID: a7d2e4c9f1b3
+Revises: c3e8a1f6d2b4
+Create Date: 2026-10-19 15:02:41.730964
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.alembic.online_ddl import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d2e4c9f1b3'
+down_revision: Union[str, Sequence[str], None] = 'c3e8a1f6d2b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_activity',
+    sa.Column('activity_date', sa.Date(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('activity_date', 'user_id')
+    )
+    op.create_table('activity_rollups',
+    sa.Column('activity_date', sa.Date(), nullable=False),
+    sa.Column('active_users', sa.Integer(), nullable=False),
+    sa.Column('streaks_continued', sa.Integer(), nullable=False),
+    sa.Column('streaks_started', sa.Integer(), nullable=False),
+    sa.Column('streaks_reset', sa.Integer(), nullable=False),
+    sa.Column('processed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('activity_date')
+    )
+    # user_gamification has a row per user; build the index without blocking
+    # XP writes.
+    create_index_concurrently(
+        'ix_user_gamification_streak_bucket',
+        'user_gamification',
+        ['login_streak', 'last_action_date'],
+        postgresql_where=sa.text('login_streak > 0'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently('ix_user_gamification_streak_bucket', 'user_gamification')
+    op.drop_table('activity_rollups')
+    op.drop_table('user_activity')
@@ -0,0 +1,35 @@
+"""add processing_started_at to media_assets
+
+Revision ID: a7d3e9c1f5b2
+Revises: c4a8e1f3d7b6
+Create Date: 2026-10-19 23:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3e9c1f5b2'
+down_revision: Union[str, Sequence[str], None] = 'c4a8e1f3d7b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A constant default, so existing rows are not rewritten; assets stuck in
+    # PROCESSING get a fresh lease and are reclaimed once it runs out.
+    op.add_column('media_assets', sa.Column(
+        'processing_started_at',
+        sa.DateTime(),
+        server_default=sa.text("(now() AT TIME ZONE 'utc')"),
+        nullable=False,
+    ), if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('media_assets', 'processing_started_at')
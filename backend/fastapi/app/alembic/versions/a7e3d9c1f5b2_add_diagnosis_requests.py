@@ -0,0 +1,58 @@
+"""add diagnosis requests
+
+Revision ID: a7e3d9c1f5b2
+Revises: f4c7a2e9b5d1
+Create Date: 2026-10-19 16:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7e3d9c1f5b2'
+down_revision: Union[str, Sequence[str], None] = 'f4c7a2e9b5d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('diagnosis_requests',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('requested_by', sa.UUID(), nullable=True),
+    sa.Column('diagnosis_type', postgresql.ENUM('VISUAL', 'AUDIO', 'MANUAL', 'HYBRID', name='diagnosistype', create_type=False), nullable=False),
+    sa.Column('model', sa.String(), nullable=False),
+    sa.Column('media_urls', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'RUNNING', 'DONE', 'FAILED', name='diagnosisrequeststatus'), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('cost_usd', sa.Float(), nullable=True),
+    sa.Column('diagnosis_id', sa.Integer(), nullable=True),
+    sa.Column('available_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['diagnosis_id'], ['diagnosis.id'], ),
+    sa.ForeignKeyConstraint(['item_id'], ['items.id'], ),
+    sa.ForeignKeyConstraint(['requested_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_diagnosis_requests_finished_at'), 'diagnosis_requests', ['finished_at'], unique=False)
+    op.create_index(op.f('ix_diagnosis_requests_item_id'), 'diagnosis_requests', ['item_id'], unique=False)
+    op.create_index('ix_diagnosis_requests_pending', 'diagnosis_requests', ['model', 'available_at', 'id'], unique=False, postgresql_where=sa.text("status = 'PENDING'"))
+    op.create_index('ix_diagnosis_requests_running', 'diagnosis_requests', ['started_at'], unique=False, postgresql_where=sa.text("status = 'RUNNING'"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_diagnosis_requests_running', table_name='diagnosis_requests', postgresql_where=sa.text("status = 'RUNNING'"))
+    op.drop_index('ix_diagnosis_requests_pending', table_name='diagnosis_requests', postgresql_where=sa.text("status = 'PENDING'"))
+    op.drop_index(op.f('ix_diagnosis_requests_item_id'), table_name='diagnosis_requests')
+    op.drop_index(op.f('ix_diagnosis_requests_finished_at'), table_name='diagnosis_requests')
+    op.drop_table('diagnosis_requests')
+    sa.Enum(name='diagnosisrequeststatus').drop(op.get_bind(), checkfirst=True)
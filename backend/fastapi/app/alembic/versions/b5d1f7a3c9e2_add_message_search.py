@@ -0,0 +1,37 @@
+"""add message full-text search
+
+Revision ID: b5d1f7a3c9e2
+Revises: a7e3d9c1f5b2
+Create Date: 2026-10-19 18:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d1f7a3c9e2'
+down_revision: Union[str, Sequence[str], None] = 'a7e3d9c1f5b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A stored generated column rewrites every messages partition, and the
+    # indexes below lock writes while they build; run in a quiet window.
+    op.add_column('messages', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed("to_tsvector('english'::regconfig, coalesce(content, ''::text))", persisted=True), nullable=True))
+    op.create_index('ix_messages_search_vector', 'messages', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index(op.f('ix_jobs_client_id'), 'jobs', ['client_id'], unique=False)
+    op.create_index(op.f('ix_jobs_fixer_id'), 'jobs', ['fixer_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_jobs_fixer_id'), table_name='jobs')
+    op.drop_index(op.f('ix_jobs_client_id'), table_name='jobs')
+    op.drop_index('ix_messages_search_vector', table_name='messages', postgresql_using='gin')
+    op.drop_column('messages', 'search_vector')
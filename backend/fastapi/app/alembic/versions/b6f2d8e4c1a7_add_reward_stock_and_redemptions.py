@@ -0,0 +1,43 @@
+"""add reward stock and reward_redemptions
+
+Revision ID: b6f2d8e4c1a7
+Revises: 9c4e1b7a3d52
+Create Date: 2026-10-19 11:45:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6f2d8e4c1a7'
+down_revision: Union[str, Sequence[str], None] = '9c4e1b7a3d52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('rewards', sa.Column('stock', sa.Integer(), nullable=True))
+    op.create_table('reward_redemptions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('reward_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('cost_xp', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['reward_id'], ['rewards.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_reward_redemptions_reward_id'), 'reward_redemptions', ['reward_id'], unique=False)
+    op.create_index(op.f('ix_reward_redemptions_user_id'), 'reward_redemptions', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_reward_redemptions_user_id'), table_name='reward_redemptions')
+    op.drop_index(op.f('ix_reward_redemptions_reward_id'), table_name='reward_redemptions')
+    op.drop_table('reward_redemptions')
+    op.drop_column('rewards', 'stock')
@@ -0,0 +1,33 @@
+"""add user badge uniqueness
+
+Revision ID: b9e4d2a7c5f1
+Revises: e2f9c7a4b1d8
+Create Date: 2026-10-19 20:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9e4d2a7c5f1'
+down_revision: Union[str, Sequence[str], None] = 'e2f9c7a4b1d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep the first award of each badge per user.
+    op.execute(
+        "DELETE FROM user_badges b USING user_badges older "
+        "WHERE b.user_id = older.user_id AND b.badge_slug = older.badge_slug AND b.id > older.id"
+    )
+    op.create_unique_constraint('uq_user_badges_user_slug', 'user_badges', ['user_id', 'badge_slug'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_user_badges_user_slug', 'user_badges', type_='unique')
@@ -0,0 +1,35 @@
+"""add row versions
+
+Revision ID: c3e8a1f6d2b4
+Revises: f1cd00310cec
+Create Date: 2026-10-19 11:20:14.318502
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e8a1f6d2b4'
+down_revision: Union[str, Sequence[str], None] = 'f1cd00310cec'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# A constant default is stored in the catalog, so these do not rewrite the tables.
+TABLES = ('user_gamification', 'user_reputation', 'offers', 'jobs')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        op.add_column(
+            table, sa.Column('version', sa.Integer(), server_default='1', nullable=False)
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in reversed(TABLES):
+        op.drop_column(table, 'version')
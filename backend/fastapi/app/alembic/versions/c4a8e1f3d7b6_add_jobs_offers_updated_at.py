@@ -0,0 +1,43 @@
+"""add updated_at to jobs and offers
+
+Revision ID: c4a8e1f3d7b6
+Revises: b9e4d2a7c5f1
+Create Date: 2026-10-19 20:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.alembic.online_ddl import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a8e1f3d7b6'
+down_revision: Union[str, Sequence[str], None] = 'b9e4d2a7c5f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A constant default, so existing rows are not rewritten; they all take
+    # the migration time and the next incremental export picks them up once.
+    for table in ('jobs', 'offers'):
+        op.add_column(table, sa.Column(
+            'updated_at',
+            sa.DateTime(),
+            server_default=sa.text("(now() AT TIME ZONE 'utc')"),
+            nullable=False,
+        ), if_not_exists=True)
+    create_index_concurrently('ix_jobs_updated_at_id', 'jobs', ['updated_at', 'id'])
+    create_index_concurrently('ix_offers_updated_at_id', 'offers', ['updated_at', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently('ix_offers_updated_at_id', 'offers')
+    drop_index_concurrently('ix_jobs_updated_at_id', 'jobs')
+    op.drop_column('offers', 'updated_at')
+    op.drop_column('jobs', 'updated_at')
@@ -0,0 +1,95 @@
+"""store statuses as smallint
+
+Revision ID: d6b3f8a1c4e7
+Revises: a7d2e4c9f1b3
+Create Date: 2026-10-19 16:48:05.218377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.alembic.online_ddl import MIGRATION_LOCK_TIMEOUT
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd6b3f8a1c4e7'
+down_revision: Union[str, Sequence[str], None] = 'a7d2e4c9f1b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column, native enum type, member names in SmallEnum code order).
+# Frozen here: the codes must not follow later changes to the model enums.
+COLUMNS = (
+    ('items', 'status', 'itemstatus',
+     ('OPEN', 'PENDING', 'IN_PROGRESS', 'FIXED', 'UNFIXABLE', 'ARCHIVED')),
+    ('offers', 'status', 'offerstatus', ('PENDING', 'ACCEPTED', 'REJECTED', 'WITHDRAWN')),
+    ('jobs', 'status', 'jobstatus', ('ACTIVE', 'COMPLETED', 'VERIFIED', 'DISPUTED', 'CANCELLED')),
+    ('messages', 'message_status', 'messagestatus',
+     ('READ', 'SENT', 'SENDING', 'DELIVERED', 'FAILED', 'DELETED')),
+)
+
+# Partial indexes whose predicates name an enum label; they cannot be carried
+# through the type change and are rebuilt against the code.
+PARTIAL_INDEXES = (
+    ('ix_items_pending', 'items', ['id'], 'PENDING'),
+    ('ix_offers_pending_created_at', 'offers', ['created_at', 'id'], 'PENDING'),
+    ('ix_offers_pending_item_id', 'offers', ['item_id'], 'PENDING'),
+    ('ix_jobs_active_started_at', 'jobs', ['started_at', 'id'], 'ACTIVE'),
+)
+
+
+def _names(table: str) -> Sequence[str]:
+    return next(names for t, _, _, names in COLUMNS if t == table)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Each ALTER rewrites its table under an exclusive lock; give up rather
+    # than queue behind long transactions with every other query queued
+    # behind the migration.
+    op.execute(f"SET LOCAL lock_timeout = '{MIGRATION_LOCK_TIMEOUT}'")
+    for name, table, _, _ in PARTIAL_INDEXES:
+        op.drop_index(name, table_name=table)
+
+    for table, column, enum_name, names in COLUMNS:
+        cases = ' '.join(f"WHEN '{n}' THEN {code}" for code, n in enumerate(names))
+        op.alter_column(
+            table,
+            column,
+            type_=sa.SmallInteger(),
+            existing_nullable=False,
+            postgresql_using=f'CASE {column} {cases} END',
+        )
+        op.execute(f'DROP TYPE {enum_name}')
+
+    for name, table, columns, label in PARTIAL_INDEXES:
+        code = _names(table).index(label)
+        op.create_index(
+            name, table, columns, unique=False, postgresql_where=sa.text(f'status = {code}')
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(f"SET LOCAL lock_timeout = '{MIGRATION_LOCK_TIMEOUT}'")
+    for name, table, _, _ in PARTIAL_INDEXES:
+        op.drop_index(name, table_name=table)
+
+    for table, column, enum_name, names in COLUMNS:
+        enum = sa.Enum(*names, name=enum_name)
+        enum.create(op.get_bind())
+        labels = ', '.join(f"'{n}'" for n in names)
+        op.alter_column(
+            table,
+            column,
+            type_=enum,
+            existing_nullable=False,
+            postgresql_using=f'(ARRAY[{labels}]::{enum_name}[])[{column} + 1]',
+        )
+
+    for name, table, columns, label in PARTIAL_INDEXES:
+        op.create_index(
+            name, table, columns, unique=False, postgresql_where=sa.text(f"status = '{label}'")
+        )
@@ -0,0 +1,46 @@
+"""add media_assets and attachment variants
+
+Revision ID: e8b1c6d4a2f3
+Revises: d3a9f5c2b8e1
+Create Date: 2026-10-19 13:15:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b1c6d4a2f3'
+down_revision: Union[str, Sequence[str], None] = 'd3a9f5c2b8e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('media_assets',
+    sa.Column('content_hash', sa.String(), nullable=False),
+    sa.Column('content_type', sa.String(), nullable=False),
+    sa.Column('size_bytes', sa.BigInteger(), nullable=False),
+    sa.Column('original_url', sa.String(), nullable=False),
+    sa.Column('status', sa.Enum('PROCESSING', 'READY', 'FAILED', name='mediastatus'), nullable=False),
+    sa.Column('variants', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('content_hash'),
+    sa.UniqueConstraint('original_url')
+    )
+    op.add_column('message_attachments', sa.Column('content_hash', sa.String(), nullable=True))
+    op.add_column('message_attachments', sa.Column('variants', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.create_index(op.f('ix_message_attachments_content_hash'), 'message_attachments', ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_message_attachments_content_hash'), table_name='message_attachments')
+    op.drop_column('message_attachments', 'variants')
+    op.drop_column('message_attachments', 'content_hash')
+    op.drop_table('media_assets')
+    sa.Enum(name='mediastatus').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,28 @@
+"""add user badges user id index
+
+Revision ID: f1cd00310cec
+Revises: b5d1f7a3c9e2
+Create Date: 2026-10-19 09:55:52.044068
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1cd00310cec'
+down_revision: Union[str, Sequence[str], None] = 'b5d1f7a3c9e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_user_badges_user_id'), 'user_badges', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_user_badges_user_id'), table_name='user_badges')
@@ -0,0 +1,36 @@
+"""add review uniqueness
+
+Revision ID: f4c7a2e9b5d1
+Revises: e8b1c6d4a2f3
+Create Date: 2026-10-19 15:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4c7a2e9b5d1'
+down_revision: Union[str, Sequence[str], None] = 'e8b1c6d4a2f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep the first review per job and reviewer; rebuild reputation afterwards
+    # with python -m app.tools.recompute_reputation.
+    op.execute(
+        "DELETE FROM reviews r USING reviews older "
+        "WHERE r.job_id = older.job_id AND r.reviewer_id = older.reviewer_id AND r.id > older.id"
+    )
+    op.create_unique_constraint('uq_reviews_job_reviewer', 'reviews', ['job_id', 'reviewer_id'])
+    op.create_index(op.f('ix_reviews_target_id'), 'reviews', ['target_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_reviews_target_id'), table_name='reviews')
+    op.drop_constraint('uq_reviews_job_reviewer', 'reviews', type_='unique')
@@ -0,0 +1,289 @@
+import uuid
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.core.http_cache import etag
+from app.core.idempotency import IdempotentRequest, idempotent_request
+from app.core.rate_limit import rate_limit
+from app.schemas.dto import JobCreate, JobResponse, OfferCreate, OfferResponse
+from app.schemas.dtos.diagnosis_dto import DiagnosisRequestCreate, DiagnosisRequestResponse
+from app.schemas.dtos.media_dto import MediaResponse
+from app.schemas.dtos.message_dto import (
+    ChatHistoryResponse,
+    MessageCreate,
+    MessageResponse,
+    MessageSearchPage,
+)
+from app.schemas.dtos.review_dto import ReviewCreate, ReviewResponse
+from app.schemas.dtos.user_dto import BadgeResponse, UserProfileResponse
+from app.schemas.dtos.reward_dto import RedemptionResponse, RewardResponse
+from app.services.auth.auth_service import get_current_user
+from app.services.user.activity_service import ActivityService
+from app.services.user.badge_service import BadgeService
+from app.services.user.diagnosis_service import DiagnosisService
+from app.services.user.job_service import JobService
+from app.services.user.leaderboard_service import LeaderboardService
+from app.services.user.media_service import MediaService, spool_upload
+from app.services.user.message_service import MessageService
+from app.services.user.offer_service import OfferService
+from app.services.user.review_service import ReviewService
+from app.services.user.reward_service import RewardService
+from app.services.user.user_service import UserService
+
+
+router = APIRouter()
+
+
+# Version resolvers for etag(); path parameters and the caller's id arrive as
+# strings. Private ones return None for callers who may not read the resource.
+def _chat_version(db, caller_id: str, job_id: str):
+    return MessageService(db).chat_version(int(job_id), uuid.UUID(caller_id))
+
+
+def _job_version(db, caller_id: str, job_id: str):
+    return JobService(db).job_version(int(job_id), uuid.UUID(caller_id))
+
+
+def _profile_version(db, user_id: str):
+    return UserService(db).profile_version(uuid.UUID(user_id))
+
+
+def _badges_version(db, user_id: str):
+    return BadgeService(db).badges_version(uuid.UUID(user_id))
+
+
+@router.get(
+    "/jobs/{job_id}/messages",
+    response_model=ChatHistoryResponse,
+    dependencies=[Depends(etag(_chat_version))],
+)
+def get_chat_history(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    body = MessageService(db).get_chat_history_json(job_id, uuid.UUID(current_user.user.id))
+    return Response(content=body, media_type="application/json")
+
+
+@router.get(
+    "/jobs/{job_id}", response_model=JobResponse, dependencies=[Depends(etag(_job_version))]
+)
+def get_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    job = JobService(db).get_job_by_id(job_id)
+    if str(current_user.user.id) not in (str(job.client_id), str(job.fixer_id)):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get(
+    "/users/{user_id}",
+    response_model=UserProfileResponse,
+    dependencies=[Depends(etag(_profile_version, private=False))],
+)
+def get_user_profile(user_id: uuid.UUID, db: Session = Depends(get_db)):
+    user = UserService(db).get_profile(user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+
+@router.get(
+    "/users/{user_id}/badges",
+    response_model=List[BadgeResponse],
+    dependencies=[Depends(etag(_badges_version, private=False))],
+)
+def get_user_badges(user_id: uuid.UUID, db: Session = Depends(get_db)):
+    return BadgeService(db).get_user_badges(user_id)
+
+
+@router.get("/messages/search", response_model=MessageSearchPage)
+def search_messages(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """Search the caller's chats; follow ``next_cursor`` for older matches."""
+    return MessageService(db).search_messages(
+        uuid.UUID(current_user.user.id), q, limit, cursor
+    )
+
+
+# Writes below are rate limited per user (app.core.rate_limit) and accept an
+# Idempotency-Key header (app.core.idempotency).
+@router.post(
+    "/jobs/{job_id}/messages",
+    response_model=MessageResponse,
+    status_code=201,
+    dependencies=[Depends(rate_limit("send_message"))],
+)
+def send_message(
+    job_id: int,
+    message: MessageCreate,
+    idempotency: IdempotentRequest = Depends(idempotent_request),
+):
+    message = message.model_copy(
+        update={"job_id": job_id, "sender_id": uuid.UUID(idempotency.user_id)}
+    )
+    return idempotency.execute(
+        lambda db: MessageService(db).send_message(message), status_code=201
+    )
+
+
+@router.post(
+    "/jobs",
+    response_model=JobResponse,
+    status_code=201,
+    dependencies=[Depends(rate_limit("create_job"))],
+)
+def create_job(
+    job: JobCreate,
+    idempotency: IdempotentRequest = Depends(idempotent_request),
+):
+    job = job.model_copy(update={"client_id": uuid.UUID(idempotency.user_id)})
+    return idempotency.execute(
+        lambda db: JobResponse.model_validate(JobService(db).create_job(job)),
+        status_code=201,
+    )
+
+
+@router.post(
+    "/offers",
+    response_model=OfferResponse,
+    status_code=201,
+    dependencies=[Depends(rate_limit("create_offer"))],
+)
+def create_offer(
+    offer: OfferCreate,
+    idempotency: IdempotentRequest = Depends(idempotent_request),
+):
+    offer = offer.model_copy(update={"fixer_id": uuid.UUID(idempotency.user_id)})
+    return idempotency.execute(
+        lambda db: OfferResponse.model_validate(OfferService(db).create_offer(offer)),
+        status_code=201,
+    )
+
+
+@router.post("/jobs/{job_id}/reviews", response_model=ReviewResponse, status_code=201)
+def create_review(
+    job_id: int,
+    review: ReviewCreate,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    return ReviewService(db).create_review(
+        job_id, uuid.UUID(current_user.user.id), review
+    )
+
+
+@router.post(
+    "/items/{item_id}/diagnoses",
+    response_model=DiagnosisRequestResponse,
+    status_code=202,
+    dependencies=[Depends(rate_limit("request_diagnosis"))],
+)
+def request_diagnosis(
+    item_id: int,
+    data: DiagnosisRequestCreate,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """Queue an AI diagnosis; poll GET /diagnoses/requests/{id} for the result."""
+    return DiagnosisService(db).request_diagnosis(
+        item_id, uuid.UUID(current_user.user.id), data
+    )
+
+
+@router.get("/diagnoses/requests/{request_id}", response_model=DiagnosisRequestResponse)
+def get_diagnosis_request(
+    request_id: int,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    request = DiagnosisService(db).get_request(
+        request_id, uuid.UUID(current_user.user.id)
+    )
+    if request is None:
+        raise HTTPException(status_code=404, detail="Diagnosis request not found")
+    return request
+
+
+@router.get("/leaderboards/{board}")
+def get_leaderboard(
+    board: str,
+    category: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    return LeaderboardService(db).get_top(board, limit=limit, category=category)
+
+
+@router.get("/leaderboards/{board}/users/{user_id}")
+def get_leaderboard_rank(
+    board: str,
+    user_id: uuid.UUID,
+    category: Optional[str] = None,
+    radius: int = Query(2, ge=0, le=25),
+    db: Session = Depends(get_db),
+):
+    return LeaderboardService(db).get_user_rank(
+        board, user_id, radius=radius, category=category
+    )
+
+
+@router.post("/me/activity", status_code=204)
+def record_activity(
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """Count today towards the caller's login streak; streaks and streak XP
+    are updated by the daily batch."""
+    ActivityService(db).record_login(uuid.UUID(current_user.user.id))
+    return Response(status_code=204)
+
+
+@router.get("/rewards", response_model=List[RewardResponse])
+def get_rewards(db: Session = Depends(get_db)):
+    return RewardService(db).get_catalog()
+
+
+@router.post("/rewards/{reward_id}/redeem", response_model=RedemptionResponse)
+def redeem_reward(
+    reward_id: int,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    return RewardService(db).redeem(uuid.UUID(current_user.user.id), reward_id)
+
+
+@router.post("/media", response_model=MediaResponse, status_code=201)
+async def upload_media(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """Raw request body upload; the Content-Type header names the media type.
+
+    Returns at once with status ``processing``; variants appear on the asset
+    and on attachments that reference ``content_hash`` once rendered.
+    """
+    upload = await spool_upload(request.stream(), request.headers.get("content-type"))
+    return await run_in_threadpool(MediaService(db).register, upload)
+
+
+@router.get("/media/{content_hash}", response_model=MediaResponse)
+def get_media(content_hash: str, db: Session = Depends(get_db)):
+    media = MediaService(db).get_media(content_hash)
+    if media is None:
+        raise HTTPException(status_code=404, detail="Media not found")
+    return media
@@ -0,0 +1,79 @@
+"""Where uploaded media and its generated variants are stored.
+
+``BLOB_STORE_BACKEND=local`` (the only backend so far) writes under
+``BLOB_STORE_DIR`` and serves files from ``BLOB_BASE_URL``. Other backends
+(Supabase storage, S3) only need to implement ``BlobStore``.
+"""
+
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from functools import lru_cache
+
+
+BLOB_STORE_BACKEND = os.environ.get("BLOB_STORE_BACKEND", "local")
+BLOB_STORE_DIR = os.environ.get("BLOB_STORE_DIR", "media")
+BLOB_BASE_URL = os.environ.get("BLOB_BASE_URL", "/media")
+
+
+def media_key(content_hash: str, name: str, extension: str) -> str:
+    """Key of an upload's original or one of its variants."""
+    return f"{content_hash[:2]}/{content_hash}/{name}.{extension}"
+
+
+class BlobStore(ABC):
+    @abstractmethod
+    def put_file(self, key: str, path: str, content_type: str) -> str:
+        """Store the file at ``path`` under ``key`` and return its URL."""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        ...
+
+
+class LocalBlobStore(BlobStore):
+    def __init__(self, root: str = BLOB_STORE_DIR, base_url: str = BLOB_BASE_URL):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip("/")
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"invalid blob key: {key!r}")
+        return path
+
+    def put_file(self, key: str, path: str, content_type: str) -> str:
+        target = self._path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+
+        # Copy next to the target and rename so readers never see a partial file.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as out, open(path, "rb") as src:
+                shutil.copyfileobj(src, out, 1024 * 1024)
+            # mkstemp creates the file private; blobs are served to anyone.
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, target)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return self.url(key)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+
+@lru_cache(maxsize=1)
+def get_blob_store() -> BlobStore:
+    if BLOB_STORE_BACKEND != "local":
+        raise ValueError(f"unknown BLOB_STORE_BACKEND: {BLOB_STORE_BACKEND}")
+    return LocalBlobStore()
@@ -0,0 +1,92 @@
+"""Optimistic concurrency for hot rows.
+
+``UserGamification``, ``UserReputation``, ``Job`` and ``Offer`` carry a
+``version`` column mapped as SQLAlchemy's ``version_id_col``. Every ORM flush
+of such a row updates it with ``WHERE version = <version read>`` and bumps the
+version, so a read-modify-write that lost a race to another writer fails with
+``StaleDataError`` instead of silently overwriting their change. No lock is
+held between the read and the write.
+
+Service methods that read, modify and commit these rows are wrapped in
+``retry_on_conflict``: on a conflict (a stale version, or a deadlock or
+serialization failure that Postgres resolved by aborting the transaction) the
+session is rolled back and the method runs again on fresh rows, up to
+``OCC_MAX_ATTEMPTS`` times, after which the caller gets a 409. A wrapped
+method must own its transaction (read, change and commit in one call), since
+the rollback discards anything else pending on the session.
+
+Core and bulk UPDATEs bypass the ORM's version handling, so they must add
+``version_bump(model)`` to their values; otherwise a concurrent ORM write
+would not see that the row changed under it.
+"""
+
+import functools
+import os
+import random
+import time
+
+from fastapi import HTTPException, status
+from sqlalchemy import inspect
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.core.metrics import metrics
+
+
+OCC_MAX_ATTEMPTS = int(os.environ.get("OCC_MAX_ATTEMPTS", "5"))
+# Upper bound of the random pause before the n-th retry is n times this.
+OCC_BACKOFF_SECONDS = float(os.environ.get("OCC_BACKOFF_SECONDS", "0.02"))
+
+metrics.counter("kintsugi_version_conflicts_total", "Writes that lost a race: a stale version, deadlock or serialization failure.")
+metrics.counter("kintsugi_version_conflicts_exhausted_total", "Writes that gave up after repeated conflicts.")
+
+# SQLSTATEs of deadlock_detected and serialization_failure.
+RETRYABLE_SQLSTATES = ("40P01", "40001")
+
+
+def version_bump(model) -> dict:
+    """Values that move ``model``'s version forward in a Core UPDATE; empty
+    for models without a version column."""
+    column = inspect(model).version_id_col
+    if column is None:
+        return {}
+    return {column.key: column + 1}
+
+
+def is_conflict(exc: BaseException) -> bool:
+    """Whether ``exc`` means the transaction lost a race and can be retried."""
+    if isinstance(exc, StaleDataError):
+        return True
+    if isinstance(exc, OperationalError):
+        # psycopg2 names it pgcode, psycopg 3 sqlstate.
+        code = getattr(exc.orig, "pgcode", None) or getattr(exc.orig, "sqlstate", None)
+        return code in RETRYABLE_SQLSTATES
+    return False
+
+
+def retry_on_conflict(method):
+    """Re-run a service method whose transaction lost a race (see ``is_conflict``)."""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        attempt = 1
+        while True:
+            try:
+                return method(self, *args, **kwargs)
+            except Exception as e:
+                if not is_conflict(e):
+                    raise
+                self.db.rollback()
+                metrics.inc("kintsugi_version_conflicts_total", method=method.__qualname__)
+                if attempt >= OCC_MAX_ATTEMPTS:
+                    metrics.inc(
+                        "kintsugi_version_conflicts_exhausted_total", method=method.__qualname__
+                    )
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail="The record was changed by another request, please retry",
+                    )
+                time.sleep(random.uniform(0, OCC_BACKOFF_SECONDS * attempt))
+                attempt += 1
+
+    return wrapper
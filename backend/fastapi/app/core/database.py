@@ -0,0 +1,164 @@
+import os
+import random
+import functools
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import visitors
+
+
+def _normalize_url(url: str) -> str:
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql://", 1)
+    return url
+
+
+def _is_write(clause) -> bool:
+    """Whether a statement has to run on the primary."""
+    if clause is None:
+        return False
+    if clause.is_dml:
+        return True
+    if clause.is_select and not clause.is_text:
+        # SELECT ... FROM (UPDATE ... RETURNING) CTEs, e.g. job transitions.
+        return any(element.is_dml for element in visitors.iterate(clause))
+    # Raw SQL (text(), from_statement()) may write; the router cannot tell.
+    get_options = getattr(clause, "get_execution_options", None)
+    return not (get_options is not None and get_options().get("read_only", False))
+
+
+@lru_cache(maxsize=1)
+def get_engines() -> Tuple[Engine, List[Engine]]:
+    db_url = os.environ.get("DATABASE_URL")
+    if not db_url:
+        raise ValueError("DATABASE_URL is missing from .env!")
+
+    primary = create_engine(_normalize_url(db_url), pool_pre_ping=True)
+
+    # Comma separated list, e.g. DATABASE_REPLICA_URLS=postgresql://r1/db,postgresql://r2/db
+    replica_urls = os.environ.get("DATABASE_REPLICA_URLS", "")
+    replicas = [
+        create_engine(_normalize_url(url.strip()), pool_pre_ping=True)
+        for url in replica_urls.split(",")
+        if url.strip()
+    ]
+
+    return primary, replicas
+
+
+class RoutingSession(Session):
+    """Session that sends read-only work to a replica and everything else to
+    the primary.
+
+    Reads only go to a replica inside ``use_replica()`` (see ``read_only``).
+    Raw SQL counts as a write unless it is marked as a read with
+    ``text(...).execution_options(read_only=True)``.
+    Once the transaction has flushed a write, its reads stay on the primary
+    so they see its uncommitted rows, and once the session commits a write it
+    sticks to the primary for the rest of its lifetime so a request always
+    reads its own writes. A transaction reads from one replica throughout.
+    """
+
+    def __init__(
+        self,
+        primary: Engine,
+        replicas: Optional[List[Engine]] = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.primary = primary
+        self.replicas = list(replicas or [])
+        self.sticky_primary = False
+        self._replica_depth = 0
+        self._wrote = False
+        self._replica: Optional[Engine] = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or _is_write(clause):
+            self._wrote = True
+            return self.primary
+
+        on_primary = self.sticky_primary or self._wrote
+        if self.replicas and self._replica_depth > 0 and not on_primary:
+            if self._replica is None:
+                self._replica = random.choice(self.replicas)
+            return self._replica
+
+        return self.primary
+
+    @contextmanager
+    def use_replica(self) -> Iterator["RoutingSession"]:
+        self._replica_depth += 1
+        try:
+            yield self
+        finally:
+            self._replica_depth -= 1
+
+    def commit(self) -> None:
+        super().commit()
+        if self._wrote:
+            self.sticky_primary = True
+            self._wrote = False
+        self._replica = None
+
+    def rollback(self) -> None:
+        super().rollback()
+        self._wrote = False
+        self._replica = None
+
+    def close(self) -> None:
+        super().close()
+        self._wrote = False
+        self._replica = None
+
+
+def read_only(method):
+    """Route a service method's queries to a replica when one is configured."""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        db = getattr(self, "db", None)
+        if not isinstance(db, RoutingSession):
+            return method(self, *args, **kwargs)
+
+        with db.use_replica():
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+@contextmanager
+def snapshot(db: Session) -> Iterator[Session]:
+    """A session whose reads all see one REPEATABLE READ snapshot.
+
+    Use it for reads that have to agree with each other, such as rows moved
+    between tables by a concurrent job. It runs on its own connection to the
+    database ``db`` would read from, so it only sees committed rows; a
+    ``RoutingSession`` that has already written in its transaction is
+    returned as is instead, so that the reads see those writes.
+    """
+    if isinstance(db, RoutingSession) and db._wrote:
+        yield db
+        return
+
+    with db.get_bind().connect().execution_options(
+        isolation_level="REPEATABLE READ", postgresql_readonly=True
+    ) as conn, Session(bind=conn) as session:
+        yield session
+
+
+def create_session() -> RoutingSession:
+    primary, replicas = get_engines()
+    return RoutingSession(primary=primary, replicas=replicas)
+
+
+def get_db() -> Iterator[Session]:
+    db = create_session()
+    try:
+        yield db
+    finally:
+        db.close()
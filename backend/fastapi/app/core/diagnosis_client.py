@@ -0,0 +1,188 @@
+"""Model clients used by the diagnosis worker.
+
+``DIAGNOSIS_CLIENT`` picks the implementation:
+
+- ``gemini`` (default): Google Gemini through ``google-genai``; needs
+  ``GEMINI_API_KEY``.
+- ``fake``: deterministic answers after a fixed delay, for local runs, tests
+  and throughput benchmarks. Costs nothing and never calls out.
+
+A client receives a micro-batch of requests for one model and returns one
+``DiagnosisOutput`` per input, in order. A failure confined to one input is
+reported in that output's ``error``; an exception fails the whole batch.
+"""
+
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import List, Optional
+
+
+DIAGNOSIS_CLIENT = os.environ.get("DIAGNOSIS_CLIENT", "gemini")
+DIAGNOSIS_DEFAULT_MODEL = os.environ.get("DIAGNOSIS_DEFAULT_MODEL", "gemini-2.5-flash")
+# Budgeted spend per request before the real cost is known.
+DIAGNOSIS_ESTIMATED_COST_USD = float(os.environ.get("DIAGNOSIS_ESTIMATED_COST_USD", "0.002"))
+# USD per million tokens, used to turn reported token usage into cost.
+GEMINI_INPUT_PRICE_PER_MTOK = float(os.environ.get("GEMINI_INPUT_PRICE_PER_MTOK", "0.30"))
+GEMINI_OUTPUT_PRICE_PER_MTOK = float(os.environ.get("GEMINI_OUTPUT_PRICE_PER_MTOK", "2.50"))
+
+
+@dataclass
+class DiagnosisInput:
+    request_id: int
+    item_id: int
+    diagnosis_type: str
+    title: str
+    description: Optional[str]
+    category: Optional[str]
+    media_urls: List[str] = field(default_factory=list)
+
+
+@dataclass
+class DiagnosisOutput:
+    detected_issue: Optional[str] = None
+    confidence_score: Optional[float] = None
+    # Estimated repair cost, as stored on Diagnosis.estimated_cost.
+    estimated_cost: Optional[float] = None
+    result_json: dict = field(default_factory=dict)
+    # What the call cost us.
+    cost_usd: float = 0.0
+    error: Optional[str] = None
+
+
+class DiagnosisClient:
+    max_batch_size: int = 16
+    estimated_cost_usd: float = DIAGNOSIS_ESTIMATED_COST_USD
+
+    def diagnose(self, model: str, inputs: List[DiagnosisInput]) -> List[DiagnosisOutput]:
+        raise NotImplementedError
+
+
+class FakeDiagnosisClient(DiagnosisClient):
+    """Answers derived from a hash of the input after ``latency_seconds``
+    per batch, so results are repeatable and batching pays off like it does
+    against a real endpoint."""
+
+    def __init__(
+        self,
+        latency_seconds: float = 0.05,
+        cost_usd: float = 0.0,
+        fail_every: int = 0,
+    ):
+        self.latency_seconds = latency_seconds
+        self.cost_usd = cost_usd
+        self.fail_every = fail_every
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.inputs = 0
+
+    def diagnose(self, model: str, inputs: List[DiagnosisInput]) -> List[DiagnosisOutput]:
+        with self._lock:
+            self.calls += 1
+            self.inputs += len(inputs)
+        time.sleep(self.latency_seconds)
+
+        outputs = []
+        for item in inputs:
+            if self.fail_every and item.request_id % self.fail_every == 0:
+                outputs.append(DiagnosisOutput(error="fake failure", cost_usd=self.cost_usd))
+                continue
+            digest = hashlib.sha256(f"{model}:{item.item_id}:{item.title}".encode()).digest()
+            outputs.append(
+                DiagnosisOutput(
+                    detected_issue=f"{item.category or 'item'} needs repair",
+                    confidence_score=round(0.5 + digest[0] / 512, 3),
+                    estimated_cost=float(20 + digest[1]),
+                    result_json={"model": model, "fake": True},
+                    cost_usd=self.cost_usd,
+                )
+            )
+        return outputs
+
+
+_PROMPT = """You are diagnosing a broken item for a repair marketplace.
+Item: {title}
+Category: {category}
+Owner's description: {description}
+Diagnosis type: {diagnosis_type}
+
+Answer with JSON: {{"detected_issue": str, "confidence_score": float between 0 and 1,
+"estimated_cost": float in USD for the repair, "details": str}}."""
+
+
+class GeminiDiagnosisClient(DiagnosisClient):
+    """One ``generate_content`` call per input, made in turn; parallelism
+    comes from the worker's concurrency. Media is passed by URL."""
+
+    max_batch_size = 4
+
+    def __init__(self, api_key: Optional[str] = None):
+        from google import genai
+
+        self._client = genai.Client(api_key=api_key or os.environ["GEMINI_API_KEY"])
+
+    def diagnose(self, model: str, inputs: List[DiagnosisInput]) -> List[DiagnosisOutput]:
+        from google.genai import types
+
+        config = types.GenerateContentConfig(response_mime_type="application/json")
+        outputs = []
+        for item in inputs:
+            contents = [
+                _PROMPT.format(
+                    title=item.title,
+                    category=item.category or "unknown",
+                    description=item.description or "none",
+                    diagnosis_type=item.diagnosis_type,
+                )
+            ]
+            for url in item.media_urls:
+                contents.append(
+                    types.Part.from_uri(file_uri=url, mime_type=mimetypes.guess_type(url)[0])
+                )
+
+            try:
+                response = self._client.models.generate_content(
+                    model=model, contents=contents, config=config
+                )
+            except Exception as exc:
+                outputs.append(DiagnosisOutput(error=repr(exc)[:2000]))
+                continue
+
+            cost = 0.0
+            usage = response.usage_metadata
+            if usage is not None:
+                cost = (
+                    (usage.prompt_token_count or 0) * GEMINI_INPUT_PRICE_PER_MTOK
+                    + (usage.candidates_token_count or 0) * GEMINI_OUTPUT_PRICE_PER_MTOK
+                ) / 1_000_000
+
+            try:
+                answer = json.loads(response.text)
+                outputs.append(
+                    DiagnosisOutput(
+                        detected_issue=str(answer["detected_issue"]),
+                        confidence_score=float(answer["confidence_score"]),
+                        estimated_cost=float(answer["estimated_cost"])
+                        if answer.get("estimated_cost") is not None
+                        else None,
+                        result_json=answer,
+                        cost_usd=cost,
+                    )
+                )
+            except (TypeError, ValueError, KeyError) as exc:
+                outputs.append(DiagnosisOutput(error=f"unparseable answer: {exc!r}", cost_usd=cost))
+        return outputs
+
+
+@lru_cache(maxsize=1)
+def get_diagnosis_client() -> DiagnosisClient:
+    if DIAGNOSIS_CLIENT == "fake":
+        return FakeDiagnosisClient()
+    if DIAGNOSIS_CLIENT == "gemini":
+        return GeminiDiagnosisClient()
+    raise ValueError(f"unknown DIAGNOSIS_CLIENT: {DIAGNOSIS_CLIENT}")
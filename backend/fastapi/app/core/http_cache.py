@@ -0,0 +1,164 @@
+"""Conditional GETs for read endpoints.
+
+A route opts in with ``dependencies=[Depends(etag(resolver))]``. The resolver
+is called with the request's session and the route's path parameters (as
+strings) and returns a ``Version`` built from cheap aggregates such as
+``updated_at`` or a max id; it must change whenever the response body would.
+Returning None (e.g. the row does not exist) or raising ``ValueError`` (a
+malformed path parameter) skips caching for that request.
+
+Private routes also pass the caller's id, as the resolver's second argument.
+The 304 is sent before the endpoint runs, so the resolver is where the
+endpoint's access check has to happen: it returns None unless the caller may
+read the resource, and the endpoint then answers as it would for anyone else.
+Otherwise ``If-None-Match: *`` would tell any user whether a resource exists.
+
+The dependency runs before the endpoint. A request whose ``If-None-Match``
+matches gets a bodiless 304 straight away, so nothing is loaded into the ORM
+or serialized. Otherwise ``ETagMiddleware`` adds ``ETag`` (and
+``Last-Modified`` when the version has one) to the endpoint's 200 response.
+The version is read before the endpoint, so a tag can only be older than its
+body, which costs the client a refetch and never a stale 304.
+
+Tags are keyed with ``ETAG_SECRET`` so they cannot be guessed from the
+version. Private routes authenticate first and mix the caller's id into the
+tag, so a tag only validates for the user it was issued to. Without
+``ETAG_SECRET`` each process picks its own key, which is safe but makes tags
+differ between processes.
+"""
+
+import hashlib
+import hmac
+import os
+import secrets
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request
+from sqlalchemy.orm import Session
+from starlette.datastructures import MutableHeaders
+
+from app.core.database import get_db
+from app.core.metrics import metrics
+from app.services.auth.auth_service import get_current_user
+
+
+ETAG_SECRET = os.environ.get("ETAG_SECRET") or secrets.token_hex(32)
+CACHE_CONTROL = "private, no-cache"
+
+metrics.counter("kintsugi_http_not_modified_total", "Conditional GETs answered with 304.")
+
+
+@dataclass(frozen=True)
+class Version:
+    parts: Tuple
+    # Only set when every change to the body moves it forward; it then also
+    # answers If-Modified-Since.
+    last_modified: Optional[datetime] = None
+
+
+def make_etag(route_path: str, version: Version, user_id: Optional[str] = None) -> str:
+    digest = hmac.new(
+        ETAG_SECRET.encode(), repr((route_path, version.parts)).encode(), hashlib.sha256
+    )
+    if user_id is not None:
+        digest.update(b"\0" + user_id.encode())
+    return f'W/"{digest.hexdigest()[:32]}"'
+
+
+def _http_date(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.replace(microsecond=0)
+
+
+def _not_modified(request: Request, tag: str, version: Version) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison, as RFC 9110 asks for If-None-Match.
+        tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+        return "*" in tags or tag.removeprefix("W/") in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or version.last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return _http_date(version.last_modified) <= since
+
+
+def _validator_headers(tag: str, version: Version) -> Dict[str, str]:
+    headers = {"ETag": tag, "Cache-Control": CACHE_CONTROL, "Vary": "Authorization"}
+    if version.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(
+            _http_date(version.last_modified), usegmt=True
+        )
+    return headers
+
+
+def etag(resolver: Callable[..., Optional[Version]], private: bool = True):
+    """Route dependency answering conditional GETs; see the module docstring."""
+
+    def check(request: Request, db: Session, user_id: Optional[str]) -> None:
+        try:
+            if user_id is None:
+                version = resolver(db, **request.path_params)
+            else:
+                version = resolver(db, user_id, **request.path_params)
+        except ValueError:
+            return
+        if version is None:
+            return
+
+        route_path = request.scope["route"].path
+        tag = make_etag(route_path, version, user_id)
+        headers = _validator_headers(tag, version)
+        if _not_modified(request, tag, version):
+            metrics.inc("kintsugi_http_not_modified_total", route=route_path)
+            raise HTTPException(status_code=304, headers=headers)
+        request.state.etag_headers = headers
+
+    if private:
+
+        def private_dependency(
+            request: Request,
+            db: Session = Depends(get_db),
+            current_user=Depends(get_current_user),
+        ) -> None:
+            check(request, db, str(current_user.user.id))
+
+        return private_dependency
+
+    def public_dependency(request: Request, db: Session = Depends(get_db)) -> None:
+        check(request, db, None)
+
+    return public_dependency
+
+
+class ETagMiddleware:
+    """Adds the validators worked out by ``etag`` to 200 responses."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_validators(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                headers = scope.get("state", {}).get("etag_headers")
+                if headers:
+                    response_headers = MutableHeaders(scope=message)
+                    for name, value in headers.items():
+                        response_headers[name] = value
+            await send(message)
+
+        await self.app(scope, receive, send_with_validators)
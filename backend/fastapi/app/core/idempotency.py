@@ -0,0 +1,351 @@
+"""Replays the stored response when a client retries a write.
+
+Write endpoints take an ``IdempotentRequest`` dependency and run their service
+call through ``execute``. When the request carries an ``Idempotency-Key``
+header, the first successful response is stored under (user, key) and returned
+as-is to later retries, without running the write again. With the database
+store the response is stored in the same transaction as the write itself, so
+a crash can never leave a committed write without its stored response. A retry that arrives
+while the first request is still running gets a 409, and reusing a key for a
+different request body gets a 422. Failed writes are not stored, so the client
+can retry them.
+
+The store is picked with ``IDEMPOTENCY_BACKEND`` (``database`` or ``memory``).
+Use ``memory`` only with a single API process.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from pydantic import BaseModel
+from sqlalchemy import delete, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db, get_engines
+from app.core.metrics import metrics
+from app.schemas.schema import IdempotencyKey
+from app.services.auth.auth_service import get_current_user
+
+
+IDEMPOTENCY_BACKEND = os.environ.get("IDEMPOTENCY_BACKEND", "database")
+IDEMPOTENCY_TTL_SECONDS = float(os.environ.get("IDEMPOTENCY_TTL_SECONDS", "86400"))
+# A key whose request has not finished after this long is treated as abandoned
+# (e.g. the process died mid-request) and can be claimed again.
+IDEMPOTENCY_LOCK_SECONDS = float(os.environ.get("IDEMPOTENCY_LOCK_SECONDS", "60"))
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+metrics.counter("kintsugi_idempotency_requests_total", "Keyed write requests, by outcome.")
+
+
+@dataclass
+class StoredResponse:
+    status_code: int
+    body: bytes
+
+
+@dataclass
+class Claim:
+    """Result of ``IdempotencyStore.claim``.
+
+    ``acquired`` means the caller owns the key and must ``complete`` or
+    ``release`` it. Otherwise ``response`` holds the stored response, or is
+    None while the first request is still running.
+    """
+
+    acquired: bool
+    request_hash: str
+    response: Optional[StoredResponse] = None
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class InMemoryIdempotencyStore:
+    def __init__(
+        self,
+        ttl_seconds: float = IDEMPOTENCY_TTL_SECONDS,
+        lock_seconds: float = IDEMPOTENCY_LOCK_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.lock_seconds = lock_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        # (user, key) -> (request hash, response or None while running, claimed at)
+        self._entries: Dict[Tuple[str, str], Tuple[str, Optional[StoredResponse], float]] = {}
+        self._next_purge = 0.0
+
+    def _purge(self, now: float) -> None:
+        if now < self._next_purge:
+            return
+        self._next_purge = now + min(self.ttl_seconds, 60.0)
+        expired = [k for k, (_, _, at) in self._entries.items() if now - at >= self.ttl_seconds]
+        for k in expired:
+            del self._entries[k]
+
+    def claim(self, user_id: str, key: str, request_hash: str) -> Claim:
+        now = self._clock()
+        with self._lock:
+            self._purge(now)
+            entry = self._entries.get((user_id, key))
+            if entry is not None:
+                stored_hash, response, claimed_at = entry
+                expired = now - claimed_at >= self.ttl_seconds
+                abandoned = response is None and now - claimed_at >= self.lock_seconds
+                if not expired and not abandoned:
+                    return Claim(False, stored_hash, response)
+
+            self._entries[(user_id, key)] = (request_hash, None, now)
+            return Claim(True, request_hash)
+
+    @contextmanager
+    def write_session(self, db: Session) -> Iterator[Session]:
+        yield db
+
+    def complete(
+        self, user_id: str, key: str, response: StoredResponse, db: Optional[Session] = None
+    ) -> None:
+        with self._lock:
+            entry = self._entries.get((user_id, key))
+            if entry is not None:
+                self._entries[(user_id, key)] = (entry[0], response, self._clock())
+
+    def release(self, user_id: str, key: str) -> None:
+        with self._lock:
+            self._entries.pop((user_id, key), None)
+
+    def purge_expired(self) -> int:
+        now = self._clock()
+        with self._lock:
+            before = len(self._entries)
+            self._next_purge = 0.0
+            self._purge(now)
+            return before - len(self._entries)
+
+
+class DatabaseIdempotencyStore:
+    """Keys live in ``idempotency_keys`` so every API process shares them.
+
+    Claims are a single ``INSERT ... ON CONFLICT DO NOTHING``, so of several
+    simultaneous duplicates exactly one gets the key. The claim commits on its
+    own so duplicates see it; the write and its response share a transaction
+    (``write_session``).
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        ttl_seconds: float = IDEMPOTENCY_TTL_SECONDS,
+        lock_seconds: float = IDEMPOTENCY_LOCK_SECONDS,
+    ):
+        self.engine = engine
+        self.ttl_seconds = ttl_seconds
+        self.lock_seconds = lock_seconds
+
+    def claim(self, user_id: str, key: str, request_hash: str) -> Claim:
+        now = _utcnow()
+        with self.engine.begin() as conn:
+            # Drop this key if it expired or its request was abandoned.
+            conn.execute(
+                delete(IdempotencyKey).where(
+                    IdempotencyKey.user_id == user_id,
+                    IdempotencyKey.key == key,
+                    (IdempotencyKey.expires_at <= now)
+                    | (
+                        IdempotencyKey.status_code.is_(None)
+                        & (IdempotencyKey.created_at <= now - timedelta(seconds=self.lock_seconds))
+                    ),
+                )
+            )
+            acquired = conn.execute(
+                insert(IdempotencyKey)
+                .values(
+                    user_id=user_id,
+                    key=key,
+                    request_hash=request_hash,
+                    created_at=now,
+                    expires_at=now + timedelta(seconds=self.ttl_seconds),
+                )
+                .on_conflict_do_nothing(index_elements=["user_id", "key"])
+                .returning(IdempotencyKey.key)
+            ).first()
+            if acquired:
+                return Claim(True, request_hash)
+
+            existing = conn.execute(
+                select(
+                    IdempotencyKey.request_hash,
+                    IdempotencyKey.status_code,
+                    IdempotencyKey.response_body,
+                ).where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+            ).first()
+
+        if existing is None:
+            # Released between our INSERT and SELECT; let the client retry.
+            return Claim(False, request_hash)
+        response = None
+        if existing.status_code is not None:
+            response = StoredResponse(existing.status_code, existing.response_body)
+        return Claim(False, existing.request_hash, response)
+
+    @contextmanager
+    def write_session(self, db: Session) -> Iterator[Session]:
+        """A session for the write that runs inside one primary transaction.
+
+        The services' own commits and rollbacks only end savepoints; the
+        transaction commits when the block exits, after ``complete`` has
+        stored the response in it, and rolls back if the block raises.
+        """
+        with self.engine.connect() as conn, conn.begin():
+            with Session(bind=conn, join_transaction_mode="create_savepoint") as session:
+                yield session
+
+    def complete(
+        self, user_id: str, key: str, response: StoredResponse, db: Session
+    ) -> None:
+        now = _utcnow()
+        db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+            .values(
+                status_code=response.status_code,
+                response_body=response.body,
+                expires_at=now + timedelta(seconds=self.ttl_seconds),
+            )
+        )
+        db.commit()
+
+    def release(self, user_id: str, key: str) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(
+                delete(IdempotencyKey).where(
+                    IdempotencyKey.user_id == user_id,
+                    IdempotencyKey.key == key,
+                    IdempotencyKey.status_code.is_(None),
+                )
+            )
+
+    def purge_expired(self, batch_size: int = 1000) -> int:
+        purged = 0
+        while True:
+            with self.engine.begin() as conn:
+                batch = (
+                    select(IdempotencyKey.user_id, IdempotencyKey.key)
+                    .where(IdempotencyKey.expires_at <= _utcnow())
+                    .limit(batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+                deleted = conn.execute(
+                    delete(IdempotencyKey).where(
+                        tuple_(IdempotencyKey.user_id, IdempotencyKey.key).in_(batch)
+                    )
+                ).rowcount
+            purged += deleted
+            if deleted < batch_size:
+                return purged
+
+
+@lru_cache(maxsize=1)
+def get_idempotency_store():
+    if IDEMPOTENCY_BACKEND == "memory":
+        return InMemoryIdempotencyStore()
+    primary, _ = get_engines()
+    return DatabaseIdempotencyStore(primary)
+
+
+class IdempotentRequest:
+    def __init__(
+        self, store, db: Session, user_id: str, key: Optional[str], request_hash: str
+    ):
+        self.store = store
+        self.db = db
+        self.user_id = user_id
+        self.key = key
+        self.request_hash = request_hash
+
+    def execute(
+        self, write: Callable[[Session], BaseModel], status_code: int = status.HTTP_200_OK
+    ) -> Response:
+        """Run ``write`` once per key and return its JSON response.
+
+        ``write`` gets the session to write with, which is not always the
+        request's own session.
+        """
+        if not self.key:
+            return Response(
+                write(self.db).model_dump_json(), status_code, media_type="application/json"
+            )
+
+        claim = self.store.claim(self.user_id, self.key, self.request_hash)
+        if claim.request_hash != self.request_hash:
+            metrics.inc("kintsugi_idempotency_requests_total", outcome="mismatch")
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"{HEADER} was already used for a different request",
+            )
+        if not claim.acquired:
+            if claim.response is None:
+                metrics.inc("kintsugi_idempotency_requests_total", outcome="in_progress")
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this idempotency key is still in progress",
+                    headers={"Retry-After": "1"},
+                )
+            metrics.inc("kintsugi_idempotency_requests_total", outcome="replayed")
+            return Response(
+                claim.response.body,
+                claim.response.status_code,
+                media_type="application/json",
+                headers={REPLAYED_HEADER: "true"},
+            )
+
+        try:
+            with self.store.write_session(self.db) as db:
+                body = write(db).model_dump_json().encode()
+                self.store.complete(
+                    self.user_id, self.key, StoredResponse(status_code, body), db
+                )
+        except BaseException:
+            self.store.release(self.user_id, self.key)
+            raise
+
+        metrics.inc("kintsugi_idempotency_requests_total", outcome="stored")
+        return Response(body, status_code, media_type="application/json")
+
+
+async def idempotent_request(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+) -> IdempotentRequest:
+    key = request.headers.get(HEADER)
+    if key is not None and not 0 < len(key) <= 255:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{HEADER} must be 1-255 characters",
+        )
+
+    fingerprint = hashlib.sha256()
+    fingerprint.update(f"{request.method} {request.url.path}\n".encode())
+    fingerprint.update(await request.body())
+
+    return IdempotentRequest(
+        get_idempotency_store(),
+        db,
+        str(current_user.user.id),
+        key,
+        fingerprint.hexdigest(),
+    )
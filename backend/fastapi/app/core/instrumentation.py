@@ -0,0 +1,250 @@
+import os
+import re
+import json
+import time
+import heapq
+import logging
+import functools
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.metrics import metrics
+from app.core.profiling import service_frame
+
+
+logger = logging.getLogger("kintsugi.sql")
+
+N_PLUS_ONE_THRESHOLD = int(os.environ.get("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+SLOWEST_KEPT = 5
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:[^()]|\([^()]*\))*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+metrics.counter("kintsugi_service_calls_total", "Service method calls.")
+metrics.counter("kintsugi_service_queries_total", "SQL statements issued by service methods.")
+metrics.counter("kintsugi_service_db_seconds_total", "Time spent in SQL by service methods.")
+metrics.counter("kintsugi_service_n_plus_one_total", "Service calls that repeated a statement shape.")
+metrics.counter("kintsugi_requests_total", "Instrumented HTTP requests.")
+metrics.counter("kintsugi_request_queries_total", "SQL statements issued by HTTP requests.")
+metrics.counter("kintsugi_request_db_seconds_total", "Time spent in SQL by HTTP requests.")
+
+
+def statement_shape(statement: str) -> str:
+    """Collapse literals and IN lists so repeated queries share one shape."""
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _IN_LIST.sub("IN (?)", shape)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class QueryStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.query_count = 0
+        self.total_time = 0.0
+        self.shapes: Counter = Counter()
+        self._slowest: List[Tuple[float, str]] = []
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.query_count += 1
+        self.total_time += elapsed
+        self.shapes[statement_shape(statement)] += 1
+        self._keep_if_slow(elapsed, statement)
+
+    def merge(self, other: "QueryStats") -> None:
+        self.query_count += other.query_count
+        self.total_time += other.total_time
+        self.shapes.update(other.shapes)
+        for elapsed, statement in other._slowest:
+            self._keep_if_slow(elapsed, statement)
+
+    def _keep_if_slow(self, elapsed: float, statement: str) -> None:
+        if len(self._slowest) < SLOWEST_KEPT:
+            heapq.heappush(self._slowest, (elapsed, statement))
+        elif elapsed > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, (elapsed, statement))
+
+    @property
+    def slowest(self) -> List[Tuple[float, str]]:
+        return sorted(self._slowest, reverse=True)
+
+    def repeated_shapes(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> Dict[str, int]:
+        return {shape: n for shape, n in self.shapes.items() if n >= threshold}
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "query_count": self.query_count,
+            "db_ms": round(self.total_time * 1000, 3),
+            "slowest": [
+                {"ms": round(elapsed * 1000, 3), "statement": statement}
+                for elapsed, statement in self.slowest
+            ],
+            "n_plus_one": self.repeated_shapes(),
+        }
+
+
+# Every scope that is currently open (request, service methods, budgets).
+# A statement is recorded into all of them, so nested service calls count
+# towards their callers as well.
+_active_scopes: ContextVar[Tuple[QueryStats, ...]] = ContextVar(
+    "sql_active_scopes", default=()
+)
+_request_methods: ContextVar[Optional[Dict[str, QueryStats]]] = ContextVar(
+    "sql_request_methods", default=None
+)
+
+
+@contextmanager
+def sql_scope(name: str) -> Iterator[QueryStats]:
+    stats = QueryStats(name)
+    token = _active_scopes.set(_active_scopes.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active_scopes.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append((context, time.perf_counter()))
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _, started = conn.info["query_start_time"].pop()
+    elapsed = time.perf_counter() - started
+
+    for stats in _active_scopes.get():
+        stats.record(statement, elapsed)
+
+
+def _handle_error(exception_context) -> None:
+    # A failed statement never reaches after_cursor_execute; drop its start
+    # time so it does not pile up or get paired with the next statement.
+    conn = exception_context.connection
+    pending = conn.info.get("query_start_time") if conn is not None else None
+    if pending and pending[-1][0] is exception_context.execution_context:
+        pending.pop()
+
+
+def install_sql_instrumentation(target=Engine) -> None:
+    if not event.contains(target, "before_cursor_execute", _before_cursor_execute):
+        event.listen(target, "before_cursor_execute", _before_cursor_execute)
+        event.listen(target, "after_cursor_execute", _after_cursor_execute)
+        event.listen(target, "handle_error", _handle_error)
+
+
+def _record_method(stats: QueryStats) -> None:
+    metrics.inc("kintsugi_service_calls_total", method=stats.name)
+    metrics.inc("kintsugi_service_queries_total", stats.query_count, method=stats.name)
+    metrics.inc("kintsugi_service_db_seconds_total", stats.total_time, method=stats.name)
+
+    repeated = stats.repeated_shapes()
+    if repeated:
+        metrics.inc("kintsugi_service_n_plus_one_total", method=stats.name)
+        logger.warning(
+            json.dumps({"event": "sql.n_plus_one", **stats.as_dict()}, default=str)
+        )
+
+    methods = _request_methods.get()
+    if methods is not None:
+        methods.setdefault(stats.name, QueryStats(stats.name)).merge(stats)
+
+
+def instrument_service(cls):
+    """Class decorator that opens a SQL scope around every public method."""
+    for attr, value in list(vars(cls).items()):
+        if attr.startswith("_") or not callable(value):
+            continue
+        setattr(cls, attr, _instrument_method(f"{cls.__name__}.{attr}", value))
+    return cls
+
+
+def _instrument_method(name: str, method):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with sql_scope(name) as stats, service_frame(name):
+            try:
+                return method(*args, **kwargs)
+            finally:
+                _record_method(stats)
+
+    return wrapper
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def assert_query_budget(
+    max_queries: int, max_repeats: Optional[int] = None
+) -> Iterator[QueryStats]:
+    """Fail when the wrapped block issues more statements than allowed, or
+    repeats a single statement shape more than ``max_repeats`` times."""
+    with sql_scope("query_budget") as stats:
+        yield stats
+
+    problems = []
+    if stats.query_count > max_queries:
+        problems.append(f"{stats.query_count} queries issued, budget is {max_queries}")
+    if max_repeats is not None:
+        for shape, count in stats.shapes.items():
+            if count > max_repeats:
+                problems.append(f"{count}x repeated statement: {shape}")
+
+    if problems:
+        raise QueryBudgetExceeded("; ".join(problems))
+
+
+class SQLInstrumentationMiddleware:
+    """ASGI middleware that records SQL totals for each HTTP request and logs
+    one structured line per request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        methods: Dict[str, QueryStats] = {}
+        methods_token = _request_methods.set(methods)
+        started = time.perf_counter()
+
+        try:
+            with sql_scope(scope["path"]) as stats:
+                await self.app(scope, receive, send)
+        finally:
+            _request_methods.reset(methods_token)
+
+            route = scope.get("route")
+            # One series per route template; paths no route matched share one.
+            route_name = getattr(route, "path", None) or "unmatched"
+
+            metrics.inc("kintsugi_requests_total", route=route_name)
+            metrics.inc("kintsugi_request_queries_total", stats.query_count, route=route_name)
+            metrics.inc("kintsugi_request_db_seconds_total", stats.total_time, route=route_name)
+
+            if stats.query_count:
+                logger.info(
+                    json.dumps(
+                        {
+                            "event": "sql.request",
+                            "method": scope["method"],
+                            "route": route_name,
+                            "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+                            **stats.as_dict(),
+                            "service_methods": [m.as_dict() for m in methods.values()],
+                        },
+                        default=str,
+                    )
+                )
@@ -0,0 +1,68 @@
+import threading
+from collections import defaultdict
+from typing import Dict, Tuple
+
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class MetricsRegistry:
+    """Minimal in-process counter/gauge registry rendered in the Prometheus
+    text exposition format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._values: Dict[str, Dict[LabelSet, float]] = defaultdict(dict)
+
+    def _register(self, name: str, kind: str, help_text: str) -> None:
+        with self._lock:
+            self._help.setdefault(name, (kind, help_text))
+
+    def counter(self, name: str, help_text: str) -> None:
+        self._register(name, "counter", help_text)
+
+    def gauge(self, name: str, help_text: str) -> None:
+        self._register(name, "gauge", help_text)
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            series = self._values[name]
+            series[key] = series.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            self._values[name][key] = value
+
+    def get(self, name: str, **labels: str) -> float:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            return self._values.get(name, {}).get(key, 0.0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name in sorted(self._values):
+                kind, help_text = self._help.get(name, ("untyped", ""))
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in sorted(self._values[name].items()):
+                    if labels:
+                        rendered = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+                        lines.append(f"{name}{{{rendered}}} {value:g}")
+                    else:
+                        lines.append(f"{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,145 @@
+"""Delivery of notification digests built by the notifier worker.
+
+``NOTIFICATION_SENDER`` picks the implementation:
+
+- ``log`` (default): writes each digest to the ``kintsugi.notifications``
+  log, for local runs and until a push gateway is configured.
+- ``webhook``: POSTs every batch as JSON to ``NOTIFICATION_WEBHOOK_URL``
+  (a push gateway that fans out to devices).
+- ``fake``: records digests in memory after a fixed delay, for tests and
+  benchmarks. Never calls out.
+
+A sender receives up to ``max_batch_size`` digests per call. An exception
+fails the whole batch; the worker keeps those digests and retries them.
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Optional
+
+from app.schemas.schema import NotificationKind
+
+
+NOTIFICATION_SENDER = os.environ.get("NOTIFICATION_SENDER", "log")
+NOTIFICATION_WEBHOOK_URL = os.environ.get("NOTIFICATION_WEBHOOK_URL", "")
+NOTIFICATION_WEBHOOK_TIMEOUT = float(os.environ.get("NOTIFICATION_WEBHOOK_TIMEOUT", "10"))
+
+logger = logging.getLogger("kintsugi.notifications")
+
+
+@dataclass
+class DigestEntry:
+    kind: NotificationKind
+    # Item id for NEW_OFFER, job id for NEW_MESSAGE.
+    subject_id: int
+    count: int
+    last_at: datetime
+
+    @property
+    def text(self) -> str:
+        if self.kind == NotificationKind.NEW_OFFER:
+            noun = "offer" if self.count == 1 else "offers"
+            return f"{self.count} new {noun} on your item #{self.subject_id}"
+        noun = "message" if self.count == 1 else "messages"
+        return f"{self.count} new {noun} in job #{self.subject_id}"
+
+
+@dataclass
+class Digest:
+    recipient_id: uuid.UUID
+    entries: List[DigestEntry] = field(default_factory=list)
+
+    @property
+    def event_count(self) -> int:
+        return sum(entry.count for entry in self.entries)
+
+    def as_dict(self) -> dict:
+        return {
+            "recipient_id": str(self.recipient_id),
+            "entries": [
+                {
+                    "kind": entry.kind.value,
+                    "subject_id": entry.subject_id,
+                    "count": entry.count,
+                    "last_at": entry.last_at.isoformat(),
+                    "text": entry.text,
+                }
+                for entry in self.entries
+            ],
+        }
+
+
+class NotificationSender:
+    max_batch_size: int = 100
+
+    def send(self, digests: List[Digest]) -> None:
+        raise NotImplementedError
+
+
+class LogNotificationSender(NotificationSender):
+    def send(self, digests: List[Digest]) -> None:
+        for digest in digests:
+            logger.info(
+                "digest for %s: %s",
+                digest.recipient_id,
+                "; ".join(entry.text for entry in digest.entries),
+            )
+
+
+class FakeNotificationSender(NotificationSender):
+    """Keeps what it was sent in ``sent``; ``fail_next`` makes that many
+    calls raise before anything is recorded."""
+
+    def __init__(self, latency_seconds: float = 0.0, max_batch_size: Optional[int] = None):
+        self.latency_seconds = latency_seconds
+        if max_batch_size is not None:
+            self.max_batch_size = max_batch_size
+        self.fail_next = 0
+        self.sent: List[Digest] = []
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def send(self, digests: List[Digest]) -> None:
+        time.sleep(self.latency_seconds)
+        with self._lock:
+            if self.fail_next:
+                self.fail_next -= 1
+                raise RuntimeError("fake send failure")
+            self.calls += 1
+            self.sent.extend(digests)
+
+
+class WebhookNotificationSender(NotificationSender):
+    """One POST of ``{"digests": [...]}`` per batch; any non-2xx answer
+    fails the batch."""
+
+    def __init__(self, url: Optional[str] = None):
+        import httpx
+
+        self.url = url or NOTIFICATION_WEBHOOK_URL
+        if not self.url:
+            raise ValueError("NOTIFICATION_WEBHOOK_URL is not set")
+        self._client = httpx.Client(timeout=NOTIFICATION_WEBHOOK_TIMEOUT)
+
+    def send(self, digests: List[Digest]) -> None:
+        response = self._client.post(
+            self.url, json={"digests": [digest.as_dict() for digest in digests]}
+        )
+        response.raise_for_status()
+
+
+@lru_cache(maxsize=1)
+def get_notification_sender() -> NotificationSender:
+    if NOTIFICATION_SENDER == "log":
+        return LogNotificationSender()
+    if NOTIFICATION_SENDER == "webhook":
+        return WebhookNotificationSender()
+    if NOTIFICATION_SENDER == "fake":
+        return FakeNotificationSender()
+    raise ValueError(f"unknown NOTIFICATION_SENDER: {NOTIFICATION_SENDER}")
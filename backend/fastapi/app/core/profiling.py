@@ -0,0 +1,257 @@
+import os
+import re
+import sys
+import json
+import time
+import random
+import asyncio
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_SLOW_MS = float(os.environ.get("PROFILE_SLOW_MS", "0"))
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", "5"))
+PROFILE_OUTPUT_DIR = os.environ.get("PROFILE_OUTPUT_DIR", "profiles")
+
+_UNSAFE_FILENAME = re.compile(r"[^A-Za-z0-9_.-]+")
+
+Stack = Tuple[str, ...]
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class Profile:
+    """Samples for one request.
+
+    Worker threads are sampled while they run one of the request's service
+    methods. The event-loop thread is shared by every request in flight, so
+    its samples only count while the loop is running ``task``, the request's
+    own task; time spent in other requests' tasks, or in tasks the request
+    spawned, is left out.
+    """
+
+    def __init__(self, method: str, task: Optional["asyncio.Task"] = None):
+        self.method = method
+        self.route = "unmatched"
+        self.task = task
+        self.task_thread = threading.get_ident() if task is not None else None
+        self.started = time.perf_counter()
+        self.elapsed_ms = 0.0
+        self.stacks: Counter = Counter()
+        self.service_methods: List[str] = []
+        # thread id -> service methods currently running on that thread
+        self._threads: Dict[int, List[str]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    @property
+    def label(self) -> str:
+        return f"{self.method} {self.route}"
+
+    def enter(self, thread_id: int, service_method: Optional[str]) -> None:
+        with self._lock:
+            self._threads[thread_id].append(service_method or "")
+            if service_method and service_method not in self.service_methods:
+                self.service_methods.append(service_method)
+
+    def exit(self, thread_id: int) -> None:
+        with self._lock:
+            frames = self._threads.get(thread_id)
+            if frames:
+                frames.pop()
+                if not frames:
+                    del self._threads[thread_id]
+
+    def sample(self, frames: Dict[int, object]) -> None:
+        with self._lock:
+            threads = {tid: list(names) for tid, names in self._threads.items()}
+
+        for thread_id, names in threads.items():
+            frame = frames.get(thread_id)
+            if frame is None:
+                continue
+            if thread_id == self.task_thread and (
+                asyncio.current_task(self.task.get_loop()) is not self.task
+            ):
+                continue
+
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.reverse()
+
+            service = next((n for n in reversed(names) if n), None)
+            if service:
+                stack.insert(0, f"service:{service}")
+            self.stacks[tuple(stack)] += 1
+
+    def collapsed(self) -> str:
+        # The root frame is the route template, which is only known once
+        # routing is done, so it is added here rather than per sample.
+        return "".join(
+            f"{';'.join((self.label, *stack))} {count}\n"
+            for stack, count in self.stacks.most_common()
+        )
+
+    def speedscope(self) -> dict:
+        frame_index: Dict[str, int] = {}
+        samples, weights = [], []
+        for stack, count in self.stacks.items():
+            samples.append(
+                [frame_index.setdefault(name, len(frame_index)) for name in (self.label, *stack)]
+            )
+            weights.append(count * PROFILE_INTERVAL_MS)
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": self.label,
+            "exporter": "kintsugi",
+            "shared": {"frames": [{"name": name} for name in frame_index]},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": f"{self.label} [{', '.join(self.service_methods)}]",
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+        }
+
+    def write(self, output_dir: str) -> str:
+        os.makedirs(output_dir, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        slug = _UNSAFE_FILENAME.sub("_", self.label).strip("_")
+        base = os.path.join(output_dir, f"{stamp}_{slug}_{int(self.elapsed_ms)}ms")
+
+        with open(base + ".collapsed", "w") as f:
+            f.write(self.collapsed())
+        with open(base + ".speedscope.json", "w") as f:
+            json.dump(self.speedscope(), f)
+
+        return base
+
+
+class StackSampler:
+    """One background thread that samples the threads of every active
+    profile. It only runs while at least one profile is registered."""
+
+    def __init__(self, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        self._profiles: List[Profile] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, profile: Profile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="kintsugi-profiler", daemon=True
+                )
+                self._thread.start()
+
+    def unregister(self, profile: Profile) -> None:
+        with self._lock:
+            if profile in self._profiles:
+                self._profiles.remove(profile)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                profiles = list(self._profiles)
+                if not profiles:
+                    self._thread = None
+                    return
+
+            frames = sys._current_frames()
+            for profile in profiles:
+                profile.sample(frames)
+            time.sleep(self.interval)
+
+
+sampler = StackSampler()
+
+_active_profile: ContextVar[Optional[Profile]] = ContextVar(
+    "active_profile", default=None
+)
+
+
+@contextmanager
+def service_frame(service_method: str) -> Iterator[None]:
+    """Attach the current thread to the request's profile while a service
+    method runs, so sync endpoints executed in the threadpool get sampled."""
+    profile = _active_profile.get()
+    if profile is None:
+        yield
+        return
+
+    thread_id = threading.get_ident()
+    profile.enter(thread_id, service_method)
+    try:
+        yield
+    finally:
+        profile.exit(thread_id)
+
+
+class ProfilingMiddleware:
+    """Opt-in stack-sampling profiler.
+
+    ``sample_rate`` picks the requests that are profiled. With ``slow_ms``
+    set, only the picked requests that end up slower than ``slow_ms`` are
+    written out. Profiles are labelled with the route template and written
+    as collapsed stacks (flamegraph.pl, inferno) and speedscope JSON.
+    """
+
+    def __init__(
+        self,
+        app,
+        sample_rate: float = PROFILE_SAMPLE_RATE,
+        slow_ms: float = PROFILE_SLOW_MS,
+        output_dir: str = PROFILE_OUTPUT_DIR,
+    ):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.output_dir = output_dir
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (
+            self.sample_rate > 0 and random.random() < self.sample_rate
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(scope["method"], asyncio.current_task())
+        loop_thread = threading.get_ident()
+        profile.enter(loop_thread, None)
+        token = _active_profile.set(profile)
+        sampler.register(profile)
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            sampler.unregister(profile)
+            _active_profile.reset(token)
+            profile.exit(loop_thread)
+
+            profile.elapsed_ms = (time.perf_counter() - profile.started) * 1000
+            route = scope.get("route")
+            if getattr(route, "path", None):
+                profile.route = route.path
+
+            slow = self.slow_ms <= 0 or profile.elapsed_ms >= self.slow_ms
+            if slow and profile.stacks:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, profile.write, self.output_dir
+                )
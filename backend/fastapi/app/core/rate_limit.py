@@ -0,0 +1,205 @@
+"""Per-user token bucket rate limiting for write endpoints.
+
+Each (user, action) pair has a bucket holding up to ``capacity`` tokens that
+refills at ``capacity / period`` tokens per second; a request takes one token
+or is rejected with 429 and a ``Retry-After`` header.
+
+``RATE_LIMIT_BACKEND`` picks the limiter:
+
+- ``memory`` (default): buckets live in the API process. Limits are per worker.
+- ``redis``: buckets live in Redis (``REDIS_URL``) and are shared by every
+  worker. Needs the ``redis`` package.
+
+Limits are set per action with ``RATE_LIMIT_<ACTION>=<capacity>/<seconds>``,
+e.g. ``RATE_LIMIT_SEND_MESSAGE=30/60``.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, List, Tuple
+
+from fastapi import Depends, HTTPException, status
+
+from app.core.metrics import metrics
+from app.services.auth.auth_service import get_current_user
+
+
+RATE_LIMIT_BACKEND = os.environ.get("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "1") != "0"
+
+metrics.counter("kintsugi_rate_limited_total", "Requests rejected by the rate limiter.")
+metrics.gauge("kintsugi_rate_limit_buckets", "Active in-process rate limit buckets.")
+
+
+@dataclass(frozen=True)
+class Limit:
+    capacity: int
+    period_seconds: float
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.capacity / self.period_seconds
+
+    @classmethod
+    def parse(cls, value: str) -> "Limit":
+        capacity, _, period = value.partition("/")
+        return cls(int(capacity), float(period or 1))
+
+
+DEFAULT_LIMITS = {
+    "send_message": "30/60",
+    "create_offer": "10/60",
+    "create_job": "10/60",
+    "request_diagnosis": "5/60",
+}
+
+
+def _limits() -> Dict[str, Limit]:
+    return {
+        action: Limit.parse(os.environ.get(f"RATE_LIMIT_{action.upper()}", default))
+        for action, default in DEFAULT_LIMITS.items()
+    }
+
+
+@dataclass
+class Decision:
+    allowed: bool
+    remaining: int
+    retry_after: float
+
+
+class InProcessRateLimiter:
+    """Buckets kept in an LRU ordered by last use.
+
+    A bucket that has been idle long enough to refill completely is the same
+    as a new one, so it is dropped; memory stays proportional to users active
+    within one refill period.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        # (user, action) -> [tokens, last refill time, seconds to refill fully]
+        self._buckets: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _evict_idle(self, now: float) -> None:
+        while self._buckets:
+            _, (_, updated, full_after) = next(iter(self._buckets.items()))
+            if now - updated < full_after:
+                break
+            self._buckets.popitem(last=False)
+
+    def acquire(self, user_id: str, action: str, limit: Limit, cost: int = 1) -> Decision:
+        now = self._clock()
+        key = (user_id, action)
+
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                tokens = float(limit.capacity)
+            else:
+                tokens = min(
+                    limit.capacity,
+                    bucket[0] + (now - bucket[1]) * limit.refill_per_second,
+                )
+
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            full_after = (limit.capacity - tokens) / limit.refill_per_second
+
+            if bucket is None:
+                self._buckets[key] = [tokens, now, full_after]
+            else:
+                bucket[0], bucket[1], bucket[2] = tokens, now, full_after
+                self._buckets.move_to_end(key)
+            self._evict_idle(now)
+
+        retry_after = 0.0 if allowed else (cost - tokens) / limit.refill_per_second
+        return Decision(allowed, int(tokens), retry_after)
+
+
+# KEYS[1] bucket; ARGV: capacity, refill per second, now, cost.
+# Stores tokens and timestamp in a hash and expires it once it would be full.
+_TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisRateLimiter:
+    """Token buckets shared by all workers, updated atomically by a Lua script.
+
+    Idle buckets expire on their own once they would have refilled.
+    """
+
+    def __init__(self, client, prefix: str = "ratelimit"):
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(_TOKEN_BUCKET_SCRIPT)
+
+    def acquire(self, user_id: str, action: str, limit: Limit, cost: int = 1) -> Decision:
+        allowed, tokens = self._script(
+            keys=[f"{self.prefix}:{action}:{user_id}"],
+            args=[limit.capacity, limit.refill_per_second, time.time(), cost],
+        )
+        tokens = float(tokens)
+        retry_after = 0.0 if allowed else (cost - tokens) / limit.refill_per_second
+        return Decision(bool(allowed), int(tokens), retry_after)
+
+
+@lru_cache(maxsize=1)
+def get_rate_limiter():
+    if RATE_LIMIT_BACKEND == "redis":
+        import redis
+
+        return RedisRateLimiter(
+            redis.Redis.from_url(os.environ.get("REDIS_URL", "redis://localhost:6379/0"))
+        )
+    return InProcessRateLimiter()
+
+
+def rate_limit(action: str):
+    """FastAPI dependency that spends one token of ``action`` for the caller."""
+    limit = _limits()[action]
+
+    def dependency(current_user=Depends(get_current_user)) -> None:
+        if not RATE_LIMIT_ENABLED:
+            return
+
+        limiter = get_rate_limiter()
+        decision = limiter.acquire(str(current_user.user.id), action, limit)
+        if isinstance(limiter, InProcessRateLimiter):
+            metrics.set("kintsugi_rate_limit_buckets", len(limiter))
+
+        if not decision.allowed:
+            metrics.inc("kintsugi_rate_limited_total", action=action)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers={"Retry-After": str(max(1, math.ceil(decision.retry_after)))},
+            )
+
+    return dependency
@@ -2,10 +2,10 @@ from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
 from uuid import UUID
-from app.schemas.schema import JobStatus
+from app.schemas.schema import JobStatus, OfferStatus
 
 
-class JobBase:
+class JobBase(BaseModel):
     item_id: int
     agreed_price: float
 
@@ -37,3 +37,15 @@ class OfferCreate(BaseModel):
     fixer_id: UUID
     offered_price: float
     message: Optional[str] = None
+
+
+class OfferResponse(BaseModel):
+    id: int
+    item_id: int
+    fixer_id: UUID
+    price_bid: float
+    status: OfferStatus
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,39 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from app.schemas.schema import DiagnosisRequestStatus, DiagnosisType
+
+
+class DiagnosisRequestCreate(BaseModel):
+    diagnosis_type: DiagnosisType = DiagnosisType.VISUAL
+    model: Optional[str] = None
+    # Defaults to the item's images.
+    media_urls: Optional[List[str]] = None
+
+
+class DiagnosisResponse(BaseModel):
+    id: int
+    item_id: int
+    diagnosis_type: DiagnosisType
+    ai_model_used: str
+    detected_issue: Optional[str] = None
+    confidence_score: Optional[float] = None
+    estimated_cost: Optional[float] = None
+    result_json: Optional[dict] = None
+    created_at: datetime
+    model_config = {"from_attributes": True}
+
+
+class DiagnosisRequestResponse(BaseModel):
+    id: int
+    item_id: int
+    diagnosis_type: DiagnosisType
+    model: str
+    status: DiagnosisRequestStatus
+    attempts: int
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    diagnosis: Optional[DiagnosisResponse] = None
+    model_config = {"from_attributes": True, "protected_namespaces": ()}
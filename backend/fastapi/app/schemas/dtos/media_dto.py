@@ -0,0 +1,17 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+from app.schemas.schema import MediaStatus
+
+
+class MediaResponse(BaseModel):
+    content_hash: str
+    content_type: str
+    size_bytes: int
+    original_url: str
+    status: MediaStatus
+    variants: Optional[dict] = None
+    created_at: datetime
+    model_config = {"from_attributes": True}
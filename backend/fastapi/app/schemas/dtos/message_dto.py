@@ -4,9 +4,10 @@ from datetime import datetime
 from uuid import UUID
 import uuid
 
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import NotRequired, TypedDict
 
-from backend.fastapi.app.schemas.schema import MessageStatus
+from app.schemas.schema import MessageStatus
 
 
 class MessageType(str, Enum):
@@ -21,12 +22,14 @@ class MessageAttachmentBase(BaseModel):
 
 
 class MessageAttachmentCreate(MessageAttachmentBase):
-    pass
+    # Hash returned by POST /media; links the attachment to its variants.
+    content_hash: Optional[str] = None
 
 
 class MessageAttachmentResponse(MessageAttachmentBase):
     id: int
     message_id: int
+    variants: Optional[dict] = None
     model_config = {"from_attributes": True}
 
 
@@ -61,3 +64,49 @@ class ChatHistoryResponse(BaseModel):
     job_id: int
     messages: List[MessageResponse]
     model_config = {"from_attributes": True}
+
+
+class MessageSearchHit(BaseModel):
+    message_id: int
+    job_id: int
+    sender_id: uuid.UUID
+    created_at: datetime
+    # HTML-escaped content excerpt with matches wrapped in <mark></mark>.
+    snippet: str
+
+
+class MessageSearchPage(BaseModel):
+    results: List[MessageSearchHit]
+    # Pass back as ``cursor`` for the next page; None on the last page.
+    next_cursor: Optional[str] = None
+
+
+# Plain-dict mirrors of the response models above, in the same field order.
+# They let list endpoints serialize rows straight to JSON bytes without
+# building a model instance per row.
+class MessageAttachmentPayload(TypedDict):
+    file_url: str
+    file_type: Optional[str]
+    id: int
+    message_id: int
+    # Absent from archives written before media variants existed.
+    variants: NotRequired[Optional[dict]]
+
+
+class MessagePayload(TypedDict):
+    job_id: int
+    content: Optional[str]
+    id: int
+    sender_id: uuid.UUID
+    message_status: MessageStatus
+    created_at: datetime
+    attachments: List[MessageAttachmentPayload]
+
+
+class ChatHistoryPayload(TypedDict):
+    job_id: int
+    messages: List[MessagePayload]
+
+
+chat_history_serializer = TypeAdapter(ChatHistoryPayload)
+archived_messages_adapter = TypeAdapter(List[MessagePayload])
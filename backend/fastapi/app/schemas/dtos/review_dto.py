@@ -0,0 +1,21 @@
+from datetime import datetime
+from typing import Optional
+import uuid
+
+from pydantic import BaseModel, Field
+
+
+class ReviewCreate(BaseModel):
+    rating: int = Field(ge=1, le=5)
+    comment: Optional[str] = None
+
+
+class ReviewResponse(BaseModel):
+    id: int
+    job_id: int
+    reviewer_id: uuid.UUID
+    target_id: uuid.UUID
+    rating: int
+    comment: Optional[str] = None
+    created_at: datetime
+    model_config = {"from_attributes": True}
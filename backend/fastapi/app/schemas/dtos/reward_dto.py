@@ -0,0 +1,36 @@
+from datetime import datetime
+from typing import Optional
+import uuid
+
+from pydantic import BaseModel
+
+from app.schemas.schema import RewardStatus
+
+
+class RewardCreate(BaseModel):
+    name: str
+    description: str
+    cost_xp: int
+    image_url: Optional[str] = None
+    stock: Optional[int] = None
+    expires_at: Optional[datetime] = None
+
+
+class RewardResponse(BaseModel):
+    id: int
+    name: str
+    description: str
+    cost_xp: int
+    image_url: Optional[str] = None
+    status: RewardStatus
+    expires_at: Optional[datetime] = None
+    model_config = {"from_attributes": True}
+
+
+class RedemptionResponse(BaseModel):
+    id: int
+    reward_id: int
+    user_id: uuid.UUID
+    cost_xp: int
+    remaining_xp: int
+    created_at: datetime
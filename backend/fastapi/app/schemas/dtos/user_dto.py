@@ -0,0 +1,25 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from app.schemas.schema import UserStatus
+
+
+class UserProfileResponse(BaseModel):
+    id: UUID
+    display_name: Optional[str] = None
+    avatar_url: Optional[str] = None
+    bio: Optional[str] = None
+    user_status: UserStatus
+    created_at: datetime
+    model_config = {"from_attributes": True}
+
+
+class BadgeResponse(BaseModel):
+    id: int
+    name: str
+    badge_slug: str
+    earned_at: datetime
+    model_config = {"from_attributes": True}
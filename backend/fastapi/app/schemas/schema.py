@@ -3,26 +3,33 @@ from __future__ import annotations
 
 import uuid
 import enum
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from typing import List, Optional
 
 from sqlalchemy import (
+    BigInteger,
     Column,
+    Computed,
+    Date,
     DateTime,
     Enum as SAEnum,
     Float,
     ForeignKey,
+    Index,
     Integer,
+    LargeBinary,
     String,
     Text,
     UniqueConstraint,
     false,
     func,
+    text,
     true,
 )
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .base import Base
+from .types import SmallEnum
 
 
 class RewardStatus(enum.Enum):
@@ -47,6 +54,7 @@ class UserVerifyStatus(enum.Enum):
 
 
 class MessageStatus(enum.Enum):
+    # Stored as SmallEnum codes in definition order: append new members only.
     READ = "read"
     SENT = "sent"
     SENDING = "sending"
@@ -56,6 +64,7 @@ class MessageStatus(enum.Enum):
 
 
 class ItemStatus(enum.Enum):
+    # Stored as SmallEnum codes in definition order: append new members only.
     OPEN = "open"
     PENDING = "pending"
     IN_PROGRESS = "in_progress"
@@ -65,6 +74,7 @@ class ItemStatus(enum.Enum):
 
 
 class OfferStatus(enum.Enum):
+    # Stored as SmallEnum codes in definition order: append new members only.
     PENDING = "pending"
     ACCEPTED = "accepted"
     REJECTED = "rejected"
@@ -72,6 +82,7 @@ class OfferStatus(enum.Enum):
 
 
 class JobStatus(enum.Enum):
+    # Stored as SmallEnum codes in definition order: append new members only.
     ACTIVE = "active"
     COMPLETED = "completed"
     VERIFIED = "verified"
@@ -101,8 +112,33 @@ class VerificationTier(enum.IntEnum):
     PRO_CERTIFIED = 4
 
 
+class OutboxStatus(enum.Enum):
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class DiagnosisRequestStatus(enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class MediaStatus(enum.Enum):
+    PROCESSING = "processing"
+    READY = "ready"
+    FAILED = "failed"
+
+
+class NotificationKind(enum.Enum):
+    # Stored as SmallEnum codes in definition order: append new members only.
+    NEW_OFFER = "new_offer"
+    NEW_MESSAGE = "new_message"
+
+
 class UserStatus(enum.Enum):
-    VERIFIED = "verfied"
+    VERIFIED = "verified"
     ACTIVE = "active"
     BANNED = "banned"
     UNVERIFIED = "unverified"
@@ -185,10 +221,49 @@ class UserGamification(Base):
     current_level: Mapped[int] = mapped_column(Integer, default=1)
 
     login_streak: Mapped[int] = mapped_column(Integer, default=0)
+    # Start of the last day counted towards the streak; set by the daily
+    # streak batch (ActivityService.process_days).
     last_action_date: Mapped[datetime] = mapped_column(DateTime, nullable=True)
 
+    # Optimistic concurrency, see app.core.concurrency.
+    version: Mapped[int] = mapped_column(Integer, nullable=False, server_default="1")
+
     user: Mapped["User"] = relationship("User", back_populates="gamification")
 
+    __table_args__ = (
+        # Streak bucket reports (index-only) and the nightly reset of broken
+        # streaks; users without a streak are left out.
+        Index(
+            "ix_user_gamification_streak_bucket",
+            "login_streak",
+            "last_action_date",
+            postgresql_where=(login_streak > 0),
+        ),
+    )
+    __mapper_args__ = {"version_id_col": version}
+
+
+class UserActivity(Base):
+    # Append-only: one row per user per UTC day with a login. Keyed by day
+    # first so the streak batch reads one day as a range.
+    __tablename__ = "user_activity"
+    activity_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"), primary_key=True)
+
+
+class ActivityRollup(Base):
+    # Days the streak batch has processed; the row is inserted first to claim
+    # the day, so concurrent schedulers never process one twice.
+    __tablename__ = "activity_rollups"
+    activity_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    active_users: Mapped[int] = mapped_column(Integer, default=0)
+    streaks_continued: Mapped[int] = mapped_column(Integer, default=0)
+    streaks_started: Mapped[int] = mapped_column(Integer, default=0)
+    streaks_reset: Mapped[int] = mapped_column(Integer, default=0)
+    processed_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc)
+    )
+
 
 class UserReputation(Base):
     __tablename__ = "user_reputation"
@@ -202,11 +277,18 @@ class UserReputation(Base):
         Integer, default=VerificationTier.UNVERIFIED
     )
 
+    version: Mapped[int] = mapped_column(Integer, nullable=False, server_default="1")
+
     user: Mapped["User"] = relationship("User", back_populates="reputation")
 
+    __mapper_args__ = {"version_id_col": version}
+
 
 class UserBadge(Base):
     __tablename__ = "user_badges"
+    __table_args__ = (
+        UniqueConstraint("user_id", "badge_slug", name="uq_user_badges_user_slug"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
 
@@ -217,7 +299,7 @@ class UserBadge(Base):
         DateTime, default=datetime.now(timezone.utc)
     )
 
-    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"))
+    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"), index=True)
     user: Mapped["User"] = relationship("User", back_populates="badges")
 
 
@@ -231,7 +313,7 @@ class Item(Base):
     category: Mapped[str] = mapped_column(String, index=True)
 
     status: Mapped[ItemStatus] = mapped_column(
-        SAEnum(ItemStatus), default=ItemStatus.OPEN
+        SmallEnum(ItemStatus), default=ItemStatus.OPEN
     )
 
     images: Mapped[List[str]] = mapped_column(JSONB, default=[])
@@ -245,6 +327,10 @@ class Item(Base):
     )
     jobs: Mapped[List["Job"]] = relationship("Job", back_populates="item")
 
+    __table_args__ = (
+        Index("ix_items_pending", "id", postgresql_where=(status == ItemStatus.PENDING)),
+    )
+
 
 class Diagnosis(Base):
     __tablename__ = "diagnosis"
@@ -268,6 +354,59 @@ class Diagnosis(Base):
     item: Mapped["Item"] = relationship("Item", back_populates="diagnoses")
 
 
+class DiagnosisRequest(Base):
+    # Queue of model calls that produce Diagnosis rows, drained by
+    # app.workers.diagnosis_worker.
+    __tablename__ = "diagnosis_requests"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    item_id: Mapped[int] = mapped_column(ForeignKey("items.id"), nullable=False, index=True)
+    requested_by: Mapped[Optional[uuid.UUID]] = mapped_column(
+        ForeignKey("users.id"), nullable=True
+    )
+
+    diagnosis_type: Mapped[DiagnosisType] = mapped_column(
+        SAEnum(DiagnosisType), default=DiagnosisType.VISUAL
+    )
+    model: Mapped[str] = mapped_column(String, nullable=False)
+    media_urls: Mapped[List[str]] = mapped_column(JSONB, default=list)
+
+    status: Mapped[DiagnosisRequestStatus] = mapped_column(
+        SAEnum(DiagnosisRequestStatus), default=DiagnosisRequestStatus.PENDING, nullable=False
+    )
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # What the model provider charged for this request, in USD.
+    cost_usd: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    diagnosis_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("diagnosis.id"), nullable=True
+    )
+
+    available_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime, nullable=True, index=True
+    )
+
+    diagnosis: Mapped[Optional["Diagnosis"]] = relationship("Diagnosis")
+
+    __table_args__ = (
+        Index(
+            "ix_diagnosis_requests_pending",
+            "model",
+            "available_at",
+            "id",
+            postgresql_where=(status == DiagnosisRequestStatus.PENDING),
+        ),
+        # In-flight requests: lease recovery and budget reservations.
+        Index(
+            "ix_diagnosis_requests_running",
+            "started_at",
+            postgresql_where=(status == DiagnosisRequestStatus.RUNNING),
+        ),
+    )
+
+
 class Offer(Base):
     __tablename__ = "offers"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -277,33 +416,71 @@ class Offer(Base):
     price_bid: Mapped[float] = mapped_column(Float, nullable=False)
 
     status: Mapped[OfferStatus] = mapped_column(
-        SAEnum(OfferStatus), default=OfferStatus.PENDING
+        SmallEnum(OfferStatus), default=OfferStatus.PENDING
     )
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=lambda: datetime.now(timezone.utc)
     )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        server_default=text("(now() AT TIME ZONE 'utc')"),
+    )
+
+    version: Mapped[int] = mapped_column(Integer, nullable=False, server_default="1")
 
     item: Mapped["Item"] = relationship("Item", back_populates="offers")
     fixer: Mapped["User"] = relationship("User", back_populates="offers_made")
 
+    __table_args__ = (
+        # Expiry sweeps and "does this item still have open offers" checks.
+        Index(
+            "ix_offers_pending_created_at",
+            "created_at",
+            "id",
+            postgresql_where=(status == OfferStatus.PENDING),
+        ),
+        Index(
+            "ix_offers_pending_item_id",
+            "item_id",
+            postgresql_where=(status == OfferStatus.PENDING),
+        ),
+        Index("ix_offers_updated_at_id", "updated_at", "id"),
+    )
+    __mapper_args__ = {"version_id_col": version}
+
 
 class Job(Base):
     __tablename__ = "jobs"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     item_id: Mapped[int] = mapped_column(ForeignKey("items.id"), nullable=False)
 
-    client_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"), nullable=False)
-    fixer_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"), nullable=False)
+    client_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("users.id"), nullable=False, index=True
+    )
+    fixer_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("users.id"), nullable=False, index=True
+    )
 
     agreed_price: Mapped[float] = mapped_column(Float, nullable=False)
     status: Mapped[JobStatus] = mapped_column(
-        SAEnum(JobStatus), default=JobStatus.ACTIVE
+        SmallEnum(JobStatus), default=JobStatus.ACTIVE
     )
 
     started_at: Mapped[datetime] = mapped_column(
         DateTime, default=lambda: datetime.now(timezone.utc)
     )
     completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    # Incremental exports (app.tools.export) pick up changed rows by this.
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        server_default=text("(now() AT TIME ZONE 'utc')"),
+    )
+
+    version: Mapped[int] = mapped_column(Integer, nullable=False, server_default="1")
 
     item: Mapped["Item"] = relationship("Item", back_populates="jobs")
     client: Mapped["User"] = relationship(
@@ -313,16 +490,32 @@ class Job(Base):
         "User", foreign_keys=[fixer_id], back_populates="jobs_as_fixer"
     )
 
+    __table_args__ = (
+        Index(
+            "ix_jobs_active_started_at",
+            "started_at",
+            "id",
+            postgresql_where=(status == JobStatus.ACTIVE),
+        ),
+        Index("ix_jobs_updated_at_id", "updated_at", "id"),
+    )
+    __mapper_args__ = {"version_id_col": version}
+
     messages: Mapped[List["Message"]] = relationship(
         "Message", back_populates="job", cascade="all, delete-orphan"
     )
-    review: Mapped[Optional["Review"]] = relationship(
-        "Review", back_populates="job", uselist=False
-    )
+    # One review per side: the client reviews the fixer and vice versa.
+    reviews: Mapped[List["Review"]] = relationship("Review", back_populates="job")
 
 
 class Message(Base):
+    # Range partitioned by created_at in the database (monthly, see migration
+    # 7b2d4e6f1a90), where the primary key is (id, created_at).
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_job_id_created_at", "job_id", "created_at"),
+        Index("ix_messages_search_vector", "search_vector", postgresql_using="gin"),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     job_id: Mapped[int] = mapped_column(ForeignKey("jobs.id"), nullable=False)
     sender_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"), nullable=False)
@@ -330,9 +523,15 @@ class Message(Base):
         SAEnum(MessageType), default=MessageType.TEXT
     )
     message_status: Mapped[MessageStatus] = mapped_column(
-        SAEnum(MessageStatus), default=MessageStatus.DELIVERED
+        SmallEnum(MessageStatus), default=MessageStatus.DELIVERED
     )
     content: Mapped[str] = mapped_column(Text, nullable=True)
+    # Maintained by Postgres; searched by MessageService.search_messages.
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR,
+        Computed("to_tsvector('english'::regconfig, coalesce(content, ''::text))", persisted=True),
+        deferred=True,
+    )
 
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=lambda: datetime.now(timezone.utc)
@@ -347,14 +546,37 @@ class Message(Base):
 class MessageAttachment(Base):
     __tablename__ = "message_attachments"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    message_id: Mapped[int] = mapped_column(ForeignKey("messages.id"), nullable=False)
+    # Only declared for the ORM join; the database has no constraint because
+    # messages is partitioned.
+    message_id: Mapped[int] = mapped_column(
+        ForeignKey("messages.id"), nullable=False, index=True
+    )
 
     file_url: Mapped[str] = mapped_column(String, nullable=False)
     file_type: Mapped[str] = mapped_column(String)
+    # Set for uploads that went through /media; variants are filled in once
+    # the thumbnails are ready (see MediaAsset).
+    content_hash: Mapped[Optional[str]] = mapped_column(String, nullable=True, index=True)
+    variants: Mapped[Optional[dict]] = mapped_column(
+        JSONB(none_as_null=True), nullable=True
+    )
 
     message: Mapped["Message"] = relationship("Message", back_populates="attachments")
 
 
+class MessageArchive(Base):
+    __tablename__ = "message_archives"
+    job_id: Mapped[int] = mapped_column(ForeignKey("jobs.id"), primary_key=True)
+
+    message_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    # zlib compressed JSON list in the MessageResponse wire format
+    payload: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc)
+    )
+
+
 class Review(Base):
     __tablename__ = "reviews"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -363,7 +585,9 @@ class Review(Base):
     reviewer_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey("users.id"), nullable=False
     )
-    target_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"), nullable=False)
+    target_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("users.id"), nullable=False, index=True
+    )
 
     rating: Mapped[int] = mapped_column(Integer)  # 1-5
     comment: Mapped[Optional[str]] = mapped_column(Text)
@@ -371,7 +595,7 @@ class Review(Base):
         DateTime, default=lambda: datetime.now(timezone.utc)
     )
 
-    job: Mapped["Job"] = relationship("Job", back_populates="review")
+    job: Mapped["Job"] = relationship("Job", back_populates="reviews")
     reviewer: Mapped["User"] = relationship(
         "User", foreign_keys=[reviewer_id], back_populates="reviews_written"
     )
@@ -379,6 +603,8 @@ class Review(Base):
         "User", foreign_keys=[target_id], back_populates="reviews_received"
     )
 
+    __table_args__ = (UniqueConstraint("job_id", "reviewer_id", name="uq_reviews_job_reviewer"),)
+
 
 class UserSkill(Base):
     __tablename__ = "user_skills"
@@ -405,3 +631,125 @@ class Rewards(Base):
     description: Mapped[str] = mapped_column(Text)
     cost_xp: Mapped[int] = mapped_column(Integer)
     image_url: Mapped[Optional[str]] = mapped_column(String)
+
+    status: Mapped[RewardStatus] = mapped_column(
+        SAEnum(RewardStatus), default=RewardStatus.ACTIVE, nullable=False
+    )
+    expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    # NULL means unlimited.
+    stock: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+
+    __table_args__ = (
+        Index(
+            "ix_rewards_active_expires_at",
+            "expires_at",
+            postgresql_where=(status == RewardStatus.ACTIVE),
+        ),
+    )
+
+
+class RewardRedemption(Base):
+    __tablename__ = "reward_redemptions"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    reward_id: Mapped[int] = mapped_column(
+        ForeignKey("rewards.id"), nullable=False, index=True
+    )
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("users.id"), nullable=False, index=True
+    )
+    cost_xp: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc)
+    )
+
+
+class OutboxEvent(Base):
+    __tablename__ = "outbox_events"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    event_type: Mapped[str] = mapped_column(String, nullable=False)
+    payload: Mapped[dict] = mapped_column(JSONB, default=dict)
+    idempotency_key: Mapped[str] = mapped_column(String, unique=True, nullable=False)
+
+    status: Mapped[OutboxStatus] = mapped_column(
+        SAEnum(OutboxStatus), default=OutboxStatus.PENDING, nullable=False
+    )
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    last_error: Mapped[Optional[str]] = mapped_column(Text)
+
+    available_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc)
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc)
+    )
+    processed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index(
+            "ix_outbox_events_pending",
+            "available_at",
+            "id",
+            postgresql_where=(status == OutboxStatus.PENDING),
+        ),
+    )
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    user_id: Mapped[str] = mapped_column(String, primary_key=True)
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+
+    request_hash: Mapped[str] = mapped_column(String, nullable=False)
+    # NULL until the first request finishes.
+    status_code: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    response_body: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+
+
+class MediaAsset(Base):
+    __tablename__ = "media_assets"
+    # sha256 of the original upload; identical uploads share one asset.
+    content_hash: Mapped[str] = mapped_column(String, primary_key=True)
+
+    content_type: Mapped[str] = mapped_column(String, nullable=False)
+    size_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    original_url: Mapped[str] = mapped_column(String, nullable=False, unique=True)
+
+    status: Mapped[MediaStatus] = mapped_column(
+        SAEnum(MediaStatus), default=MediaStatus.PROCESSING, nullable=False
+    )
+    # variant name -> {"url", "width", "height", "content_type", "bytes"}
+    variants: Mapped[Optional[dict]] = mapped_column(
+        JSONB(none_as_null=True), nullable=True
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc)
+    )
+    # When the current render started; a PROCESSING asset older than the
+    # lease (MEDIA_PROCESSING_TIMEOUT_SECONDS) is treated as abandoned.
+    processing_started_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        server_default=text("(now() AT TIME ZONE 'utc')"),
+        nullable=False,
+    )
+
+
+class QueuedNotification(Base):
+    # Events waiting to be folded into a digest by app.workers.notifier; rows
+    # are deleted once their digest is sent, so the table stays small.
+    __tablename__ = "notification_queue"
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    recipient_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"), nullable=False)
+    kind: Mapped[NotificationKind] = mapped_column(SmallEnum(NotificationKind), nullable=False)
+    # Item id for NEW_OFFER, job id for NEW_MESSAGE.
+    subject_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc), nullable=False
+    )
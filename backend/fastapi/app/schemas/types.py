@@ -0,0 +1,42 @@
+import enum
+from typing import Optional, Type
+
+from sqlalchemy import SmallInteger
+from sqlalchemy.types import TypeDecorator
+
+
+class SmallEnum(TypeDecorator):
+    """A Python enum stored as a SMALLINT code instead of a native Postgres enum.
+
+    Codes are the members' positions in the enum's definition, so members of
+    an enum stored this way may only be appended, never reordered or removed.
+    The member/code lookups are built once per column type rather than per row.
+    """
+
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, enum_class: Type[enum.Enum]):
+        super().__init__()
+        self.enum_class = enum_class
+        self._members = tuple(enum_class)
+        self._codes = {member: code for code, member in enumerate(self._members)}
+
+    @property
+    def python_type(self):
+        return self.enum_class
+
+    def process_bind_param(self, value, dialect) -> Optional[int]:
+        if value is None:
+            return None
+        try:
+            return self._codes[value]
+        except KeyError:
+            raise LookupError(
+                f"{value!r} is not among the defined enum values of {self.enum_class.__name__}"
+            ) from None
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return self._members[value]
@@ -1,15 +1,26 @@
 import os
-from supabase import Client, create_client
+from functools import lru_cache
+from typing import TYPE_CHECKING
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
-url = os.environ.get("SUPABASE_URL")
-key = os.environ.get("SUPABASE_KEY")
+if TYPE_CHECKING:
+    from supabase import Client
 
-if not url or not key:
-    raise ValueError("Supabase credentials are not set in .env")
 
-supabase: Client = create_client(url, key)
+@lru_cache(maxsize=1)
+def get_supabase() -> "Client":
+    # supabase pulls in gotrue, httpx and friends; importing it on first use
+    # keeps app startup, Alembic and CLI tools from paying for it.
+    from supabase import create_client
+
+    url = os.environ.get("SUPABASE_URL")
+    key = os.environ.get("SUPABASE_KEY")
+
+    if not url or not key:
+        raise ValueError("Supabase credentials are not set in .env")
+
+    return create_client(url, key)
 
 
 security = HTTPBearer()
@@ -17,6 +28,7 @@ security = HTTPBearer()
 
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
+    supabase = get_supabase()
 
     try:
         user = supabase.auth.get_user(token)
@@ -0,0 +1,45 @@
+from collections import defaultdict
+from typing import Callable, Dict, List
+
+from sqlalchemy.orm import Session
+from app.schemas.schema import Job, JobStatus
+from app.services.events.outbox_service import JOB_COMPLETED
+from app.services.user.badge_service import BadgeService
+
+
+Handler = Callable[[Session, dict], None]
+
+HANDLERS: Dict[str, List[Handler]] = defaultdict(list)
+
+
+def handles(event_type: str):
+    def register(func: Handler) -> Handler:
+        HANDLERS[event_type].append(func)
+        return func
+
+    return register
+
+
+@handles(JOB_COMPLETED)
+def award_first_fix_badge(db: Session, payload: dict) -> None:
+    # Whether this was the fixer's first completed job is decided when the
+    # job completes; by the time a retried or backlogged event runs, later
+    # jobs may have completed too.
+    fixer_id = payload["fixer_id"]
+    first_fix = payload.get("first_fix")
+    if first_fix is None:
+        # Events queued before the payload carried it.
+        first_fix = (
+            db.query(Job)
+            .filter(
+                Job.fixer_id == fixer_id,
+                Job.status.in_([JobStatus.COMPLETED, JobStatus.VERIFIED]),
+            )
+            .count()
+            == 1
+        )
+
+    if first_fix:
+        BadgeService(db).award_badge(
+            user_id=fixer_id, badge_name="First Fix", badge_slug="first-fix"
+        )
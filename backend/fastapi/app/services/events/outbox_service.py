@@ -0,0 +1,53 @@
+import uuid
+from datetime import date, datetime, timezone
+from typing import Optional
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.schemas.schema import OutboxEvent, OutboxStatus
+
+
+JOB_COMPLETED = "job.completed"
+
+
+def _jsonable(value):
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    return value
+
+
+class OutboxService:
+    """Records domain events in the caller's transaction.
+
+    ``publish`` never commits: the event becomes visible to the outbox worker
+    only if the surrounding write commits.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def publish(
+        self, event_type: str, payload: dict, idempotency_key: Optional[str] = None
+    ) -> bool:
+        """Returns False when an event with the same idempotency key exists."""
+        stmt = (
+            insert(OutboxEvent)
+            .values(
+                event_type=event_type,
+                payload=_jsonable(payload),
+                idempotency_key=idempotency_key or f"{event_type}:{uuid.uuid4()}",
+                status=OutboxStatus.PENDING,
+                attempts=0,
+                available_at=datetime.now(timezone.utc),
+                created_at=datetime.now(timezone.utc),
+            )
+            .on_conflict_do_nothing(index_elements=[OutboxEvent.idempotency_key])
+            .returning(OutboxEvent.id)
+        )
+        return self.db.execute(stmt).scalar() is not None
@@ -0,0 +1,190 @@
+import os
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import Integer, and_, case, delete, func, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.orm import Session
+from app.core.concurrency import version_bump
+from app.core.database import read_only
+from app.core.instrumentation import instrument_service
+from app.core.metrics import metrics
+from app.schemas.schema import ActivityRollup, UserActivity, UserGamification
+from app.services.user.gamification_service import STREAK_BONUS_XP, XP_PER_LEVEL_BASE
+
+
+ACTIVITY_RETENTION_DAYS = int(os.environ.get("ACTIVITY_RETENTION_DAYS", "90"))
+# Lower bounds of the streak report buckets: 1-2, 3-6, 7-13, 14-29, 30-99, 100+.
+STREAK_BUCKETS = (1, 3, 7, 14, 30, 100)
+
+# One CASE stands in for add_xp's level-up loop, which only holds while the
+# bonus cannot cross more than one level.
+assert STREAK_BONUS_XP <= XP_PER_LEVEL_BASE
+
+metrics.counter("kintsugi_streak_days_processed_total", "Days rolled forward by the streak batch.")
+metrics.counter("kintsugi_streak_users_total", "Users updated by the streak batch, by outcome.")
+metrics.gauge("kintsugi_streak_batch_duration_seconds", "Duration of the last streak batch day.")
+
+
+def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+@instrument_service
+class ActivityService:
+    """Daily activity log and the batch that turns it into login streaks.
+
+    A login costs one insert into ``user_activity``. ``process_days`` runs on
+    the scheduler and, for every finished UTC day not processed yet, updates
+    all of that day's users in one statement: streaks continue (with
+    ``STREAK_BONUS_XP``) or restart, and streaks of users who were not active
+    drop to zero.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def record_login(self, user_id: uuid.UUID) -> None:
+        """Count today towards the user's streak; repeat calls on the same day
+        do nothing."""
+        self.db.execute(
+            pg_insert(UserActivity)
+            .values(activity_date=_today(), user_id=user_id)
+            .on_conflict_do_nothing()
+        )
+        self.db.commit()
+
+    def process_days(self, today: Optional[date] = None) -> dict:
+        """Roll streaks forward through every finished day, oldest first."""
+        today = today or _today()
+        last = self.db.scalar(select(func.max(ActivityRollup.activity_date)))
+        if last is not None:
+            start = last + timedelta(days=1)
+        else:
+            start = self.db.scalar(select(func.min(UserActivity.activity_date)))
+
+        summary = {"days": 0, "active": 0, "continued": 0, "started": 0, "reset": 0}
+        day = start
+        while day is not None and day < today:
+            result = self.process_day(day)
+            if result is not None:
+                summary["days"] += 1
+                for key in ("active", "continued", "started", "reset"):
+                    summary[key] += result[key]
+            day += timedelta(days=1)
+
+        self.db.execute(
+            delete(UserActivity).where(
+                UserActivity.activity_date < today - timedelta(days=ACTIVITY_RETENTION_DAYS)
+            )
+        )
+        self.db.commit()
+
+        if summary["days"]:
+            summary["streak_buckets"] = self.streak_buckets()
+        return summary
+
+    def process_day(self, day: date) -> Optional[dict]:
+        """Apply one day's activity in a single transaction; None when
+        another run already claimed the day."""
+        started = time.perf_counter()
+        claimed = self.db.scalar(
+            pg_insert(ActivityRollup)
+            .values(activity_date=day, processed_at=datetime.now(timezone.utc))
+            .on_conflict_do_nothing()
+            .returning(ActivityRollup.activity_date)
+        )
+        if claimed is None:
+            self.db.rollback()
+            return None
+
+        g = UserGamification
+        active = (UserActivity.activity_date == day, UserActivity.user_id == g.user_id)
+        this_day = datetime.combine(day, datetime.min.time())
+        previous_day = this_day - timedelta(days=1)
+
+        # Users whose first activity this is have no progress row yet.
+        self.db.execute(
+            pg_insert(g)
+            .from_select(
+                ["user_id", "current_xp", "current_level", "login_streak"],
+                select(UserActivity.user_id, literal(0), literal(1), literal(0)).where(
+                    UserActivity.activity_date == day
+                ),
+            )
+            .on_conflict_do_nothing()
+        )
+
+        # SET expressions see the row as it was, so these all read the old
+        # streak, XP and level.
+        continued = and_(g.last_action_date >= previous_day, g.last_action_date < this_day)
+        bonus_xp = g.current_xp + STREAK_BONUS_XP
+        level_xp = g.current_level * XP_PER_LEVEL_BASE
+        levels_up = and_(continued, bonus_xp >= level_xp)
+        streaks = self.db.scalars(
+            update(g)
+            .where(*active, or_(g.last_action_date.is_(None), g.last_action_date < this_day))
+            .values(
+                login_streak=case((continued, g.login_streak + 1), else_=1),
+                current_xp=case(
+                    (levels_up, bonus_xp - level_xp), (continued, bonus_xp), else_=g.current_xp
+                ),
+                current_level=case((levels_up, g.current_level + 1), else_=g.current_level),
+                last_action_date=this_day,
+                **version_bump(g),
+            )
+            .returning(g.login_streak)
+            .execution_options(synchronize_session=False)
+        ).all()
+
+        reset = self.db.execute(
+            update(g)
+            .where(g.login_streak > 0, g.last_action_date < this_day)
+            .values(login_streak=0, **version_bump(g))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+        result = {
+            "active": len(streaks),
+            "continued": sum(1 for s in streaks if s > 1),
+            "started": sum(1 for s in streaks if s == 1),
+            "reset": reset,
+        }
+        self.db.execute(
+            update(ActivityRollup)
+            .where(ActivityRollup.activity_date == day)
+            .values(
+                active_users=result["active"],
+                streaks_continued=result["continued"],
+                streaks_started=result["started"],
+                streaks_reset=result["reset"],
+            )
+        )
+        self.db.commit()
+
+        metrics.inc("kintsugi_streak_days_processed_total")
+        for outcome in ("continued", "started", "reset"):
+            metrics.inc("kintsugi_streak_users_total", result[outcome], outcome=outcome)
+        metrics.set("kintsugi_streak_batch_duration_seconds", time.perf_counter() - started)
+        return result
+
+    @read_only
+    def streak_buckets(self) -> Dict[str, int]:
+        """Users per streak length bucket, e.g. ``{"1-2": 310, "3-6": 95}``."""
+        bucket = func.width_bucket(
+            UserGamification.login_streak, literal(list(STREAK_BUCKETS), ARRAY(Integer))
+        )
+        counts = dict(
+            self.db.execute(
+                select(bucket, func.count())
+                .where(UserGamification.login_streak > 0)
+                .group_by(bucket)
+            ).all()
+        )
+        labels = [
+            f"{low}-{high - 1}" if high - 1 > low else str(low)
+            for low, high in zip(STREAK_BUCKETS, STREAK_BUCKETS[1:])
+        ] + [f"{STREAK_BUCKETS[-1]}+"]
+        return {label: counts.get(i, 0) for i, label in enumerate(labels, start=1)}
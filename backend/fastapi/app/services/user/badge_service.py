@@ -1,19 +1,35 @@
 from os import name
+from datetime import datetime, timezone
 from typing import List
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 from app.schemas.schema import UserBadge, User
-from sqlalchemy import exists
+from sqlalchemy import exists, func, select
+from sqlalchemy.dialects.postgresql import insert
+from app.core.database import read_only
+from app.core.http_cache import Version
+from app.core.instrumentation import instrument_service
 # from app.schemas.schema import UserBadge as UserBadgeSchema
 
 
+@instrument_service
 class BadgeService:
     def __init__(self, db: Session):
         self.db = db
 
+    @read_only
     def get_user_badges(self, user_id: str) -> List[UserBadge]:
         return self.db.query(UserBadge).filter(UserBadge.user_id == user_id).all()
 
+    @read_only
+    def badges_version(self, user_id: str) -> Version:
+        """Badges are only ever awarded (new id) or revoked (count drops)."""
+        count, max_id = self.db.execute(
+            select(func.count(), func.max(UserBadge.id)).where(UserBadge.user_id == user_id)
+        ).one()
+        return Version(parts=(count, max_id))
+
+    @read_only
     def has_badge(self, user_id: str, badge_slug: str) -> bool:
         stmt = exists().where(
             (UserBadge.user_id == user_id) & (UserBadge.badge_slug == badge_slug)
@@ -27,22 +43,25 @@ class BadgeService:
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
-        existing_badge = (
-            self.db.query(UserBadge)
-            .filter(UserBadge.user_id == user_id, UserBadge.badge_slug == badge_slug)
-            .first()
+        # A user holds a badge once; a repeated award (an outbox retry, two
+        # events racing) keeps the first one.
+        self.db.execute(
+            insert(UserBadge)
+            .values(
+                user_id=user_id,
+                name=badge_name,
+                badge_slug=badge_slug,
+                earned_at=datetime.now(timezone.utc),
+            )
+            .on_conflict_do_nothing(index_elements=[UserBadge.user_id, UserBadge.badge_slug])
         )
-
-        if existing_badge:
-            return existing_badge
-
-        new_badge = UserBadge(user_id=user_id, name=badge_name, badge_slug=badge_slug)
-
-        self.db.add(new_badge)
         self.db.commit()
-        self.db.refresh(new_badge)
 
-        return new_badge
+        return (
+            self.db.query(UserBadge)
+            .filter(UserBadge.user_id == user_id, UserBadge.badge_slug == badge_slug)
+            .one()
+        )
 
     def revoke_badge(self, user_id: str, badge_slug: str) -> dict:
         badge = (
@@ -59,6 +78,7 @@ class BadgeService:
 
         return {"message": f"Badge '{badge_slug}' revoked from user."}
 
+    @read_only
     def get_all_distributed_badges(
         self, skip: int = 0, limit: int = 100
     ) -> List[UserBadge]:
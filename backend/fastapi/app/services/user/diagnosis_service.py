@@ -0,0 +1,88 @@
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload
+from app.core.diagnosis_client import DIAGNOSIS_DEFAULT_MODEL
+from app.core.instrumentation import instrument_service
+from app.schemas.dtos.diagnosis_dto import DiagnosisRequestCreate, DiagnosisRequestResponse
+from app.schemas.schema import DiagnosisRequest, DiagnosisRequestStatus, Item
+
+
+# Models callers may ask for; the default model is always allowed.
+DIAGNOSIS_MODELS = {
+    m.strip()
+    for m in os.environ.get("DIAGNOSIS_MODELS", DIAGNOSIS_DEFAULT_MODEL).split(",")
+    if m.strip()
+} | {DIAGNOSIS_DEFAULT_MODEL}
+
+
+@instrument_service
+class DiagnosisService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def request_diagnosis(
+        self, item_id: int, user_id: uuid.UUID, data: DiagnosisRequestCreate
+    ) -> DiagnosisRequestResponse:
+        """Queue a diagnosis for the diagnosis worker.
+
+        An identical request that is still queued or running is returned
+        instead of queueing the item twice.
+        """
+        item = self.db.get(Item, item_id)
+        if item is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+        if item.owner_id != user_id:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not your item")
+
+        model = data.model or DIAGNOSIS_DEFAULT_MODEL
+        if model not in DIAGNOSIS_MODELS:
+            raise HTTPException(status_code=422, detail="Unknown model")
+
+        existing = self.db.scalar(
+            select(DiagnosisRequest).where(
+                DiagnosisRequest.item_id == item_id,
+                DiagnosisRequest.diagnosis_type == data.diagnosis_type,
+                DiagnosisRequest.model == model,
+                DiagnosisRequest.status.in_(
+                    [DiagnosisRequestStatus.PENDING, DiagnosisRequestStatus.RUNNING]
+                ),
+            )
+        )
+        if existing is not None:
+            return DiagnosisRequestResponse.model_validate(existing)
+
+        now = datetime.now(timezone.utc)
+        request = DiagnosisRequest(
+            item_id=item_id,
+            requested_by=user_id,
+            diagnosis_type=data.diagnosis_type,
+            model=model,
+            media_urls=data.media_urls if data.media_urls is not None else list(item.images or []),
+            status=DiagnosisRequestStatus.PENDING,
+            attempts=0,
+            available_at=now,
+            created_at=now,
+        )
+        self.db.add(request)
+        self.db.commit()
+        self.db.refresh(request)
+        return DiagnosisRequestResponse.model_validate(request)
+
+    def get_request(
+        self, request_id: int, user_id: uuid.UUID
+    ) -> Optional[DiagnosisRequestResponse]:
+        """Status of a queued diagnosis, with the result once it is done.
+
+        Not routed to replicas: clients poll right after queueing.
+        """
+        request = self.db.scalar(
+            select(DiagnosisRequest)
+            .options(joinedload(DiagnosisRequest.diagnosis))
+            .where(DiagnosisRequest.id == request_id, DiagnosisRequest.requested_by == user_id)
+        )
+        return DiagnosisRequestResponse.model_validate(request) if request else None
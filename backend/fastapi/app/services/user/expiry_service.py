@@ -0,0 +1,132 @@
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+
+from sqlalchemy import exists, select, update
+from sqlalchemy.orm import Session
+from app.core.concurrency import version_bump
+from app.core.instrumentation import instrument_service
+from app.core.metrics import metrics
+from app.schemas.schema import (
+    Item,
+    ItemStatus,
+    Job,
+    JobStatus,
+    Offer,
+    OfferStatus,
+    RewardStatus,
+    Rewards,
+)
+from app.services.user.job_service import JOB_STALE_DAYS, JobService
+
+
+OFFER_TTL_DAYS = int(os.environ.get("OFFER_TTL_DAYS", "14"))
+SWEEP_BATCH_SIZE = int(os.environ.get("SWEEP_BATCH_SIZE", "500"))
+
+metrics.counter("kintsugi_sweep_rows_total", "Rows changed by expiry sweeps.")
+metrics.gauge("kintsugi_sweep_duration_seconds", "Duration of the last run of each sweep.")
+
+
+@instrument_service
+class ExpiryService:
+    """Chunked sweeps that expire stale offers, items, jobs and rewards.
+
+    Every batch locks its rows with ``FOR UPDATE SKIP LOCKED`` and commits on
+    its own, so rows busy in a live request are left for the next run instead
+    of blocking it.
+    """
+
+    def __init__(self, db: Session, batch_size: int = SWEEP_BATCH_SIZE):
+        self.db = db
+        self.batch_size = batch_size
+
+    def _sweep(self, name: str, model, criteria, order_by, values: dict) -> int:
+        started = time.perf_counter()
+        total = 0
+
+        while True:
+            batch = (
+                select(model.id)
+                .where(*criteria)
+                .order_by(*order_by)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
+            )
+            changed = self.db.scalars(
+                update(model)
+                .where(model.id.in_(batch))
+                .values(**values, **version_bump(model))
+                .returning(model.id)
+                .execution_options(synchronize_session=False)
+            ).all()
+            self.db.commit()
+
+            total += len(changed)
+            metrics.inc("kintsugi_sweep_rows_total", len(changed), sweep=name)
+            if len(changed) < self.batch_size:
+                break
+
+        metrics.set(
+            "kintsugi_sweep_duration_seconds", time.perf_counter() - started, sweep=name
+        )
+        return total
+
+    def expire_offers(self, ttl: timedelta = timedelta(days=OFFER_TTL_DAYS)) -> int:
+        cutoff = datetime.now(timezone.utc) - ttl
+        return self._sweep(
+            "offers",
+            Offer,
+            (Offer.status == OfferStatus.PENDING, Offer.created_at < cutoff),
+            (Offer.created_at, Offer.id),
+            {"status": OfferStatus.WITHDRAWN},
+        )
+
+    def release_stale_items(self) -> int:
+        """Reopen PENDING items that no longer have a pending offer or a job."""
+        has_pending_offer = exists().where(
+            Offer.item_id == Item.id, Offer.status == OfferStatus.PENDING
+        )
+        has_open_job = exists().where(
+            Job.item_id == Item.id,
+            Job.status.in_([JobStatus.ACTIVE, JobStatus.DISPUTED]),
+        )
+        return self._sweep(
+            "items",
+            Item,
+            (Item.status == ItemStatus.PENDING, ~has_pending_offer, ~has_open_job),
+            (Item.id,),
+            {"status": ItemStatus.OPEN},
+        )
+
+    def expire_rewards(self) -> int:
+        return self._sweep(
+            "rewards",
+            Rewards,
+            (
+                Rewards.status == RewardStatus.ACTIVE,
+                Rewards.expires_at <= datetime.now(timezone.utc),
+            ),
+            (Rewards.expires_at, Rewards.id),
+            {"status": RewardStatus.EXPIRED},
+        )
+
+    def cancel_stale_jobs(self, stale_after: timedelta = timedelta(days=JOB_STALE_DAYS)) -> int:
+        started = time.perf_counter()
+        cancelled = JobService(self.db).cancel_stale_jobs(stale_after, self.batch_size)
+        metrics.inc("kintsugi_sweep_rows_total", cancelled, sweep="jobs")
+        metrics.set(
+            "kintsugi_sweep_duration_seconds", time.perf_counter() - started, sweep="jobs"
+        )
+        return cancelled
+
+    def run_all(self) -> Dict[str, int]:
+        # Offers first so items whose last offer just expired are released in
+        # the same run; cancelled jobs reopen their items themselves.
+        return {
+            "offers": self.expire_offers(),
+            "items": self.release_stale_items(),
+            "jobs": self.cancel_stale_jobs(),
+            "rewards": self.expire_rewards(),
+        }
@@ -1,12 +1,15 @@
 from sqlalchemy.orm import Session
-from datetime import datetime, timezone, timedelta
 from app.schemas.schema import UserGamification
+from app.services.user.leaderboard_service import leaderboards
+from app.core.concurrency import retry_on_conflict
+from app.core.instrumentation import instrument_service
 
 
 XP_PER_LEVEL_BASE = 100
 STREAK_BONUS_XP = 10
 
 
+@instrument_service
 class GamificationService:
     def __init__(self, db: Session):
         self.db = db
@@ -23,13 +26,14 @@ class GamificationService:
                 current_xp=0,
                 current_level=1,
                 login_streak=0,
-                last_action_date=datetime.now(timezone.utc),
             )
             self.db.add(progress)
             self.db.commit()
             self.db.refresh(progress)
+            leaderboards.record_xp(user_id, progress.current_level, progress.current_xp)
         return progress
 
+    @retry_on_conflict
     def add_xp(self, user_id: str, amount: int) -> dict:
         progress = self.get_progress(user_id)
         progress.current_xp += amount
@@ -45,35 +49,10 @@ class GamificationService:
 
         self.db.commit()
         self.db.refresh(progress)
+        leaderboards.record_xp(user_id, progress.current_level, progress.current_xp)
 
         return {
             "leveled_up": leveled_up,
             "new_level": progress.current_level,
             "current_xp": progress.current_xp,
         }
-
-    def update_login_streak(self, user_id: str) -> int:
-        progress = self.get_progress(user_id)
-        now = datetime.now(timezone.utc)
-
-        if not progress.last_action_date:
-            progress.last_action_date = now
-            progress.login_streak = 1
-            self.db.commit()
-            return 1
-
-        last_date = progress.last_action_date.date()
-        today = now.date()
-
-        delta = (today - last_date).days
-
-        if delta == 1:
-            progress.login_streak += 1
-            self.add_xp(user_id, STREAK_BONUS_XP)
-
-        elif delta > 1:
-            progress.login_streak = 1
-
-        progress.last_action_date = now
-        self.db.commit()
-        return progress.login_streak
@@ -1,14 +1,25 @@
+import os
+import uuid
 from datetime import datetime, timezone, timedelta
 from fastapi import HTTPException, status
-from gotrue import Optional
-from sqlalchemy import exists
+from typing import List, Optional
+from sqlalchemy import exists, func, or_, select
 from sqlalchemy.orm import Session
+from app.core.database import read_only
+from app.core.http_cache import Version
 from app.schemas.schema import Item, ItemStatus, Job, JobStatus
-from backend.fastapi.app.schemas.dto import JobCreate
-from backend.fastapi.app.services.user.badge_service import BadgeService
+from app.schemas.dto import JobCreate
+from app.services.events.outbox_service import JOB_COMPLETED, OutboxService
+from app.services.user.job_state_machine import can_transition, transition_statement
 from sqlalchemy.exc import IntegrityError
+from app.core.instrumentation import instrument_service
 
 
+# ACTIVE jobs untouched this long are cancelled by the expiry sweep.
+JOB_STALE_DAYS = int(os.environ.get("JOB_STALE_DAYS", "60"))
+
+
+@instrument_service
 class JobService:
     def __init__(self, db: Session):
         self.db = db
@@ -27,6 +38,7 @@ class JobService:
 
         return self.db.query(stmt).scalar()
 
+    @read_only
     def get_job_by_id(self, job_id) -> Job:
         job = self.db.query(Job).filter(Job.id == job_id).first()
         if not job:
@@ -36,6 +48,17 @@ class JobService:
 
         return job
 
+    @read_only
+    def job_version(self, job_id: int, user_id: uuid.UUID) -> Optional[Version]:
+        """The job's row version, which every write to the job moves forward;
+        None unless the user is the job's client or fixer."""
+        version = self.db.scalar(
+            select(Job.version).where(
+                Job.id == job_id, or_(Job.client_id == user_id, Job.fixer_id == user_id)
+            )
+        )
+        return Version(parts=(version,)) if version is not None else None
+
     def create_job(self, job_data: JobCreate) -> Job:
         new_job = Job(
             item_id=job_data.item_id,
@@ -71,40 +94,99 @@ class JobService:
 
         return new_job
 
-    def update_job_status(self, job_id: int, new_status: JobStatus) -> Optional[Job]:
-        job = self.get_job(job_id)
+    def transition(
+        self, job_id: int, new_status: JobStatus, *criteria, **values
+    ) -> Optional[Job]:
+        """Move one job to ``new_status`` without committing.
 
-        if not job:
-            return None
+        Returns None when the job does not exist or ``criteria`` exclude it,
+        and raises 409 when its current status does not allow the move.
+        """
+        try:
+            job = self.db.scalars(
+                transition_statement(new_status, Job.id == job_id, *criteria, **values)
+            ).one_or_none()
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+            )
+
+        if job is None:
+            current = self.db.scalar(select(Job.status).where(Job.id == job_id))
+            if current is None or can_transition(current, new_status):
+                return None
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Job cannot move from {current.value} to {new_status.value}",
+            )
+
+        return job
+
+    def bulk_transition(
+        self, new_status: JobStatus, *criteria, limit: Optional[int] = None, **values
+    ) -> List[Job]:
+        jobs = list(
+            self.db.scalars(
+                transition_statement(new_status, *criteria, limit=limit, **values)
+            )
+        )
+        self.db.commit()
+        return jobs
+
+    def cancel_stale_jobs(
+        self, stale_after: timedelta = timedelta(days=JOB_STALE_DAYS), batch_size: int = 500
+    ) -> int:
+        """Cancel ACTIVE jobs started more than ``stale_after`` ago and reopen
+        their items, committing every ``batch_size`` jobs."""
+        cutoff = datetime.now(timezone.utc) - stale_after
+        cancelled = 0
+        while True:
+            jobs = self.bulk_transition(
+                JobStatus.CANCELLED,
+                Job.status == JobStatus.ACTIVE,
+                Job.started_at < cutoff,
+                limit=batch_size,
+            )
+            cancelled += len(jobs)
+            if len(jobs) < batch_size:
+                return cancelled
 
-        job.status = new_status
+    def update_job_status(self, job_id: int, new_status: JobStatus) -> Optional[Job]:
+        job = self.transition(job_id, new_status)
         self.db.commit()
-        self.db.refresh(job)
         return job
 
     def complete_job(self, job_id: int, fixer_id: str) -> Optional[Job]:
-        job = self.get_job(job_id)
+        """Mark the job completed by its fixer; None when the job does not
+        exist or ``fixer_id`` is not its fixer."""
+        job = self.transition(
+            job_id,
+            JobStatus.COMPLETED,
+            Job.fixer_id == fixer_id,
+            completed_at=datetime.now(timezone.utc),
+        )
         if not job:
             return None
 
-        job.status = JobStatus.COMPLETED
-        job.completed_at = datetime.now(timezone.utc)
-
-        if job.item:
-            job.item.status = ItemStatus.FIXED
-
-        job_count = self.db.query(Job).filter(Job.fixer_id == fixer_id).count()
-
-        if job_count == 1:
-            badge_service = BadgeService(self.db)
-            badge_service.award_badge(
-                user_id=fixer_id, badge_name="First Fix", badge_slug="first-fix"
+        # Counted in this transaction, which already sees the job as completed.
+        completed = self.db.scalar(
+            select(func.count()).where(
+                Job.fixer_id == job.fixer_id,
+                Job.status.in_([JobStatus.COMPLETED, JobStatus.VERIFIED]),
             )
+        )
+
+        # Badges are awarded by the outbox worker once this commits.
+        OutboxService(self.db).publish(
+            JOB_COMPLETED,
+            {"job_id": job.id, "fixer_id": job.fixer_id, "first_fix": completed == 1},
+            idempotency_key=f"{JOB_COMPLETED}:{job.id}",
+        )
 
         try:
             self.db.commit()
-            self.db.refresh(job)
         except IntegrityError:
+            self.db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Failed to complete job. The item_id or fixer_id or client_id might be invalid.",
@@ -0,0 +1,75 @@
+from typing import Dict, FrozenSet, Optional
+
+from sqlalchemy import Select, select, update
+from sqlalchemy.orm import aliased
+
+from app.core.concurrency import version_bump
+from app.schemas.schema import Item, ItemStatus, Job, JobStatus
+
+
+# target status -> statuses a job may move to it from
+JOB_TRANSITIONS: Dict[JobStatus, FrozenSet[JobStatus]] = {
+    JobStatus.COMPLETED: frozenset({JobStatus.ACTIVE, JobStatus.DISPUTED}),
+    JobStatus.VERIFIED: frozenset({JobStatus.COMPLETED}),
+    JobStatus.DISPUTED: frozenset({JobStatus.ACTIVE, JobStatus.COMPLETED}),
+    JobStatus.CANCELLED: frozenset({JobStatus.ACTIVE, JobStatus.DISPUTED}),
+}
+
+# item status that follows a job into its new status
+ITEM_CASCADE: Dict[JobStatus, ItemStatus] = {
+    JobStatus.COMPLETED: ItemStatus.FIXED,
+    JobStatus.CANCELLED: ItemStatus.OPEN,
+}
+
+
+def can_transition(current: JobStatus, target: JobStatus) -> bool:
+    return current in JOB_TRANSITIONS.get(target, ())
+
+
+def transition_statement(
+    target: JobStatus, *criteria, limit: Optional[int] = None, **values
+) -> Select:
+    """Build a single statement that moves matching jobs to ``target``.
+
+    The job UPDATE only touches rows whose current status allows the move, and
+    the item cascade runs in the same statement against the rows that UPDATE
+    returned, so concurrent transitions cannot both win. Selecting from the
+    statement yields the updated ``Job`` rows; an empty result means nothing
+    matched or the jobs were in a status that does not allow the move.
+    """
+    sources = JOB_TRANSITIONS.get(target)
+    if not sources:
+        raise ValueError(f"jobs cannot transition to {target.name}")
+
+    where = [Job.status.in_(sources), *criteria]
+    if limit is not None:
+        candidates = (
+            select(Job.id)
+            .where(*where)
+            .order_by(Job.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        where.append(Job.id.in_(candidates.scalar_subquery()))
+
+    moved = (
+        update(Job)
+        .where(*where)
+        .values(status=target, **version_bump(Job), **values)
+        .returning(*Job.__table__.columns)
+        .cte("moved_jobs")
+    )
+    stmt = select(aliased(Job, moved))
+
+    item_status = ITEM_CASCADE.get(target)
+    if item_status is not None:
+        cascaded = (
+            update(Item)
+            .where(Item.id == moved.c.item_id)
+            .values(status=item_status)
+            .returning(Item.id)
+            .cte("cascaded_items")
+        )
+        stmt = stmt.add_cte(cascaded)
+
+    return stmt.execution_options(populate_existing=True)
@@ -0,0 +1,286 @@
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from fastapi import HTTPException, status
+from sortedcontainers import SortedList
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.metrics import metrics
+from app.schemas.schema import UserGamification, UserReputation, UserSkill
+
+
+logger = logging.getLogger("kintsugi.leaderboard")
+
+XP_BOARD = "xp"
+TRUST_BOARD = "trust"
+BOARDS = (XP_BOARD, TRUST_BOARD)
+
+Score = Tuple[int, ...]
+
+metrics.gauge("kintsugi_leaderboard_size", "Users in each in-memory leaderboard.")
+metrics.counter("kintsugi_leaderboard_drift_total", "Scores corrected by reconciliation.")
+
+
+class RankedIndex:
+    """Users ordered by score (highest first, ties by user id).
+
+    Insert, remove and rank lookups are O(log n).
+    """
+
+    def __init__(self):
+        self._scores: Dict[str, Score] = {}
+        self._ranked = SortedList()
+
+    @staticmethod
+    def _entry(user_id: str, score: Score):
+        return tuple(-part for part in score), user_id
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def upsert(self, user_id: str, score: Score) -> None:
+        old = self._scores.get(user_id)
+        if old == score:
+            return
+        if old is not None:
+            self._ranked.remove(self._entry(user_id, old))
+        self._scores[user_id] = score
+        self._ranked.add(self._entry(user_id, score))
+
+    def remove(self, user_id: str) -> None:
+        old = self._scores.pop(user_id, None)
+        if old is not None:
+            self._ranked.remove(self._entry(user_id, old))
+
+    def score(self, user_id: str) -> Optional[Score]:
+        return self._scores.get(user_id)
+
+    def rank(self, user_id: str) -> Optional[int]:
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+        return self._ranked.index(self._entry(user_id, score)) + 1
+
+    def slice(self, start: int, stop: int) -> List[dict]:
+        start = max(start, 0)
+        return [
+            {"rank": start + offset + 1, "user_id": user_id, "score": list(-p for p in key)}
+            for offset, (key, user_id) in enumerate(self._ranked.islice(start, stop))
+        ]
+
+    def top(self, limit: int) -> List[dict]:
+        return self.slice(0, limit)
+
+    def around(self, user_id: str, radius: int) -> List[dict]:
+        rank = self.rank(user_id)
+        if rank is None:
+            return []
+        return self.slice(rank - 1 - radius, rank + radius)
+
+
+class Leaderboards:
+    """Process-wide XP and trust leaderboards, global and per skill category.
+
+    Writes made through GamificationService/ReputationService in this process
+    are applied incrementally. Writes from other processes (outbox worker,
+    other API workers, batch jobs) are picked up by ``reconcile``.
+
+    ``record`` runs on threadpool threads, so boards are only read through
+    ``top`` and ``standing``, which hold the same lock. One reconcile runs at
+    a time; ``ensure_seeded`` waits for a running one instead of starting
+    another.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reconcile_lock = threading.Lock()
+        self._boards: Dict[str, RankedIndex] = {}
+        self._categories: Dict[str, Set[str]] = {}
+        self._pending: Optional[List[Tuple[str, str, Score]]] = None
+        self.seeded = False
+
+    @staticmethod
+    def _key(board: str, category: Optional[str] = None) -> str:
+        return f"{board}:{category}" if category else board
+
+    def _apply(
+        self,
+        boards: Dict[str, RankedIndex],
+        categories: Dict[str, Set[str]],
+        board: str,
+        user_id: str,
+        score: Score,
+    ) -> None:
+        boards.setdefault(board, RankedIndex()).upsert(user_id, score)
+        for category in categories.get(user_id, ()):
+            boards.setdefault(self._key(board, category), RankedIndex()).upsert(
+                user_id, score
+            )
+
+    def record(self, board: str, user_id, score: Score) -> None:
+        user_id = str(user_id)
+        with self._lock:
+            # A reconcile in progress replays it onto the boards it is building.
+            if self._pending is not None:
+                self._pending.append((board, user_id, score))
+            if self.seeded:
+                self._apply(self._boards, self._categories, board, user_id, score)
+
+    def record_xp(self, user_id, level: int, xp: int) -> None:
+        self.record(XP_BOARD, user_id, (level, xp))
+
+    def record_trust(self, user_id, trust_score: int) -> None:
+        self.record(TRUST_BOARD, user_id, (trust_score,))
+
+    def top(self, board: str, limit: int, category: Optional[str] = None) -> List[dict]:
+        with self._lock:
+            return self._board(board, category).top(limit)
+
+    def standing(
+        self, board: str, user_id: str, radius: int, category: Optional[str] = None
+    ) -> Optional[dict]:
+        """The user's rank, score and neighbours, read in one go; None when
+        the user is not on the board."""
+        with self._lock:
+            index = self._board(board, category)
+            rank = index.rank(user_id)
+            if rank is None:
+                return None
+            return {
+                "user_id": user_id,
+                "rank": rank,
+                "total": len(index),
+                "score": list(index.score(user_id)),
+                "neighbours": index.around(user_id, radius),
+            }
+
+    def _board(self, board: str, category: Optional[str]) -> RankedIndex:
+        return self._boards.get(self._key(board, category)) or RankedIndex()
+
+    def ensure_seeded(self, db: Session) -> None:
+        if self.seeded:
+            return
+        with self._reconcile_lock:
+            if not self.seeded:
+                self._reconcile(db)
+
+    def reconcile(self, db: Session) -> int:
+        """Rebuild every board from the database and swap it in.
+
+        Returns the number of scores that differed from the in-memory copy.
+        """
+        with self._reconcile_lock:
+            return self._reconcile(db)
+
+    def _reconcile(self, db: Session) -> int:
+        with self._lock:
+            self._pending = []
+
+        try:
+            categories: Dict[str, Set[str]] = defaultdict(set)
+            for user_id, skill in db.execute(
+                select(UserSkill.user_id, UserSkill.skill_name).execution_options(
+                    yield_per=5000
+                )
+            ):
+                if skill:
+                    categories[str(user_id)].add(skill)
+
+            boards: Dict[str, RankedIndex] = {}
+            for user_id, level, xp in db.execute(
+                select(
+                    UserGamification.user_id,
+                    UserGamification.current_level,
+                    UserGamification.current_xp,
+                ).execution_options(yield_per=5000)
+            ):
+                self._apply(boards, categories, XP_BOARD, str(user_id), (level, xp))
+
+            for user_id, trust_score in db.execute(
+                select(UserReputation.user_id, UserReputation.trust_score).execution_options(
+                    yield_per=5000
+                )
+            ):
+                self._apply(boards, categories, TRUST_BOARD, str(user_id), (trust_score,))
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            # Replay writes that landed while the snapshot was being read.
+            for board, user_id, score in self._pending:
+                self._apply(boards, categories, board, user_id, score)
+            self._pending = None
+
+            drift = 0
+            if self.seeded:
+                for board in BOARDS:
+                    old = self._boards.get(board) or RankedIndex()
+                    new = boards.get(board) or RankedIndex()
+                    drift += sum(
+                        1 for user_id, score in new._scores.items()
+                        if old.score(user_id) != score
+                    )
+
+            self._boards = boards
+            self._categories = dict(categories)
+            self.seeded = True
+
+        for key, index in boards.items():
+            metrics.set("kintsugi_leaderboard_size", len(index), board=key)
+        metrics.inc("kintsugi_leaderboard_drift_total", drift)
+        return drift
+
+
+leaderboards = Leaderboards()
+
+
+async def run_reconciler(
+    session_factory: Callable[[], Session], interval_seconds: float
+) -> None:
+    loop = asyncio.get_running_loop()
+
+    def reconcile_once() -> int:
+        with session_factory() as db:
+            return leaderboards.reconcile(db)
+
+    while True:
+        try:
+            drift = await loop.run_in_executor(None, reconcile_once)
+            if drift:
+                logger.info("leaderboard reconciliation corrected %s scores", drift)
+        except Exception:
+            logger.exception("leaderboard reconciliation failed")
+        await asyncio.sleep(interval_seconds)
+
+
+class LeaderboardService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _check_board(self, board: str) -> None:
+        if board not in BOARDS:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Leaderboard not found"
+            )
+        leaderboards.ensure_seeded(self.db)
+
+    def get_top(self, board: str, limit: int = 10, category: Optional[str] = None) -> List[dict]:
+        self._check_board(board)
+        return leaderboards.top(board, limit, category)
+
+    def get_user_rank(
+        self, board: str, user_id, radius: int = 2, category: Optional[str] = None
+    ) -> dict:
+        self._check_board(board)
+        standing = leaderboards.standing(board, str(user_id), radius, category)
+        if standing is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="User is not ranked"
+            )
+        return standing
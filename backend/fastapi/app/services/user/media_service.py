@@ -0,0 +1,227 @@
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, List, Optional
+
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.blob_store import BlobStore, get_blob_store, media_key
+from app.core.database import read_only
+from app.core.instrumentation import instrument_service
+from app.core.metrics import metrics
+from app.schemas.dtos.media_dto import MediaResponse
+from app.schemas.schema import MediaAsset, MediaStatus
+from app.workers.thumbnailer import get_thumbnailer
+
+
+MEDIA_MAX_BYTES = int(os.environ.get("MEDIA_MAX_BYTES", str(25 * 1024 * 1024)))
+# Where uploads are spooled before they reach the blob store; system temp dir if unset.
+MEDIA_SPOOL_DIR = os.environ.get("MEDIA_SPOOL_DIR") or None
+# A render that has not finished after this long (e.g. the process died) is
+# abandoned: the asset is marked FAILED and the next upload renders it again.
+MEDIA_PROCESSING_TIMEOUT_SECONDS = float(
+    os.environ.get("MEDIA_PROCESSING_TIMEOUT_SECONDS", "900")
+)
+
+# content type -> extension of the stored original
+ALLOWED_TYPES = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/webp": "webp",
+    "video/mp4": "mp4",
+    "video/quicktime": "mov",
+}
+
+metrics.counter("kintsugi_media_uploads_total", "Media uploads, by result.")
+
+
+@dataclass
+class SpooledUpload:
+    path: str
+    content_hash: str
+    size_bytes: int
+    content_type: str
+
+
+async def spool_upload(
+    chunks: AsyncIterator[bytes],
+    content_type: Optional[str],
+    max_bytes: int = MEDIA_MAX_BYTES,
+) -> SpooledUpload:
+    """Write an upload stream to a temp file, hashing it on the way.
+
+    The body is never held in memory as a whole; it is rejected as soon as it
+    goes over ``max_bytes``.
+    """
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type not in ALLOWED_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Unsupported media type",
+        )
+
+    digest = hashlib.sha256()
+    size = 0
+    # File I/O runs in the threadpool so a slow disk never stalls the event loop.
+    fd, path = await run_in_threadpool(
+        tempfile.mkstemp, prefix="kintsugi-upload-", dir=MEDIA_SPOOL_DIR
+    )
+    try:
+        with os.fdopen(fd, "wb") as out:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail="Upload too large")
+                digest.update(chunk)
+                await run_in_threadpool(out.write, chunk)
+    except BaseException:
+        await run_in_threadpool(os.unlink, path)
+        raise
+
+    if size == 0:
+        await run_in_threadpool(os.unlink, path)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty upload")
+
+    return SpooledUpload(path, digest.hexdigest(), size, content_type)
+
+
+def _reclaimable(now: datetime):
+    """Assets a new upload of the same bytes should render again."""
+    lease_expired = now - timedelta(seconds=MEDIA_PROCESSING_TIMEOUT_SECONDS)
+    return or_(
+        MediaAsset.status == MediaStatus.FAILED,
+        and_(
+            MediaAsset.status == MediaStatus.PROCESSING,
+            MediaAsset.processing_started_at < lease_expired,
+        ),
+    )
+
+
+@instrument_service
+class MediaService:
+    def __init__(self, db: Session, store: Optional[BlobStore] = None):
+        self.db = db
+        self.store = store or get_blob_store()
+
+    def register(self, upload: SpooledUpload) -> MediaResponse:
+        """Store a spooled upload and queue its variants.
+
+        Identical content is stored once: a second upload of the same bytes
+        returns the existing asset, unless its render failed or was abandoned,
+        in which case it is rendered again. Takes ownership of ``upload.path``.
+        """
+        submitted = False
+        try:
+            asset = self.db.get(MediaAsset, upload.content_hash)
+            if asset is not None and asset.status == MediaStatus.READY:
+                metrics.inc("kintsugi_media_uploads_total", result="deduplicated")
+                return MediaResponse.model_validate(asset)
+
+            key = media_key(
+                upload.content_hash, "original", ALLOWED_TYPES[upload.content_type]
+            )
+            now = datetime.now(timezone.utc)
+            if asset is None:
+                url = self.store.put_file(key, upload.path, upload.content_type)
+                # A concurrent upload of the same bytes may insert first; only
+                # the request that inserts the row renders the variants.
+                claimed = self.db.execute(
+                    insert(MediaAsset)
+                    .values(
+                        content_hash=upload.content_hash,
+                        content_type=upload.content_type,
+                        size_bytes=upload.size_bytes,
+                        original_url=url,
+                        status=MediaStatus.PROCESSING,
+                        processing_started_at=now,
+                    )
+                    .on_conflict_do_nothing(index_elements=[MediaAsset.content_hash])
+                    .returning(MediaAsset.content_hash)
+                ).scalar()
+            else:
+                # Likewise only one retry takes over a failed or abandoned render.
+                claimed = self.db.execute(
+                    update(MediaAsset)
+                    .where(MediaAsset.content_hash == upload.content_hash, _reclaimable(now))
+                    .values(status=MediaStatus.PROCESSING, processing_started_at=now)
+                    .returning(MediaAsset.content_hash)
+                    .execution_options(synchronize_session=False)
+                ).scalar()
+                if claimed is not None:
+                    self.store.put_file(key, upload.path, upload.content_type)
+            self.db.commit()
+
+            asset = self.db.get(MediaAsset, upload.content_hash, populate_existing=True)
+            if claimed is None:
+                metrics.inc("kintsugi_media_uploads_total", result="deduplicated")
+                return MediaResponse.model_validate(asset)
+
+            get_thumbnailer().submit(
+                upload.content_hash,
+                upload.path,
+                upload.content_type,
+                attempt=asset.processing_started_at,
+            )
+            submitted = True
+            metrics.inc("kintsugi_media_uploads_total", result="stored")
+            return MediaResponse.model_validate(asset)
+        finally:
+            if not submitted and os.path.exists(upload.path):
+                os.unlink(upload.path)
+
+    def fail_abandoned(self, batch_size: int = 500) -> int:
+        """Mark PROCESSING assets whose lease ran out as FAILED, so clients
+        stop waiting for them. Returns the number of assets changed."""
+        lease_expired = datetime.now(timezone.utc) - timedelta(
+            seconds=MEDIA_PROCESSING_TIMEOUT_SECONDS
+        )
+        total = 0
+        while True:
+            batch = (
+                select(MediaAsset.content_hash)
+                .where(
+                    MediaAsset.status == MediaStatus.PROCESSING,
+                    MediaAsset.processing_started_at < lease_expired,
+                )
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
+            )
+            changed = self.db.scalars(
+                update(MediaAsset)
+                .where(MediaAsset.content_hash.in_(batch))
+                .values(status=MediaStatus.FAILED)
+                .returning(MediaAsset.content_hash)
+                .execution_options(synchronize_session=False)
+            ).all()
+            self.db.commit()
+
+            total += len(changed)
+            metrics.inc("kintsugi_media_processed_total", len(changed), result="abandoned")
+            if len(changed) < batch_size:
+                return total
+
+    @read_only
+    def get_media(self, content_hash: str) -> Optional[MediaResponse]:
+        asset = self.db.get(MediaAsset, content_hash)
+        return MediaResponse.model_validate(asset) if asset else None
+
+    @read_only
+    def variants_by_url(self, urls: List[str]) -> Dict[str, dict]:
+        """Variants of each original URL that has them, for list payloads
+        (e.g. ``Item.images``) that want to show thumbnails."""
+        if not urls:
+            return {}
+        rows = self.db.execute(
+            select(MediaAsset.original_url, MediaAsset.variants).where(
+                MediaAsset.original_url.in_(set(urls)),
+                MediaAsset.status == MediaStatus.READY,
+            )
+        )
+        return {row.original_url: row.variants for row in rows}
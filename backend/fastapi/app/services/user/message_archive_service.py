@@ -0,0 +1,167 @@
+import zlib
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.core.instrumentation import instrument_service
+from app.schemas.dtos.message_dto import MessagePayload, archived_messages_adapter
+from app.schemas.schema import Job, JobStatus, Message, MessageArchive, MessageAttachment
+
+
+ARCHIVABLE_JOB_STATUSES = (JobStatus.COMPLETED, JobStatus.VERIFIED, JobStatus.CANCELLED)
+DEFAULT_RETENTION_DAYS = 90
+PARTITION_MONTHS_AHEAD = 3
+
+
+@instrument_service
+class MessageArchiveService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def ensure_partitions(
+        self, months_ahead: int = PARTITION_MONTHS_AHEAD, start: Optional[date] = None
+    ) -> int:
+        created = self.db.execute(
+            text("SELECT ensure_message_partitions(:start, :months_ahead)"),
+            {"start": start or datetime.now(timezone.utc).date(), "months_ahead": months_ahead},
+        ).scalar()
+        self.db.commit()
+        return created
+
+    def get_archived_messages(self, job_id: int) -> List[MessagePayload]:
+        payload = self.db.execute(
+            select(MessageArchive.payload).where(MessageArchive.job_id == job_id)
+        ).scalar()
+        if payload is None:
+            return []
+        messages = archived_messages_adapter.validate_json(zlib.decompress(payload))
+        for message in messages:
+            for attachment in message["attachments"]:
+                attachment.setdefault("variants", None)
+        return messages
+
+    def get_hot_messages(self, job_id: int) -> List[MessagePayload]:
+        """A job's unarchived messages as plain dicts, read column-wise
+        without hydrating ORM objects."""
+        rows = self.db.execute(
+            select(
+                Message.id,
+                Message.content,
+                Message.sender_id,
+                Message.message_status,
+                Message.created_at,
+            )
+            .where(Message.job_id == job_id)
+            .order_by(Message.created_at.asc())
+        ).all()
+
+        attachments = defaultdict(list)
+        if not rows:
+            return []
+
+        for a in self.db.execute(
+            select(
+                MessageAttachment.file_url,
+                MessageAttachment.file_type,
+                MessageAttachment.id,
+                MessageAttachment.message_id,
+                MessageAttachment.variants,
+            )
+            .join(Message, Message.id == MessageAttachment.message_id)
+            .where(Message.job_id == job_id)
+            .order_by(MessageAttachment.id)
+        ):
+            attachments[a.message_id].append(
+                {
+                    "file_url": a.file_url,
+                    "file_type": a.file_type,
+                    "id": a.id,
+                    "message_id": a.message_id,
+                    "variants": a.variants,
+                }
+            )
+
+        return [
+            {
+                "job_id": job_id,
+                "content": row.content,
+                "id": row.id,
+                "sender_id": row.sender_id,
+                "message_status": row.message_status,
+                "created_at": row.created_at,
+                "attachments": attachments.get(row.id, []),
+            }
+            for row in rows
+        ]
+
+    def archive_job(self, job_id: int) -> int:
+        """Move a job's hot messages into its compressed archive row.
+
+        Runs in the caller's transaction; returns the number of messages moved.
+        """
+        messages = self.get_hot_messages(job_id)
+        if not messages:
+            return 0
+
+        archived = self.get_archived_messages(job_id) + messages
+        payload = zlib.compress(archived_messages_adapter.dump_json(archived), 9)
+
+        stmt = insert(MessageArchive).values(
+            job_id=job_id,
+            message_count=len(archived),
+            payload=payload,
+            archived_at=datetime.now(timezone.utc),
+        )
+        self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[MessageArchive.job_id],
+                set_={
+                    "message_count": stmt.excluded.message_count,
+                    "payload": stmt.excluded.payload,
+                    "archived_at": stmt.excluded.archived_at,
+                },
+            )
+        )
+
+        message_ids = [m["id"] for m in messages]
+        self.db.execute(
+            delete(MessageAttachment).where(MessageAttachment.message_id.in_(message_ids))
+        )
+        self.db.execute(
+            delete(Message).where(Message.job_id == job_id, Message.id.in_(message_ids))
+        )
+        return len(messages)
+
+    def archive_closed_jobs(
+        self, retention_days: int = DEFAULT_RETENTION_DAYS, batch_size: int = 100
+    ) -> dict:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+        jobs_archived = 0
+        messages_archived = 0
+
+        while True:
+            job_ids = list(
+                self.db.scalars(
+                    select(Job.id)
+                    .where(
+                        Job.status.in_(ARCHIVABLE_JOB_STATUSES),
+                        func.coalesce(Job.completed_at, Job.started_at) < cutoff,
+                        select(Message.id).where(Message.job_id == Job.id).exists(),
+                    )
+                    .order_by(Job.id)
+                    .limit(batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+            )
+            if not job_ids:
+                break
+
+            for job_id in job_ids:
+                messages_archived += self.archive_job(job_id)
+            jobs_archived += len(job_ids)
+            self.db.commit()
+
+        return {"jobs": jobs_archived, "messages": messages_archived}
@@ -1,22 +1,76 @@
-from typing import List
+from typing import Dict, List, Optional, Tuple
+import base64
+import binascii
+import html
 import uuid
-from gotrue import Optional
+from datetime import datetime
+from fastapi import HTTPException
+from sqlalchemy import func, literal_column, or_, select, tuple_
 from sqlalchemy.orm import Session, joinedload
-from app.schemas.schema import Message, MessageAttachment, MessageStatus
+from app.core.database import read_only, snapshot
+from app.core.http_cache import Version
+from app.schemas.schema import (
+    Job,
+    MediaAsset,
+    Message,
+    MessageArchive,
+    MessageAttachment,
+    MessageStatus,
+)
 from app.schemas.dtos.message_dto import (
     MessageCreate,
     MessageStatus,
     MessageResponse,
+    MessageSearchHit,
+    MessageSearchPage,
     ChatHistoryResponse,
     MessageType,
     SendImageRequest,
+    chat_history_serializer,
+)
+from app.core.instrumentation import instrument_service
+from app.services.user.message_archive_service import MessageArchiveService
+from app.services.user.notification_service import NotificationService
+
+
+SEARCH_CONFIG = literal_column("'english'::regconfig")
+# ts_headline marks matches with these; they are swapped for <mark> tags after
+# the rest of the excerpt has been HTML-escaped.
+_MATCH_START, _MATCH_STOP = "\ue000", "\ue001"
+_HEADLINE_OPTIONS = (
+    f'StartSel="{_MATCH_START}", StopSel="{_MATCH_STOP}", '
+    "MaxWords=30, MinWords=10, MaxFragments=2"
 )
 
 
+def encode_search_cursor(created_at: datetime, message_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{message_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, message_id = raw.split("|")
+        return datetime.fromisoformat(created_at), int(message_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _highlight(headline: str) -> str:
+    return (
+        html.escape(headline)
+        .replace(_MATCH_START, "<mark>")
+        .replace(_MATCH_STOP, "</mark>")
+    )
+
+
+@instrument_service
 class MessageService:
     def __init__(self, db: Session):
         self.db = db
 
+    @read_only
     def get_message_by_id(self, message_id: int, user_id: int) -> Optional[Message]:
         return (
             self.db.query(Message)
@@ -25,18 +79,158 @@ class MessageService:
             .first()
         )
 
+    def _require_participant(self, job_id: int, user_id: uuid.UUID) -> None:
+        """404 unless the user is the job's client or fixer, like ``get_job``."""
+        is_party = self.db.scalar(
+            select(Job.id).where(
+                Job.id == job_id, or_(Job.client_id == user_id, Job.fixer_id == user_id)
+            )
+        )
+        if is_party is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+
+    @read_only
     def get_chat_history(self, job_id: int, user_id: uuid.UUID) -> ChatHistoryResponse:
-        messages: List[Message] = (
-            self.db.query(Message)
-            .options(joinedload(Message.attachments))
-            .filter(Message.job_id == job_id)
-            .order_by(Message.created_at.asc())
-            .all()
+        self._require_participant(job_id, user_id)
+        # Messages of long closed jobs live compressed in message_archives and
+        # always predate the hot rows. Both are read from one snapshot, or a
+        # job archived in between would lose its messages or repeat them.
+        with snapshot(self.db) as db:
+            messages: List[Message] = (
+                db.query(Message)
+                .options(joinedload(Message.attachments))
+                .filter(Message.job_id == job_id)
+                .order_by(Message.created_at.asc())
+                .all()
+            )
+            archived = MessageArchiveService(db).get_archived_messages(job_id)
+
+            return ChatHistoryResponse(
+                job_id=job_id,
+                messages=[MessageResponse.model_validate(m) for m in archived]
+                + [MessageResponse.model_validate(m) for m in messages],
+            )
+
+    @read_only
+    def get_chat_history_json(self, job_id: int, user_id: uuid.UUID) -> bytes:
+        """Same payload as ``get_chat_history`` serialized to JSON bytes,
+        built from column tuples instead of ORM objects."""
+        self._require_participant(job_id, user_id)
+        with snapshot(self.db) as db:
+            archive = MessageArchiveService(db)
+            messages = archive.get_archived_messages(job_id) + archive.get_hot_messages(job_id)
+
+        return chat_history_serializer.dump_json({"job_id": job_id, "messages": messages})
+
+    @read_only
+    def chat_version(self, job_id: int, user_id: uuid.UUID) -> Optional[Version]:
+        """What the chat history payload depends on, in one round trip:
+        new messages, read receipts, attachment variants and archiving.
+        None unless the user is the job's client or fixer."""
+        party = (
+            select(Job.id)
+            .where(Job.id == job_id, or_(Job.client_id == user_id, Job.fixer_id == user_id))
+            .scalar_subquery()
+        )
+        hot = (
+            select(
+                func.max(Message.id),
+                func.count(),
+                func.count().filter(Message.message_status == MessageStatus.READ),
+            )
+            .where(Message.job_id == job_id)
+            .subquery()
         )
+        with_variants = (
+            select(func.count())
+            .select_from(MessageAttachment)
+            .join(Message, Message.id == MessageAttachment.message_id)
+            .where(Message.job_id == job_id, MessageAttachment.variants.is_not(None))
+            .scalar_subquery()
+        )
+        archived = (
+            select(MessageArchive.message_count)
+            .where(MessageArchive.job_id == job_id)
+            .scalar_subquery()
+        )
+        is_party, *parts = self.db.execute(select(party, hot, with_variants, archived)).one()
+        return Version(parts=tuple(parts)) if is_party is not None else None
 
-        return ChatHistoryResponse(
-            job_id=job_id,
-            messages=[MessageResponse.model_validate(m) for m in messages],
+    @read_only
+    def search_messages(
+        self,
+        user_id: uuid.UUID,
+        q: str,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+    ) -> MessageSearchPage:
+        """Full-text search over the messages of jobs the user is part of,
+        newest first.
+
+        ``q`` takes web search syntax ("quoted phrases", -excluded, or).
+        Pages are keyed on (created_at, id), so each page costs the same
+        however deep it is. Archived messages are not searched.
+        """
+        query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+        # Driven by ix_jobs_client_id / ix_jobs_fixer_id, then the GIN index or
+        # ix_messages_job_id_created_at, whichever the planner finds cheaper.
+        user_jobs = select(Job.id).where(
+            or_(Job.client_id == user_id, Job.fixer_id == user_id)
+        )
+        page = (
+            select(
+                Message.id,
+                Message.job_id,
+                Message.sender_id,
+                Message.created_at,
+                Message.content,
+            )
+            .where(
+                Message.job_id.in_(user_jobs),
+                Message.search_vector.bool_op("@@")(query),
+            )
+            .order_by(Message.created_at.desc(), Message.id.desc())
+            .limit(limit + 1)
+        )
+        if cursor is not None:
+            page = page.where(
+                tuple_(Message.created_at, Message.id) < tuple_(*decode_search_cursor(cursor))
+            )
+        page = page.subquery()
+
+        # Headlines are only built for the rows of this page.
+        rows = self.db.execute(
+            select(
+                page.c.id,
+                page.c.job_id,
+                page.c.sender_id,
+                page.c.created_at,
+                func.ts_headline(
+                    SEARCH_CONFIG,
+                    func.coalesce(page.c.content, ""),
+                    query,
+                    _HEADLINE_OPTIONS,
+                ),
+            ).order_by(page.c.created_at.desc(), page.c.id.desc())
+        ).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_search_cursor(rows[-1].created_at, rows[-1].id)
+
+        return MessageSearchPage(
+            results=[
+                MessageSearchHit(
+                    message_id=r[0],
+                    job_id=r[1],
+                    sender_id=r[2],
+                    created_at=r[3],
+                    snippet=_highlight(r[4]),
+                )
+                for r in rows
+            ],
+            next_cursor=next_cursor,
         )
 
     def send_message(self, message_data: MessageCreate) -> MessageResponse:
@@ -45,6 +239,7 @@ class MessageService:
             and not message_data.attachments
         ):
             raise ValueError("Image message requires at least one attachment.")
+        self._require_participant(message_data.job_id, message_data.sender_id)
 
         db_message = Message(
             job_id=message_data.job_id,
@@ -58,20 +253,46 @@ class MessageService:
         self.db.flush()
 
         if message_data.attachments:
-            attachments = [
-                MessageAttachment(
-                    message_id=db_message.id,
-                    file_url=a.file_url,
-                    file_type=a.file_type,
+            media = self._media_for(message_data.attachments)
+            attachments = []
+            for a in message_data.attachments:
+                asset = media.get(a.content_hash)
+                attachments.append(
+                    MessageAttachment(
+                        message_id=db_message.id,
+                        file_url=a.file_url,
+                        file_type=a.file_type or (asset.content_type if asset else None),
+                        content_hash=a.content_hash,
+                        variants=asset.variants if asset else None,
+                    )
                 )
-                for a in message_data.attachments
-            ]
             self.db.bulk_save_objects(attachments)
 
+        NotificationService(self.db).new_message(db_message.job_id, db_message.sender_id)
         self.db.commit()
         self.db.refresh(db_message)
         return MessageResponse.model_validate(db_message)
 
+    def _media_for(self, attachments) -> Dict[str, MediaAsset]:
+        hashes = {a.content_hash for a in attachments if a.content_hash}
+        if not hashes:
+            return {}
+
+        # FOR SHARE waits for a thumbnailer that is recording variants right
+        # now; one that starts after us waits for this message to commit and
+        # then fills in the variants itself.
+        media = {
+            asset.content_hash: asset
+            for asset in self.db.scalars(
+                select(MediaAsset)
+                .where(MediaAsset.content_hash.in_(hashes))
+                .with_for_update(read=True)
+            )
+        }
+        if len(media) != len(hashes):
+            raise HTTPException(status_code=422, detail="Unknown media")
+        return media
+
     def mark_as_read(
         self, message_id: int, user_id: uuid.UUID
     ) -> Optional[MessageResponse]:
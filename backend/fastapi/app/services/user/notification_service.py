@@ -0,0 +1,45 @@
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import case, insert, literal, select
+from sqlalchemy.orm import Session
+from app.schemas.schema import Job, NotificationKind, QueuedNotification
+
+
+class NotificationService:
+    """Queues events for the notifier's digests in the caller's transaction.
+
+    Like ``OutboxService.publish`` nothing here commits: an event is queued
+    only if the write it describes commits, and costs one small insert.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def new_offer(self, owner_id: uuid.UUID, item_id: int, fixer_id: uuid.UUID) -> None:
+        if owner_id == fixer_id:
+            return
+        self.db.execute(
+            insert(QueuedNotification).values(
+                recipient_id=owner_id,
+                kind=NotificationKind.NEW_OFFER,
+                subject_id=item_id,
+                created_at=datetime.now(timezone.utc),
+            )
+        )
+
+    def new_message(self, job_id: int, sender_id: uuid.UUID) -> None:
+        """Queue for the other side of the job, looked up in the same
+        statement."""
+        recipient = case((Job.client_id == sender_id, Job.fixer_id), else_=Job.client_id)
+        self.db.execute(
+            insert(QueuedNotification).from_select(
+                ["recipient_id", "kind", "subject_id", "created_at"],
+                select(
+                    recipient,
+                    literal(NotificationKind.NEW_MESSAGE, QueuedNotification.kind.type),
+                    Job.id,
+                    literal(datetime.now(timezone.utc), QueuedNotification.created_at.type),
+                ).where(Job.id == job_id, recipient != sender_id),
+            )
+        )
@@ -1,13 +1,18 @@
 from fastapi import HTTPException, status
-from gotrue import Optional
+from typing import Optional
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from starlette.status import HTTP_400_BAD_REQUEST
 from app.schemas.schema import Item, Offer, OfferStatus
-from backend.fastapi.app.schemas.dto import OfferCreate
+from app.schemas.dto import OfferCreate
+from app.services.user.notification_service import NotificationService
 from datetime import datetime, timezone, timedelta
 from sqlalchemy.exc import IntegrityError
+from app.core.concurrency import is_conflict, retry_on_conflict, version_bump
+from app.core.instrumentation import instrument_service
 
 
+@instrument_service
 class OfferService:
     def __init__(self, db: Session):
         self.db = db
@@ -23,8 +28,7 @@ class OfferService:
         new_offer = Offer(
             item_id=offer_data.item_id,
             fixer_id=offer_data.fixer_id,
-            offered_price=offer_data.offered_price,
-            message=offer_data.message,
+            price_bid=offer_data.offered_price,
             status=OfferStatus.PENDING,
             created_at=datetime.now(timezone.utc),
         )
@@ -32,6 +36,7 @@ class OfferService:
         self.db.add(new_offer)
 
         try:
+            NotificationService(self.db).new_offer(item.owner_id, item.id, offer_data.fixer_id)
             self.db.commit()
             self.db.refresh(new_offer)
 
@@ -50,9 +55,18 @@ class OfferService:
 
         return new_offer
 
+    @retry_on_conflict
     def accept_offer(self, offer_id: int) -> Optional[Offer]:
-        offer = self.get_offer(offer_id)
-        if not offer or offer.status != OfferStatus.PENDING:
+        item_id = self.db.scalar(select(Offer.item_id).where(Offer.id == offer_id))
+        if item_id is None:
+            return None
+
+        # Accepting locks the item first, so accepts of sibling offers queue
+        # on it instead of locking each other's offers in opposite orders.
+        self.db.execute(select(Item.id).where(Item.id == item_id).with_for_update())
+        offer = self.db.get(Offer, offer_id, populate_existing=True)
+        if offer.status != OfferStatus.PENDING:
+            self.db.rollback()
             return None
 
         offer.status = OfferStatus.ACCEPTED
@@ -61,7 +75,7 @@ class OfferService:
             Offer.item_id == offer.item_id,
             Offer.id != offer_id,
             Offer.status == OfferStatus.PENDING,
-        ).update({"status": OfferStatus.REJECTED})
+        ).update({"status": OfferStatus.REJECTED, **version_bump(Offer)})
 
         try:
             self.db.commit()
@@ -72,6 +86,9 @@ class OfferService:
                 status_code=HTTP_400_BAD_REQUEST, detail="Failed to accept offer"
             )
         except Exception as e:
+            if is_conflict(e):
+                # Another request changed the offer first; retry_on_conflict re-reads it.
+                raise
             self.db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -80,6 +97,7 @@ class OfferService:
 
         return offer
 
+    @retry_on_conflict
     def reject_offer(self, offer_id) -> Optional[Offer]:
         offer = self.get_offer(offer_id)
         if offer and offer.status == OfferStatus.PENDING:
@@ -93,6 +111,8 @@ class OfferService:
                     status_code=HTTP_400_BAD_REQUEST, detail="Failed to reject offer"
                 )
             except Exception as e:
+                if is_conflict(e):
+                    raise
                 self.db.rollback()
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -101,6 +121,7 @@ class OfferService:
 
         return offer
 
+    @retry_on_conflict
     def cancel_offer(self, offer_id) -> Optional[Offer]:
         offer = self.get_offer(offer_id)
         if offer and offer.status == OfferStatus.PENDING:
@@ -115,6 +136,8 @@ class OfferService:
                     status_code=HTTP_400_BAD_REQUEST, detail="Failed to cancel offer"
                 )
             except Exception as e:
+                if is_conflict(e):
+                    raise
                 self.db.rollback()
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
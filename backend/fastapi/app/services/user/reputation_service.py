@@ -1,9 +1,14 @@
 from os.path import expanduser
+from sqlalchemy import case, func
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from app.schemas.schema import UserReputation, User, VerificationTier, Review
+from app.services.user.leaderboard_service import leaderboards
+from app.core.concurrency import retry_on_conflict
+from app.core.instrumentation import instrument_service
 
 
+@instrument_service
 class ReputationService:
     def __init__(self, db: Session):
         self.db = db
@@ -29,8 +34,10 @@ class ReputationService:
         self.db.add(new_rep)
         self.db.commit()
         self.db.refresh(new_rep)
+        leaderboards.record_trust(user_id, new_rep.trust_score)
         return new_rep
 
+    @retry_on_conflict
     def update_rating(self, user_id: str, new_rating: int):
         rep = self.get_reputation(user_id)
 
@@ -42,8 +49,10 @@ class ReputationService:
 
         self.db.commit()
         self.db.refresh(rep)
+        leaderboards.record_trust(user_id, rep.trust_score)
         return rep
 
+    @retry_on_conflict
     def update_verification(self, user_id: str, tier: VerificationTier):
         rep = self.get_reputation(user_id)
         rep.verification_tier = tier
@@ -52,29 +61,57 @@ class ReputationService:
 
         self.db.commit()
         self.db.refresh(rep)
+        leaderboards.record_trust(user_id, rep.trust_score)
         return rep
 
     def _recalculate_trust_score(self, rep: UserReputation):
-        score = 50
-
-        if rep.verification_tier == VerificationTier.EMAIL_ONLY:
-            score += 5
-
-        elif rep.verification_tier == VerificationTier.PHONE_VERIFIED:
-            score += 15
-
-        elif rep.verification_tier == VerificationTier.GOV_ID_VERIFIED:
-            score += 30
-
-        if rep.total_reviews > 0:
-            if rep.average_rating >= 4.5:
-                score += 20
-            elif rep.average_rating >= 4.0:
-                score += 10
-            elif rep.average_rating < 3.0:
-                score -= 10
+        rep.trust_score = compute_trust_score(
+            rep.verification_tier, rep.average_rating, rep.total_reviews
+        )
 
-        experience_bonus = min(rep.total_reviews, 50) * 0.2
-        score += int(experience_bonus)
 
-        rep.trust_score = max(0, min(100, score))
+BASE_TRUST_SCORE = 50
+TIER_BONUS = {
+    VerificationTier.EMAIL_ONLY: 5,
+    VerificationTier.PHONE_VERIFIED: 15,
+    VerificationTier.GOV_ID_VERIFIED: 30,
+}
+# (minimum average rating, bonus), checked in order; below 3.0 costs 10.
+RATING_BONUS = ((4.5, 20), (4.0, 10))
+LOW_RATING, LOW_RATING_PENALTY = 3.0, -10
+# One point per five reviews, up to fifty reviews.
+EXPERIENCE_CAP, REVIEWS_PER_POINT = 50, 5
+
+
+def compute_trust_score(tier, average_rating: float, total_reviews: int) -> int:
+    score = BASE_TRUST_SCORE + TIER_BONUS.get(tier, 0)
+
+    if total_reviews > 0:
+        for threshold, bonus in RATING_BONUS:
+            if average_rating >= threshold:
+                score += bonus
+                break
+        else:
+            if average_rating < LOW_RATING:
+                score += LOW_RATING_PENALTY
+
+    score += min(total_reviews, EXPERIENCE_CAP) // REVIEWS_PER_POINT
+    return max(0, min(100, score))
+
+
+def trust_score_expression(tier, average_rating, total_reviews):
+    """``compute_trust_score`` as a SQL expression over columns, for set-based
+    updates."""
+    rating_bonus = case(
+        (total_reviews <= 0, 0),
+        *((average_rating >= threshold, bonus) for threshold, bonus in RATING_BONUS),
+        (average_rating < LOW_RATING, LOW_RATING_PENALTY),
+        else_=0,
+    )
+    score = (
+        BASE_TRUST_SCORE
+        + case({int(t): bonus for t, bonus in TIER_BONUS.items()}, value=tier, else_=0)
+        + rating_bonus
+        + func.least(total_reviews, EXPERIENCE_CAP) // REVIEWS_PER_POINT
+    )
+    return func.greatest(0, func.least(100, score))
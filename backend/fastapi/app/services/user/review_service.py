@@ -0,0 +1,173 @@
+import uuid
+from datetime import datetime, timezone
+
+from fastapi import HTTPException, status
+from sqlalchemy import Float, exists, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.core.concurrency import version_bump
+from app.core.instrumentation import instrument_service
+from app.schemas.dtos.review_dto import ReviewCreate, ReviewResponse
+from app.schemas.schema import Job, JobStatus, Review, UserReputation, VerificationTier
+from app.services.user.leaderboard_service import leaderboards
+from app.services.user.reputation_service import compute_trust_score, trust_score_expression
+
+
+REVIEWABLE_STATUSES = (JobStatus.COMPLETED, JobStatus.VERIFIED)
+
+
+@instrument_service
+class ReviewService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create_review(
+        self, job_id: int, reviewer_id: uuid.UUID, review: ReviewCreate
+    ) -> ReviewResponse:
+        """Review the other side of a finished job.
+
+        The review and the target's reputation are written in one
+        transaction; a second review of the same job by the same user is
+        rejected by the ``uq_reviews_job_reviewer`` constraint.
+        """
+        job = self.db.get(Job, job_id)
+        if job is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+        if job.status not in REVIEWABLE_STATUSES:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT, detail="Job is not finished"
+            )
+
+        if reviewer_id == job.client_id:
+            target_id = job.fixer_id
+        elif reviewer_id == job.fixer_id:
+            target_id = job.client_id
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail="Not a party to this job"
+            )
+
+        created = self.db.scalars(
+            insert(Review)
+            .values(
+                job_id=job_id,
+                reviewer_id=reviewer_id,
+                target_id=target_id,
+                rating=review.rating,
+                comment=review.comment,
+                created_at=datetime.now(timezone.utc),
+            )
+            .on_conflict_do_nothing(constraint="uq_reviews_job_reviewer")
+            .returning(Review)
+        ).first()
+        if created is None:
+            self.db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT, detail="Job already reviewed"
+            )
+
+        trust_score = self._apply_rating(target_id, review.rating)
+        self.db.commit()
+        leaderboards.record_trust(target_id, trust_score)
+        return ReviewResponse.model_validate(created)
+
+    def _apply_rating(self, user_id: uuid.UUID, rating: int) -> int:
+        """Fold one rating into the user's aggregates in a single upsert."""
+        stmt = insert(UserReputation).values(
+            user_id=user_id,
+            average_rating=float(rating),
+            total_reviews=1,
+            trust_score=compute_trust_score(VerificationTier.UNVERIFIED, rating, 1),
+            verification_tier=VerificationTier.UNVERIFIED,
+        )
+        total = UserReputation.total_reviews + 1
+        average = (UserReputation.average_rating * UserReputation.total_reviews + rating) / total
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserReputation.user_id],
+            set_={
+                "average_rating": average,
+                "total_reviews": total,
+                "trust_score": trust_score_expression(
+                    UserReputation.verification_tier, average, total
+                ),
+                **version_bump(UserReputation),
+            },
+        ).returning(UserReputation.trust_score)
+        return self.db.execute(stmt).scalar_one()
+
+    def recompute_reputation(self) -> int:
+        """Rebuild every user's rating aggregates and trust score from
+        ``reviews`` in one grouped pass.
+
+        For backfills and repairs; returns the number of reputation rows that
+        changed. The in-memory trust leaderboard catches up on its next
+        reconcile.
+        """
+        stats = (
+            select(
+                Review.target_id.label("user_id"),
+                func.avg(Review.rating).cast(Float).label("average_rating"),
+                func.count().label("total_reviews"),
+            )
+            .where(Review.rating.is_not(None))
+            .group_by(Review.target_id)
+            .subquery()
+        )
+        unverified = literal(int(VerificationTier.UNVERIFIED))
+
+        stmt = insert(UserReputation).from_select(
+            ["user_id", "average_rating", "total_reviews", "trust_score", "verification_tier"],
+            select(
+                stats.c.user_id,
+                stats.c.average_rating,
+                stats.c.total_reviews,
+                trust_score_expression(unverified, stats.c.average_rating, stats.c.total_reviews),
+                unverified,
+            ),
+        )
+        trust_score = trust_score_expression(
+            UserReputation.verification_tier,
+            stmt.excluded.average_rating,
+            stmt.excluded.total_reviews,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserReputation.user_id],
+            set_={
+                "average_rating": stmt.excluded.average_rating,
+                "total_reviews": stmt.excluded.total_reviews,
+                "trust_score": trust_score,
+                **version_bump(UserReputation),
+            },
+            # Leave rows that are already right untouched.
+            where=(
+                UserReputation.average_rating.is_distinct_from(stmt.excluded.average_rating)
+                | UserReputation.total_reviews.is_distinct_from(stmt.excluded.total_reviews)
+                | UserReputation.trust_score.is_distinct_from(trust_score)
+            ),
+        )
+        changed = len(self.db.execute(stmt.returning(UserReputation.user_id)).all())
+
+        # Users whose reviews are all gone (e.g. removed duplicates).
+        changed += len(
+            self.db.execute(
+                update(UserReputation)
+                .where(
+                    UserReputation.total_reviews != 0,
+                    ~exists().where(
+                        Review.target_id == UserReputation.user_id, Review.rating.is_not(None)
+                    ),
+                )
+                .values(
+                    average_rating=0.0,
+                    total_reviews=0,
+                    trust_score=trust_score_expression(
+                        UserReputation.verification_tier, literal(0.0), literal(0)
+                    ),
+                    **version_bump(UserReputation),
+                )
+                .returning(UserReputation.user_id)
+            ).all()
+        )
+
+        self.db.commit()
+        return changed
@@ -0,0 +1,199 @@
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import case, or_, select, update
+from sqlalchemy.orm import Session
+from app.core.concurrency import version_bump
+from app.core.database import read_only
+from app.core.instrumentation import instrument_service
+from app.core.metrics import metrics
+from app.schemas.dtos.reward_dto import RedemptionResponse, RewardCreate, RewardResponse
+from app.schemas.schema import RewardRedemption, RewardStatus, Rewards, UserGamification
+from app.services.user.leaderboard_service import leaderboards
+
+
+REWARD_CACHE_TTL_SECONDS = float(os.environ.get("REWARD_CACHE_TTL_SECONDS", "60"))
+
+metrics.counter("kintsugi_reward_catalog_loads_total", "Reward catalog cache misses.")
+metrics.counter("kintsugi_reward_redemptions_total", "Reward redemptions, by result.")
+
+
+class RewardCatalog:
+    """Process-wide cache of the active rewards catalog.
+
+    Writes made through RewardService bump ``version``, which drops the cached
+    copy on the next read. Changes made by other processes (the expiry sweep,
+    other API workers) show up once the TTL runs out.
+    """
+
+    def __init__(self, ttl_seconds: float = REWARD_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.version = 0
+        self._entries: Optional[List[RewardResponse]] = None
+        self._entries_version = -1
+        self._loaded_at = 0.0
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.version += 1
+
+    def get(self, load) -> List[RewardResponse]:
+        with self._lock:
+            if (
+                self._entries is not None
+                and self._entries_version == self.version
+                and time.monotonic() - self._loaded_at < self.ttl_seconds
+            ):
+                return self._entries
+            version = self.version
+
+        entries = load()
+        metrics.inc("kintsugi_reward_catalog_loads_total")
+
+        with self._lock:
+            # Keep the result only if nothing was invalidated while loading.
+            if self.version == version:
+                self._entries = entries
+                self._entries_version = version
+                self._loaded_at = time.monotonic()
+        return entries
+
+
+reward_catalog = RewardCatalog()
+
+
+@instrument_service
+class RewardService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    @read_only
+    def _load_catalog(self) -> List[RewardResponse]:
+        now = datetime.now(timezone.utc)
+        rewards = self.db.scalars(
+            select(Rewards)
+            .where(
+                Rewards.status == RewardStatus.ACTIVE,
+                or_(Rewards.expires_at.is_(None), Rewards.expires_at > now),
+            )
+            .order_by(Rewards.cost_xp, Rewards.id)
+        ).all()
+        return [RewardResponse.model_validate(r) for r in rewards]
+
+    def get_catalog(self) -> List[RewardResponse]:
+        return reward_catalog.get(self._load_catalog)
+
+    def create_reward(self, reward_data: RewardCreate) -> Rewards:
+        reward = Rewards(
+            name=reward_data.name,
+            description=reward_data.description,
+            cost_xp=reward_data.cost_xp,
+            image_url=reward_data.image_url,
+            stock=reward_data.stock,
+            expires_at=reward_data.expires_at,
+            status=RewardStatus.ACTIVE,
+        )
+        self.db.add(reward)
+        self.db.commit()
+        self.db.refresh(reward)
+        reward_catalog.invalidate()
+        return reward
+
+    def set_status(self, reward_id: int, new_status: RewardStatus) -> Optional[Rewards]:
+        reward = self.db.get(Rewards, reward_id)
+        if not reward:
+            return None
+
+        reward.status = new_status
+        self.db.commit()
+        self.db.refresh(reward)
+        reward_catalog.invalidate()
+        return reward
+
+    def redeem(self, user_id, reward_id: int) -> RedemptionResponse:
+        """Spend ``cost_xp`` of the user's XP on one unit of the reward.
+
+        Stock and XP are each taken with a conditional UPDATE, in that order,
+        inside one transaction. Concurrent redemptions queue on the reward row,
+        so stock never goes below zero, and the XP condition is checked against
+        the committed balance, so the same XP cannot be spent twice.
+        """
+        now = datetime.now(timezone.utc)
+
+        taken = self.db.execute(
+            update(Rewards)
+            .where(
+                Rewards.id == reward_id,
+                Rewards.status == RewardStatus.ACTIVE,
+                or_(Rewards.expires_at.is_(None), Rewards.expires_at > now),
+                or_(Rewards.stock.is_(None), Rewards.stock > 0),
+            )
+            .values(
+                stock=Rewards.stock - 1,
+                status=case(
+                    (Rewards.stock == 1, RewardStatus.OUT_OF_STOCK),
+                    else_=Rewards.status,
+                ),
+            )
+            .returning(Rewards.cost_xp, Rewards.status)
+            .execution_options(synchronize_session=False)
+        ).one_or_none()
+
+        if taken is None:
+            self.db.rollback()
+            metrics.inc("kintsugi_reward_redemptions_total", result="unavailable")
+            if self.db.get(Rewards, reward_id) is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND, detail="Reward not found"
+                )
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT, detail="Reward is not available"
+            )
+
+        spent = self.db.execute(
+            update(UserGamification)
+            .where(
+                UserGamification.user_id == user_id,
+                UserGamification.current_xp >= taken.cost_xp,
+            )
+            .values(
+                current_xp=UserGamification.current_xp - taken.cost_xp,
+                **version_bump(UserGamification),
+            )
+            .returning(UserGamification.current_level, UserGamification.current_xp)
+            .execution_options(synchronize_session="fetch")
+        ).one_or_none()
+
+        if spent is None:
+            self.db.rollback()
+            metrics.inc("kintsugi_reward_redemptions_total", result="insufficient_xp")
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT, detail="Not enough XP"
+            )
+
+        redemption = RewardRedemption(
+            reward_id=reward_id, user_id=user_id, cost_xp=taken.cost_xp, created_at=now
+        )
+        self.db.add(redemption)
+        self.db.flush()
+        redemption_id = redemption.id
+        self.db.commit()
+
+        metrics.inc("kintsugi_reward_redemptions_total", result="ok")
+        leaderboards.record_xp(user_id, spent.current_level, spent.current_xp)
+        if taken.status == RewardStatus.OUT_OF_STOCK:
+            reward_catalog.invalidate()
+
+        return RedemptionResponse(
+            id=redemption_id,
+            reward_id=reward_id,
+            user_id=user_id,
+            cost_xp=taken.cost_xp,
+            remaining_xp=spent.current_xp,
+            created_at=now,
+        )
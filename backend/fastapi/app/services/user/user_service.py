@@ -0,0 +1,26 @@
+import uuid
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.database import read_only
+from app.core.http_cache import Version
+from app.core.instrumentation import instrument_service
+from app.schemas.schema import User
+
+
+@instrument_service
+class UserService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    @read_only
+    def get_profile(self, user_id: uuid.UUID) -> Optional[User]:
+        return self.db.get(User, user_id)
+
+    @read_only
+    def profile_version(self, user_id: uuid.UUID) -> Optional[Version]:
+        updated_at = self.db.scalar(select(User.updated_at).where(User.id == user_id))
+        if updated_at is None:
+            return None
+        return Version(parts=(updated_at,), last_modified=updated_at)
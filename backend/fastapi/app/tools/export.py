@@ -0,0 +1,273 @@
+"""Streams marketplace tables to Parquet or Arrow IPC files for analytics.
+
+    python -m app.tools.export --out exports/ --format parquet
+    python -m app.tools.export --out exports/ --tables jobs,reviews --full
+
+Rows are read through a server-side cursor and written one chunk (row group /
+record batch) at a time, so memory use depends on ``--chunk-size`` and not on
+the table size. All tables of a run are read in one read-only REPEATABLE READ
+snapshot, from a read replica when ``DATABASE_REPLICA_URLS`` is set.
+
+Runs are incremental by default: the last exported ``(timestamp, id)`` per
+table is kept in ``<out>/_watermarks.json`` and the next run exports rows
+after it. Jobs and offers change after they are created, so their watermark
+is ``updated_at`` and a changed row is exported again; reviews and diagnoses
+are insert-only and use ``created_at``. A row's timestamp is taken before its
+transaction commits, so a row can become visible with a timestamp behind the
+watermark. Each run therefore re-reads ``--overlap-seconds`` before the
+watermark, and the same row can appear in several files: consumers keep the
+row with the latest watermark column per id.
+"""
+
+import argparse
+import enum
+import json
+import logging
+import os
+import contextlib
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    Float,
+    Integer,
+    LargeBinary,
+    select,
+    tuple_,
+)
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.database import get_engines
+from app.schemas.schema import Diagnosis, Job, Offer, Review
+
+
+logger = logging.getLogger("kintsugi.export")
+
+# table name -> (model, watermark column)
+EXPORTS = {
+    "jobs": (Job, Job.updated_at),
+    "offers": (Offer, Offer.updated_at),
+    "reviews": (Review, Review.created_at),
+    "diagnosis": (Diagnosis, Diagnosis.created_at),
+}
+FORMATS = ("parquet", "arrow")
+WATERMARK_FILE = "_watermarks.json"
+EXPORT_OVERLAP_SECONDS = float(os.environ.get("EXPORT_OVERLAP_SECONDS", "600"))
+
+
+def _arrow_column(column) -> Tuple[object, Callable]:
+    """Arrow type plus a converter for a SQLAlchemy column's Python values."""
+    import pyarrow as pa
+
+    sa_type = column.type
+    if isinstance(sa_type, Integer):
+        return pa.int64(), lambda v: v
+    if isinstance(sa_type, Float):
+        return pa.float64(), lambda v: v
+    if isinstance(sa_type, Boolean):
+        return pa.bool_(), lambda v: v
+    if isinstance(sa_type, DateTime):
+        return pa.timestamp("us"), lambda v: v
+    if isinstance(sa_type, LargeBinary):
+        return pa.binary(), lambda v: v
+    if isinstance(sa_type, UUID):
+        return pa.string(), lambda v: None if v is None else str(v)
+    if isinstance(sa_type, JSONB):
+        return pa.string(), lambda v: None if v is None else json.dumps(v, default=str)
+    return pa.string(), lambda v: v.value if isinstance(v, enum.Enum) else v
+
+
+def load_watermarks(out_dir: str) -> Dict[str, dict]:
+    path = os.path.join(out_dir, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_watermarks(out_dir: str, watermarks: Dict[str, dict]) -> None:
+    path = os.path.join(out_dir, WATERMARK_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(watermarks, f, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+class _Writer:
+    def __init__(self, path: str, schema, file_format: str):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if file_format == "parquet":
+            self._writer = pq.ParquetWriter(path, schema, compression="zstd")
+            self._write = self._writer.write_batch
+        else:
+            self._sink = pa.OSFile(path, "wb")
+            self._writer = pa.ipc.new_file(self._sink, schema)
+            self._write = self._writer.write_batch
+
+    def write(self, batch) -> None:
+        self._write(batch)
+
+    def close(self) -> None:
+        self._writer.close()
+        if hasattr(self, "_sink"):
+            self._sink.close()
+
+
+def export_table(
+    conn: Connection,
+    table: str,
+    out_dir: str,
+    file_format: str = "parquet",
+    chunk_size: int = 10_000,
+    watermark: Optional[dict] = None,
+    overlap: timedelta = timedelta(seconds=EXPORT_OVERLAP_SECONDS),
+) -> Tuple[int, Optional[dict]]:
+    """Export rows after ``watermark`` minus ``overlap``; returns (rows, new
+    watermark)."""
+    import pyarrow as pa
+
+    model, watermark_column = EXPORTS[table]
+    columns = list(model.__table__.columns)
+    arrow_columns = [_arrow_column(c) for c in columns]
+    schema = pa.schema(
+        [pa.field(c.name, arrow_type) for c, (arrow_type, _) in zip(columns, arrow_columns)]
+    )
+
+    # A watermark saved for another column (before a table's watermark
+    # changed) says nothing about this one.
+    if watermark and watermark.get("column", watermark_column.key) != watermark_column.key:
+        watermark = None
+
+    stmt = select(*columns).order_by(watermark_column, model.id)
+    if watermark:
+        stmt = stmt.where(
+            tuple_(watermark_column, model.id)
+            > tuple_(datetime.fromisoformat(watermark["value"]) - overlap, watermark["id"])
+        )
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    extension = "parquet" if file_format == "parquet" else "arrow"
+    path = os.path.join(out_dir, f"{table}-{stamp}.{extension}")
+    tmp_path = path + ".tmp"
+
+    writer = None
+    rows = 0
+    last: Optional[dict] = None
+    watermark_index = columns.index(model.__table__.c[watermark_column.key])
+    id_index = columns.index(model.__table__.c.id)
+
+    try:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(stmt)
+        for chunk in result.partitions():
+            arrays = [
+                pa.array([convert(row[i]) for row in chunk], type=arrow_type)
+                for i, (arrow_type, convert) in enumerate(arrow_columns)
+            ]
+            if writer is None:
+                writer = _Writer(tmp_path, schema, file_format)
+            writer.write(pa.RecordBatch.from_arrays(arrays, schema=schema))
+
+            rows += len(chunk)
+            tail = chunk[-1]
+            if tail[watermark_index] is not None:
+                last = {
+                    "column": watermark_column.key,
+                    "value": tail[watermark_index].isoformat(),
+                    "id": tail[id_index],
+                }
+
+        if writer is not None:
+            writer.close()
+            os.replace(tmp_path, path)
+    finally:
+        if writer is not None and os.path.exists(tmp_path):
+            # The export failed part way; leave no partial file behind.
+            with contextlib.suppress(Exception):
+                writer.close()
+            os.remove(tmp_path)
+
+    if writer is None:
+        return 0, watermark
+
+    logger.info("exported %s rows from %s to %s", rows, table, path)
+    return rows, last or watermark
+
+
+def export(
+    out_dir: str,
+    tables: List[str],
+    file_format: str = "parquet",
+    chunk_size: int = 10_000,
+    incremental: bool = True,
+    engine: Optional[Engine] = None,
+    overlap: timedelta = timedelta(seconds=EXPORT_OVERLAP_SECONDS),
+) -> Dict[str, int]:
+    if engine is None:
+        primary, replicas = get_engines()
+        engine = replicas[0] if replicas else primary
+
+    os.makedirs(out_dir, exist_ok=True)
+    watermarks = load_watermarks(out_dir)
+    exported = {}
+
+    # One snapshot for every table, so rows that reference each other agree.
+    with engine.connect().execution_options(
+        isolation_level="REPEATABLE READ", postgresql_readonly=True
+    ) as conn:
+        for table in tables:
+            rows, watermark = export_table(
+                conn,
+                table,
+                out_dir,
+                file_format=file_format,
+                chunk_size=chunk_size,
+                watermark=watermarks.get(table) if incremental else None,
+                overlap=overlap,
+            )
+            exported[table] = rows
+            if watermark:
+                watermarks[table] = watermark
+            save_watermarks(out_dir, watermarks)
+
+    return exported
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.tools.export")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--format", choices=FORMATS, default="parquet")
+    parser.add_argument("--tables", default=",".join(EXPORTS))
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument(
+        "--full", action="store_true", help="ignore saved watermarks and export everything"
+    )
+    parser.add_argument(
+        "--overlap-seconds",
+        type=float,
+        default=EXPORT_OVERLAP_SECONDS,
+        help="re-read this much before each watermark for rows that committed late",
+    )
+    args = parser.parse_args(argv)
+
+    tables = [t.strip() for t in args.tables.split(",") if t.strip()]
+    unknown = set(tables) - set(EXPORTS)
+    if unknown:
+        parser.error(f"unknown tables: {', '.join(sorted(unknown))}")
+
+    logging.basicConfig(level=logging.INFO)
+    export(
+        args.out,
+        tables,
+        args.format,
+        args.chunk_size,
+        incremental=not args.full,
+        overlap=timedelta(seconds=args.overlap_seconds),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""Rebuilds every user's rating aggregates and trust score from ``reviews``.
+
+    python -m app.tools.recompute_reputation
+
+Run after migrations that change reviews (e.g. f4c7a2e9b5d1, which drops
+duplicate reviews) or to repair drifted aggregates.
+"""
+
+import logging
+
+from app.core.database import create_session
+from app.services.user.review_service import ReviewService
+
+
+logger = logging.getLogger("kintsugi.reputation")
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    with create_session() as db:
+        changed = ReviewService(db).recompute_reputation()
+    logger.info("recomputed reputation, %d rows changed", changed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""Runs queued AI diagnoses (``diagnosis_requests``) against the model client.
+
+    python -m app.workers.diagnosis_worker
+
+Each round claims a micro-batch of pending requests for one model with
+``FOR UPDATE SKIP LOCKED``, marks them running and commits before calling the
+model, so no transaction stays open across a slow call. Results are written
+back in bulk: one multi-row insert of ``diagnosis`` rows and one
+executemany update of the requests.
+
+Limits:
+
+- ``DIAGNOSIS_CONCURRENCY`` batches are in flight per worker process.
+- ``DIAGNOSIS_BUDGET_USD_PER_HOUR`` caps spend over the last hour across all
+  workers (0 disables it). In-flight requests count at the client's estimated
+  cost; claims are serialized with an advisory lock so concurrent workers
+  cannot overshoot the budget together.
+- Requests left running longer than ``DIAGNOSIS_LEASE_SECONDS`` (a crashed
+  worker) go back to the queue.
+"""
+
+import os
+import signal
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, insert, or_, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.database import get_engines
+from app.core.diagnosis_client import (
+    DiagnosisClient,
+    DiagnosisInput,
+    DiagnosisOutput,
+    get_diagnosis_client,
+)
+from app.core.metrics import metrics
+from app.schemas.schema import (
+    Diagnosis,
+    DiagnosisRequest,
+    DiagnosisRequestStatus,
+    DiagnosisType,
+    Item,
+)
+from app.workers.outbox_worker import retry_delay
+
+
+logger = logging.getLogger("kintsugi.diagnosis")
+
+DIAGNOSIS_BATCH_SIZE = int(os.environ.get("DIAGNOSIS_BATCH_SIZE", "8"))
+DIAGNOSIS_CONCURRENCY = int(os.environ.get("DIAGNOSIS_CONCURRENCY", "4"))
+DIAGNOSIS_POLL_INTERVAL = float(os.environ.get("DIAGNOSIS_POLL_INTERVAL", "1.0"))
+DIAGNOSIS_MAX_ATTEMPTS = int(os.environ.get("DIAGNOSIS_MAX_ATTEMPTS", "3"))
+DIAGNOSIS_BUDGET_USD_PER_HOUR = float(os.environ.get("DIAGNOSIS_BUDGET_USD_PER_HOUR", "5"))
+DIAGNOSIS_LEASE_SECONDS = float(os.environ.get("DIAGNOSIS_LEASE_SECONDS", "600"))
+
+# pg_advisory_xact_lock key serializing claims while a budget is enforced.
+_CLAIM_LOCK_KEY = 0x6B64_6961  # "kdia"
+
+metrics.counter("kintsugi_diagnosis_requests_total", "Diagnosis requests processed, by result.")
+metrics.counter("kintsugi_diagnosis_spend_usd_total", "Model spend on diagnoses, in USD.")
+metrics.counter(
+    "kintsugi_diagnosis_budget_exhausted_total", "Claim rounds skipped for lack of budget."
+)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+@dataclass
+class ClaimedBatch:
+    model: str
+    inputs: List[DiagnosisInput]
+    # request id -> (attempts including this one, cost of earlier attempts)
+    history: Dict[int, tuple]
+
+
+class DiagnosisWorker:
+    def __init__(
+        self,
+        engine: Engine,
+        client: Optional[DiagnosisClient] = None,
+        batch_size: int = DIAGNOSIS_BATCH_SIZE,
+        concurrency: int = DIAGNOSIS_CONCURRENCY,
+        poll_interval: float = DIAGNOSIS_POLL_INTERVAL,
+        max_attempts: int = DIAGNOSIS_MAX_ATTEMPTS,
+        budget_usd_per_hour: float = DIAGNOSIS_BUDGET_USD_PER_HOUR,
+        lease_seconds: float = DIAGNOSIS_LEASE_SECONDS,
+    ):
+        self.engine = engine
+        self.client = client or get_diagnosis_client()
+        self.batch_size = max(1, min(batch_size, self.client.max_batch_size))
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.budget_usd_per_hour = budget_usd_per_hour
+        self.lease_seconds = lease_seconds
+
+    def _requeue_expired(self, db: Session, now: datetime) -> None:
+        db.execute(
+            update(DiagnosisRequest)
+            .where(
+                DiagnosisRequest.status == DiagnosisRequestStatus.RUNNING,
+                DiagnosisRequest.started_at < now - timedelta(seconds=self.lease_seconds),
+            )
+            .values(status=DiagnosisRequestStatus.PENDING, available_at=now)
+        )
+
+    def _budget_room(self, db: Session, now: datetime) -> int:
+        """How many more requests fit in the hourly budget."""
+        since = now - timedelta(hours=1)
+        running = DiagnosisRequest.status == DiagnosisRequestStatus.RUNNING
+        # One statement, so a batch finishing meanwhile is counted exactly once.
+        spent, in_flight = db.execute(
+            select(
+                func.coalesce(
+                    func.sum(DiagnosisRequest.cost_usd).filter(
+                        DiagnosisRequest.finished_at >= since
+                    ),
+                    0.0,
+                ),
+                func.count().filter(running),
+            ).where(or_(DiagnosisRequest.finished_at >= since, running))
+        ).one()
+        estimate = self.client.estimated_cost_usd
+        room = self.budget_usd_per_hour - spent - in_flight * estimate
+        if estimate <= 0:
+            return self.batch_size if room > 0 else 0
+        return int(room // estimate)
+
+    def claim_batch(self) -> Optional[ClaimedBatch]:
+        now = _utcnow()
+        with Session(self.engine) as db, db.begin():
+            budgeted = self.budget_usd_per_hour > 0
+            if budgeted:
+                db.execute(select(func.pg_advisory_xact_lock(_CLAIM_LOCK_KEY)))
+            self._requeue_expired(db, now)
+
+            limit = self.batch_size
+            if budgeted:
+                limit = min(limit, self._budget_room(db, now))
+                if limit <= 0:
+                    metrics.inc("kintsugi_diagnosis_budget_exhausted_total")
+                    return None
+
+            pending = (
+                DiagnosisRequest.status == DiagnosisRequestStatus.PENDING,
+                DiagnosisRequest.available_at <= now,
+            )
+            # Batch by the model of the oldest request that is ready.
+            model = db.scalar(
+                select(DiagnosisRequest.model)
+                .where(*pending)
+                .order_by(DiagnosisRequest.available_at, DiagnosisRequest.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            if model is None:
+                return None
+
+            rows = db.execute(
+                select(
+                    DiagnosisRequest.id,
+                    DiagnosisRequest.item_id,
+                    DiagnosisRequest.diagnosis_type,
+                    DiagnosisRequest.media_urls,
+                    DiagnosisRequest.attempts,
+                    DiagnosisRequest.cost_usd,
+                    Item.title,
+                    Item.description,
+                    Item.category,
+                )
+                .join(Item, Item.id == DiagnosisRequest.item_id)
+                .where(*pending, DiagnosisRequest.model == model)
+                .order_by(DiagnosisRequest.available_at, DiagnosisRequest.id)
+                .limit(limit)
+                .with_for_update(of=DiagnosisRequest, skip_locked=True)
+            ).all()
+            if not rows:
+                return None
+
+            db.execute(
+                update(DiagnosisRequest)
+                .where(DiagnosisRequest.id.in_([r.id for r in rows]))
+                .values(
+                    status=DiagnosisRequestStatus.RUNNING,
+                    started_at=now,
+                    attempts=DiagnosisRequest.attempts + 1,
+                )
+            )
+
+        return ClaimedBatch(
+            model=model,
+            inputs=[
+                DiagnosisInput(
+                    request_id=r.id,
+                    item_id=r.item_id,
+                    diagnosis_type=r.diagnosis_type.value,
+                    title=r.title,
+                    description=r.description,
+                    category=r.category,
+                    media_urls=list(r.media_urls or []),
+                )
+                for r in rows
+            ],
+            history={r.id: (r.attempts + 1, r.cost_usd or 0.0) for r in rows},
+        )
+
+    def process_batch(self) -> int:
+        batch = self.claim_batch()
+        if batch is None:
+            return 0
+
+        try:
+            outputs = self.client.diagnose(batch.model, batch.inputs)
+            if len(outputs) != len(batch.inputs):
+                raise ValueError(
+                    f"client returned {len(outputs)} results for {len(batch.inputs)} inputs"
+                )
+        except Exception as exc:
+            logger.warning("diagnosis batch for %s failed: %r", batch.model, exc)
+            outputs = [DiagnosisOutput(error=repr(exc)[:2000]) for _ in batch.inputs]
+
+        self.store_results(batch, outputs)
+        return len(batch.inputs)
+
+    def store_results(self, batch: ClaimedBatch, outputs: List[DiagnosisOutput]) -> None:
+        now = _utcnow()
+        done = [(i, o) for i, o in zip(batch.inputs, outputs) if o.error is None]
+        failed = [(i, o) for i, o in zip(batch.inputs, outputs) if o.error is not None]
+
+        with Session(self.engine) as db, db.begin():
+            diagnosis_ids = []
+            if done:
+                diagnosis_ids = db.scalars(
+                    insert(Diagnosis).returning(Diagnosis.id, sort_by_parameter_order=True),
+                    [
+                        {
+                            "item_id": i.item_id,
+                            "diagnosis_type": DiagnosisType(i.diagnosis_type),
+                            "ai_model_used": batch.model,
+                            "result_json": o.result_json,
+                            "detected_issue": o.detected_issue,
+                            "confidence_score": o.confidence_score,
+                            "estimated_cost": o.estimated_cost,
+                            "created_at": now,
+                        }
+                        for i, o in done
+                    ],
+                ).all()
+
+            updates = []
+            for (i, o), diagnosis_id in zip(done, diagnosis_ids):
+                _, earlier_cost = batch.history[i.request_id]
+                updates.append(
+                    {
+                        "id": i.request_id,
+                        "status": DiagnosisRequestStatus.DONE,
+                        "diagnosis_id": diagnosis_id,
+                        "cost_usd": earlier_cost + o.cost_usd,
+                        "last_error": None,
+                        "finished_at": now,
+                        "available_at": now,
+                    }
+                )
+            for i, o in failed:
+                attempts, earlier_cost = batch.history[i.request_id]
+                gave_up = attempts >= self.max_attempts
+                updates.append(
+                    {
+                        "id": i.request_id,
+                        "status": DiagnosisRequestStatus.FAILED
+                        if gave_up
+                        else DiagnosisRequestStatus.PENDING,
+                        "diagnosis_id": None,
+                        "cost_usd": earlier_cost + o.cost_usd,
+                        "last_error": o.error[:2000],
+                        "finished_at": now,
+                        "available_at": now + retry_delay(attempts),
+                    }
+                )
+            db.execute(update(DiagnosisRequest), updates)
+
+        spend = sum(o.cost_usd for o in outputs)
+        if spend:
+            metrics.inc("kintsugi_diagnosis_spend_usd_total", spend, model=batch.model)
+        if done:
+            metrics.inc(
+                "kintsugi_diagnosis_requests_total", len(done), model=batch.model, result="done"
+            )
+        for i, _ in failed:
+            attempts, _ = batch.history[i.request_id]
+            metrics.inc(
+                "kintsugi_diagnosis_requests_total",
+                model=batch.model,
+                result="failed" if attempts >= self.max_attempts else "retry",
+            )
+
+    async def run(self, stop: asyncio.Event) -> None:
+        loop = asyncio.get_running_loop()
+
+        async def drain(pool: ThreadPoolExecutor) -> None:
+            while not stop.is_set():
+                try:
+                    handled = await loop.run_in_executor(pool, self.process_batch)
+                except Exception:
+                    logger.exception("diagnosis batch failed")
+                    handled = 0
+
+                if handled < self.batch_size:
+                    try:
+                        await asyncio.wait_for(stop.wait(), self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+
+        with ThreadPoolExecutor(self.concurrency, thread_name_prefix="diagnosis") as pool:
+            await asyncio.gather(*(drain(pool) for _ in range(self.concurrency)))
+
+
+async def _main() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    primary, _ = get_engines()
+    await DiagnosisWorker(primary).run(stop)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
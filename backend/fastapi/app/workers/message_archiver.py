@@ -0,0 +1,47 @@
+"""Creates upcoming message partitions and archives messages of closed jobs.
+
+    python -m app.workers.message_archiver --retention-days 90
+"""
+
+import argparse
+import logging
+
+from app.core.database import create_session
+from app.services.user.message_archive_service import (
+    DEFAULT_RETENTION_DAYS,
+    PARTITION_MONTHS_AHEAD,
+    MessageArchiveService,
+)
+
+
+logger = logging.getLogger("kintsugi.archiver")
+
+
+def run_once(
+    retention_days: int = DEFAULT_RETENTION_DAYS,
+    months_ahead: int = PARTITION_MONTHS_AHEAD,
+    batch_size: int = 100,
+) -> dict:
+    with create_session() as db:
+        service = MessageArchiveService(db)
+        created = service.ensure_partitions(months_ahead)
+        archived = service.archive_closed_jobs(retention_days, batch_size)
+
+    logger.info(
+        "created %s message partitions, archived %s messages from %s jobs",
+        created,
+        archived["messages"],
+        archived["jobs"],
+    )
+    return {"partitions_created": created, **archived}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m app.workers.message_archiver")
+    parser.add_argument("--retention-days", type=int, default=DEFAULT_RETENTION_DAYS)
+    parser.add_argument("--months-ahead", type=int, default=PARTITION_MONTHS_AHEAD)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    run_once(args.retention_days, args.months_ahead, args.batch_size)
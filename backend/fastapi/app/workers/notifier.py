@@ -0,0 +1,286 @@
+"""Folds queued notifications (``notification_queue``) into per-recipient digests.
+
+    python -m app.workers.notifier
+
+New offers and messages queue one row each (``NotificationService``). The
+notifier loads new rows into an in-memory buffer keyed by recipient, where
+repeats for the same item or job collapse into one counted entry ("3 new
+offers on your item #17"). A recipient's digest is sent once their oldest
+buffered event is ``NOTIFY_WINDOW_SECONDS`` old or ``NOTIFY_MAX_EVENTS``
+events are buffered for them, whichever comes first, and digests go out in
+batches through the configured sender (``app.core.notification_sender``).
+
+The rows behind a digest are deleted only after it was sent, so a restart
+loses nothing: the next notifier loads them again. A digest sent just before
+a crash may be sent twice. Loading pauses while ``NOTIFY_MAX_BUFFERED``
+events are buffered; the rest wait in the table.
+
+The buffer lives in one process, so one notifier runs at a time: it holds a
+session advisory lock and any other instance waits as a standby. Rows are
+loaded in id order; one whose transaction commits after a higher id was
+loaded is found by the full rescan done every window, at most one window
+late.
+"""
+
+import os
+import signal
+import asyncio
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.database import get_engines
+from app.core.metrics import metrics
+from app.core.notification_sender import (
+    Digest,
+    DigestEntry,
+    NotificationSender,
+    get_notification_sender,
+)
+from app.schemas.schema import NotificationKind, QueuedNotification
+from app.workers.outbox_worker import retry_delay
+
+
+logger = logging.getLogger("kintsugi.notifier")
+
+NOTIFY_WINDOW_SECONDS = float(os.environ.get("NOTIFY_WINDOW_SECONDS", "60"))
+NOTIFY_MAX_EVENTS = int(os.environ.get("NOTIFY_MAX_EVENTS", "20"))
+NOTIFY_POLL_INTERVAL = float(os.environ.get("NOTIFY_POLL_INTERVAL", "1.0"))
+NOTIFY_LOAD_BATCH = int(os.environ.get("NOTIFY_LOAD_BATCH", "5000"))
+NOTIFY_MAX_BUFFERED = int(os.environ.get("NOTIFY_MAX_BUFFERED", "200000"))
+
+# pg_try_advisory_lock key held by the active notifier.
+_LOCK_KEY = 0x6B6E_6F74  # "knot"
+
+metrics.counter("kintsugi_notification_events_total", "Notifications loaded by the notifier.")
+metrics.counter("kintsugi_notification_digests_total", "Notification digests, by result.")
+metrics.gauge("kintsugi_notification_buffered_events", "Notifications buffered for a digest.")
+
+
+def _utcnow() -> datetime:
+    # Naive UTC, like the timestamps read back from the queue.
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class _Pending:
+    __slots__ = ("first_at", "ids", "entries")
+
+    def __init__(self, first_at: datetime):
+        self.first_at = first_at
+        self.ids: List[int] = []
+        self.entries: Dict[Tuple[NotificationKind, int], DigestEntry] = {}
+
+
+class DigestBuffer:
+    """Buffered events by recipient; events for the same item or job share
+    one counted entry."""
+
+    def __init__(self, window_seconds: float, max_events: int):
+        self.window = timedelta(seconds=window_seconds)
+        self.max_events = max_events
+        self._pending: Dict[uuid.UUID, _Pending] = {}
+        self._ids: Set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, event_id: int) -> bool:
+        return event_id in self._ids
+
+    def add(
+        self,
+        event_id: int,
+        recipient_id: uuid.UUID,
+        kind: NotificationKind,
+        subject_id: int,
+        created_at: datetime,
+    ) -> None:
+        if event_id in self._ids:
+            return
+        pending = self._pending.get(recipient_id)
+        if pending is None:
+            pending = self._pending[recipient_id] = _Pending(created_at)
+        pending.first_at = min(pending.first_at, created_at)
+        pending.ids.append(event_id)
+        self._ids.add(event_id)
+
+        entry = pending.entries.get((kind, subject_id))
+        if entry is None:
+            pending.entries[(kind, subject_id)] = DigestEntry(kind, subject_id, 1, created_at)
+        else:
+            entry.count += 1
+            entry.last_at = max(entry.last_at, created_at)
+
+    def due(self, now: datetime) -> List[uuid.UUID]:
+        """Recipients whose window has passed or whose buffer is full."""
+        cutoff = now - self.window
+        return [
+            recipient_id
+            for recipient_id, pending in self._pending.items()
+            if pending.first_at <= cutoff or len(pending.ids) >= self.max_events
+        ]
+
+    def digest(self, recipient_id: uuid.UUID) -> Tuple[Digest, List[int]]:
+        pending = self._pending[recipient_id]
+        return Digest(recipient_id, list(pending.entries.values())), pending.ids
+
+    def remove(self, recipient_id: uuid.UUID) -> None:
+        pending = self._pending.pop(recipient_id)
+        self._ids.difference_update(pending.ids)
+
+
+class Notifier:
+    def __init__(
+        self,
+        engine: Engine,
+        sender: Optional[NotificationSender] = None,
+        window_seconds: float = NOTIFY_WINDOW_SECONDS,
+        max_events: int = NOTIFY_MAX_EVENTS,
+        poll_interval: float = NOTIFY_POLL_INTERVAL,
+        load_batch: int = NOTIFY_LOAD_BATCH,
+        max_buffered: int = NOTIFY_MAX_BUFFERED,
+    ):
+        self.engine = engine
+        self.sender = get_notification_sender() if sender is None else sender
+        self.buffer = DigestBuffer(window_seconds, max_events)
+        self.poll_interval = poll_interval
+        self.load_batch = load_batch
+        self.max_buffered = max_buffered
+        self._last_id = 0
+        self._next_rescan: Optional[datetime] = None
+        self._failures = 0
+        self._retry_at: Optional[datetime] = None
+
+    def load(self, now: Optional[datetime] = None) -> int:
+        """Buffer rows queued since the last load, or every row still queued
+        when a rescan is due; returns how many were new."""
+        now = now or _utcnow()
+        after = self._last_id
+        if self._next_rescan is None or now >= self._next_rescan:
+            self._next_rescan = now + self.buffer.window
+            after = 0
+
+        loaded, full = 0, False
+        q = QueuedNotification
+        with self.engine.connect() as conn:
+            while not full:
+                rows = conn.execute(
+                    select(q.id, q.recipient_id, q.kind, q.subject_id, q.created_at)
+                    .where(q.id > after)
+                    .order_by(q.id)
+                    .limit(self.load_batch)
+                ).all()
+                for row in rows:
+                    if len(self.buffer) >= self.max_buffered:
+                        full = True
+                        break
+                    if row.id not in self.buffer:
+                        self.buffer.add(*row)
+                        loaded += 1
+                    after = row.id
+                self._last_id = max(self._last_id, after)
+                if len(rows) < self.load_batch:
+                    break
+
+        metrics.inc("kintsugi_notification_events_total", loaded)
+        metrics.set("kintsugi_notification_buffered_events", len(self.buffer))
+        return loaded
+
+    def flush(self, now: Optional[datetime] = None) -> int:
+        """Send every due digest, a sender batch at a time; returns how many
+        were sent. After a failed batch the rest wait for the retry delay."""
+        now = now or _utcnow()
+        if self._retry_at is not None and now < self._retry_at:
+            return 0
+
+        due = self.buffer.due(now)
+        sent = 0
+        for start in range(0, len(due), self.sender.max_batch_size):
+            recipients = due[start : start + self.sender.max_batch_size]
+            digests, ids = [], []
+            for recipient_id in recipients:
+                digest, event_ids = self.buffer.digest(recipient_id)
+                digests.append(digest)
+                ids.extend(event_ids)
+
+            try:
+                self.sender.send(digests)
+            except Exception as exc:
+                self._failures += 1
+                self._retry_at = now + retry_delay(self._failures)
+                metrics.inc("kintsugi_notification_digests_total", len(digests), result="failed")
+                logger.warning(
+                    "sending %d digests failed (attempt %d): %r",
+                    len(digests),
+                    self._failures,
+                    exc,
+                )
+                break
+            self._failures = 0
+            self._retry_at = None
+
+            with self.engine.begin() as conn:
+                conn.execute(delete(QueuedNotification).where(QueuedNotification.id.in_(ids)))
+            for recipient_id in recipients:
+                self.buffer.remove(recipient_id)
+            sent += len(digests)
+            metrics.inc("kintsugi_notification_digests_total", len(digests), result="sent")
+
+        metrics.set("kintsugi_notification_buffered_events", len(self.buffer))
+        return sent
+
+    def run_once(self, now: Optional[datetime] = None) -> int:
+        now = now or _utcnow()
+        self.load(now)
+        return self.flush(now)
+
+    def _try_lock(self, conn: Connection) -> bool:
+        locked = conn.scalar(select(func.pg_try_advisory_lock(_LOCK_KEY)))
+        # The lock belongs to the session; do not sit idle in a transaction.
+        conn.commit()
+        return bool(locked)
+
+    async def run(self, stop: asyncio.Event) -> None:
+        loop = asyncio.get_running_loop()
+
+        async def pause(seconds: float) -> None:
+            try:
+                await asyncio.wait_for(stop.wait(), seconds)
+            except asyncio.TimeoutError:
+                pass
+
+        with ThreadPoolExecutor(1, thread_name_prefix="notifier") as pool, (
+            self.engine.connect()
+        ) as lock_conn:
+            while not await loop.run_in_executor(pool, self._try_lock, lock_conn):
+                logger.info("another notifier is active, waiting")
+                await pause(self.buffer.window.total_seconds())
+                if stop.is_set():
+                    return
+
+            while not stop.is_set():
+                try:
+                    await loop.run_in_executor(pool, self.run_once)
+                except Exception:
+                    logger.exception("notifier round failed")
+                await pause(self.poll_interval)
+
+
+async def _main() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    primary, _ = get_engines()
+    await Notifier(primary).run(stop)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
@@ -0,0 +1,175 @@
+"""Drains ``outbox_events`` and runs the registered side-effect handlers.
+
+    python -m app.workers.outbox_worker
+
+Each batch is claimed with ``FOR UPDATE SKIP LOCKED`` so several workers can
+run side by side. Handlers run inside a savepoint of the batch transaction and
+the event is marked done in that same transaction, so an event's effects are
+committed exactly once even though handlers call services that ``commit()``.
+"""
+
+import os
+import signal
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.core.database import get_engines
+from app.core.metrics import metrics
+from app.schemas.schema import OutboxEvent, OutboxStatus
+from app.services.events.handlers import HANDLERS, Handler
+
+
+logger = logging.getLogger("kintsugi.outbox")
+
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_CONCURRENCY = int(os.environ.get("OUTBOX_CONCURRENCY", "2"))
+OUTBOX_POLL_INTERVAL = float(os.environ.get("OUTBOX_POLL_INTERVAL", "1.0"))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", "8"))
+
+metrics.counter("kintsugi_outbox_events_total", "Outbox events handled, by result.")
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(2**attempts, 600))
+
+
+class OutboxWorker:
+    def __init__(
+        self,
+        engine: Engine,
+        handlers: Optional[Dict[str, List[Handler]]] = None,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        concurrency: int = OUTBOX_CONCURRENCY,
+        poll_interval: float = OUTBOX_POLL_INTERVAL,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+    ):
+        self.engine = engine
+        self.handlers = HANDLERS if handlers is None else handlers
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+
+    def process_batch(self) -> int:
+        with self.engine.connect() as conn:
+            with conn.begin():
+                events = conn.execute(
+                    select(
+                        OutboxEvent.id,
+                        OutboxEvent.event_type,
+                        OutboxEvent.payload,
+                        OutboxEvent.attempts,
+                    )
+                    .where(
+                        OutboxEvent.status == OutboxStatus.PENDING,
+                        OutboxEvent.available_at <= _utcnow(),
+                    )
+                    .order_by(OutboxEvent.available_at, OutboxEvent.id)
+                    .limit(self.batch_size)
+                    .with_for_update(skip_locked=True)
+                ).all()
+
+                for event in events:
+                    self._process(conn, event)
+
+        return len(events)
+
+    def _process(self, conn: Connection, event) -> None:
+        attempts = event.attempts + 1
+        savepoint = conn.begin_nested()
+        db = Session(bind=conn, join_transaction_mode="create_savepoint")
+
+        try:
+            for handler in self.handlers.get(event.event_type, []):
+                handler(db, event.payload)
+            db.commit()
+            db.close()
+            savepoint.commit()
+        except Exception as exc:
+            db.close()
+            savepoint.rollback()
+
+            failed = attempts >= self.max_attempts
+            conn.execute(
+                update(OutboxEvent)
+                .where(OutboxEvent.id == event.id)
+                .values(
+                    attempts=attempts,
+                    last_error=repr(exc)[:2000],
+                    status=OutboxStatus.FAILED if failed else OutboxStatus.PENDING,
+                    available_at=_utcnow() + retry_delay(attempts),
+                )
+            )
+            metrics.inc(
+                "kintsugi_outbox_events_total",
+                event_type=event.event_type,
+                result="failed" if failed else "retry",
+            )
+            logger.warning(
+                "outbox event %s (%s) failed on attempt %s: %r",
+                event.id,
+                event.event_type,
+                attempts,
+                exc,
+            )
+            return
+
+        conn.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id == event.id)
+            .values(
+                attempts=attempts,
+                status=OutboxStatus.DONE,
+                processed_at=_utcnow(),
+                last_error=None,
+            )
+        )
+        metrics.inc(
+            "kintsugi_outbox_events_total", event_type=event.event_type, result="done"
+        )
+
+    async def run(self, stop: asyncio.Event) -> None:
+        loop = asyncio.get_running_loop()
+
+        async def drain(pool: ThreadPoolExecutor) -> None:
+            while not stop.is_set():
+                try:
+                    handled = await loop.run_in_executor(pool, self.process_batch)
+                except Exception:
+                    logger.exception("outbox batch failed")
+                    handled = 0
+
+                if handled < self.batch_size:
+                    try:
+                        await asyncio.wait_for(stop.wait(), self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+
+        with ThreadPoolExecutor(self.concurrency, thread_name_prefix="outbox") as pool:
+            await asyncio.gather(*(drain(pool) for _ in range(self.concurrency)))
+
+
+async def _main() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    primary, _ = get_engines()
+    await OutboxWorker(primary).run(stop)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
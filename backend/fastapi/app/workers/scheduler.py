@@ -0,0 +1,144 @@
+"""Runs periodic maintenance: expiry sweeps, message archival, purging
+expired idempotency keys, failing abandoned media renders and the daily login
+streak batch.
+
+    python -m app.workers.scheduler
+    python -m app.workers.scheduler --once
+
+Each task runs on its own interval in a worker thread with a fresh session.
+A failing task is logged and retried on its next tick; it never stops the
+other tasks. Running several schedulers is safe because every sweep claims
+its rows with ``SKIP LOCKED`` (the streak batch claims whole days instead).
+"""
+
+import os
+import signal
+import asyncio
+import argparse
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.database import create_session
+from app.core.idempotency import get_idempotency_store
+from app.core.metrics import metrics
+from app.services.user.activity_service import ActivityService
+from app.services.user.expiry_service import ExpiryService
+from app.services.user.media_service import MediaService
+from app.services.user.message_archive_service import MessageArchiveService
+
+
+logger = logging.getLogger("kintsugi.scheduler")
+
+EXPIRY_INTERVAL_SECONDS = float(os.environ.get("EXPIRY_INTERVAL_SECONDS", "300"))
+ARCHIVE_INTERVAL_SECONDS = float(os.environ.get("ARCHIVE_INTERVAL_SECONDS", "3600"))
+IDEMPOTENCY_PURGE_INTERVAL_SECONDS = float(
+    os.environ.get("IDEMPOTENCY_PURGE_INTERVAL_SECONDS", "900")
+)
+# Only finished days are processed, so this bounds how long after midnight UTC
+# streaks and streak XP are updated.
+STREAK_INTERVAL_SECONDS = float(os.environ.get("STREAK_INTERVAL_SECONDS", "900"))
+
+metrics.counter("kintsugi_scheduled_runs_total", "Scheduled task runs, by result.")
+
+
+@dataclass
+class ScheduledTask:
+    name: str
+    interval_seconds: float
+    run: Callable[[Session], object]
+
+
+def _archive_messages(db: Session) -> dict:
+    service = MessageArchiveService(db)
+    created = service.ensure_partitions()
+    return {"partitions_created": created, **service.archive_closed_jobs()}
+
+
+TASKS: List[ScheduledTask] = [
+    ScheduledTask("expiry", EXPIRY_INTERVAL_SECONDS, lambda db: ExpiryService(db).run_all()),
+    ScheduledTask("message_archive", ARCHIVE_INTERVAL_SECONDS, _archive_messages),
+    ScheduledTask(
+        "idempotency_purge",
+        IDEMPOTENCY_PURGE_INTERVAL_SECONDS,
+        lambda db: get_idempotency_store().purge_expired(),
+    ),
+    ScheduledTask(
+        "media_leases", EXPIRY_INTERVAL_SECONDS, lambda db: MediaService(db).fail_abandoned()
+    ),
+    ScheduledTask(
+        "daily_streaks", STREAK_INTERVAL_SECONDS, lambda db: ActivityService(db).process_days()
+    ),
+]
+
+
+class Scheduler:
+    def __init__(
+        self,
+        tasks: Optional[List[ScheduledTask]] = None,
+        session_factory: Callable[[], Session] = create_session,
+    ):
+        self.tasks = TASKS if tasks is None else tasks
+        self.session_factory = session_factory
+
+    def run_task(self, task: ScheduledTask) -> object:
+        started = time.perf_counter()
+        try:
+            with self.session_factory() as db:
+                result = task.run(db)
+        except Exception:
+            metrics.inc("kintsugi_scheduled_runs_total", task=task.name, result="failed")
+            logger.exception("scheduled task %s failed", task.name)
+            return None
+
+        metrics.inc("kintsugi_scheduled_runs_total", task=task.name, result="ok")
+        logger.info(
+            "scheduled task %s finished in %.2fs: %s",
+            task.name,
+            time.perf_counter() - started,
+            result,
+        )
+        return result
+
+    def run_once(self) -> None:
+        for task in self.tasks:
+            self.run_task(task)
+
+    async def run(self, stop: asyncio.Event) -> None:
+        loop = asyncio.get_running_loop()
+
+        async def every(pool: ThreadPoolExecutor, task: ScheduledTask) -> None:
+            while not stop.is_set():
+                await loop.run_in_executor(pool, self.run_task, task)
+                try:
+                    await asyncio.wait_for(stop.wait(), task.interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+
+        with ThreadPoolExecutor(len(self.tasks), thread_name_prefix="scheduler") as pool:
+            await asyncio.gather(*(every(pool, task) for task in self.tasks))
+
+
+async def _main() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await Scheduler().run(stop)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m app.workers.scheduler")
+    parser.add_argument("--once", action="store_true", help="run every task once and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.once:
+        Scheduler().run_once()
+    else:
+        asyncio.run(_main())
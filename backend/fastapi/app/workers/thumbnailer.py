@@ -0,0 +1,258 @@
+"""Renders thumbnail and preview variants of uploaded media in a process pool.
+
+Decoding and resizing images is CPU bound and holds the GIL, so it runs in
+separate processes and never on the request path. ``render_variants`` is the
+part that runs in a child process; a finisher thread in the parent uploads
+what it produced to the blob store and records the variants on the media
+asset and on every attachment that references it.
+"""
+
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.blob_store import BlobStore, get_blob_store, media_key
+from app.core.database import create_session
+from app.core.metrics import metrics
+from app.schemas.schema import MediaAsset, MediaStatus, MessageAttachment
+
+
+logger = logging.getLogger("kintsugi.thumbnailer")
+
+MEDIA_WORKERS = int(os.environ.get("MEDIA_WORKERS", "2"))
+
+# variant name -> longest side in pixels
+VARIANT_SIZES = {
+    "thumb_96": 96,
+    "thumb_320": 320,
+    "preview_1280": 1280,
+}
+VARIANT_FORMAT = ("WEBP", "image/webp", "webp")
+VARIANT_QUALITY = 80
+
+metrics.counter("kintsugi_media_processed_total", "Uploaded media processed, by result.")
+
+
+def _video_poster(source_path: str):
+    import cv2
+    from PIL import Image
+
+    capture = cv2.VideoCapture(source_path)
+    try:
+        # A frame one second in is usually more representative than the first.
+        capture.set(cv2.CAP_PROP_POS_MSEC, 1000)
+        ok, frame = capture.read()
+        if not ok:
+            capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = capture.read()
+        if not ok:
+            raise ValueError("could not read a frame from the video")
+    finally:
+        capture.release()
+    return Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+
+def render_variants(source_path: str, content_type: str, out_dir: str) -> List[dict]:
+    """Write every variant of ``source_path`` into ``out_dir``.
+
+    Runs in a worker process; returns plain dicts so the result pickles.
+    """
+    from PIL import Image, ImageOps
+
+    if content_type.startswith("video/"):
+        image = _video_poster(source_path)
+    else:
+        image = ImageOps.exif_transpose(Image.open(source_path))
+
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+    image_format, variant_type, extension = VARIANT_FORMAT
+    variants = []
+    for name, size in VARIANT_SIZES.items():
+        variant = image.copy()
+        # thumbnail() only ever shrinks, so small uploads keep their size.
+        variant.thumbnail((size, size), Image.LANCZOS)
+        path = os.path.join(out_dir, f"{name}.{extension}")
+        variant.save(path, image_format, quality=VARIANT_QUALITY, method=4)
+        variants.append(
+            {
+                "name": name,
+                "path": path,
+                "width": variant.width,
+                "height": variant.height,
+                "content_type": variant_type,
+                "bytes": os.path.getsize(path),
+            }
+        )
+    return variants
+
+
+class Thumbnailer:
+    def __init__(
+        self,
+        store: BlobStore,
+        session_factory: Callable[[], Session],
+        max_workers: int = MEDIA_WORKERS,
+    ):
+        self.store = store
+        self.session_factory = session_factory
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._finisher: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a process that runs server threads is unsafe.
+            self._pool = ProcessPoolExecutor(
+                self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    @property
+    def finisher(self) -> ThreadPoolExecutor:
+        # Done callbacks run on the process pool's management thread, which
+        # also collects every other result; uploads and DB writes go here.
+        if self._finisher is None:
+            self._finisher = ThreadPoolExecutor(
+                self.max_workers, thread_name_prefix="kintsugi-media"
+            )
+        return self._finisher
+
+    def submit(
+        self,
+        content_hash: str,
+        source_path: str,
+        content_type: str,
+        attempt: Optional[datetime] = None,
+    ) -> Future:
+        """Queue variant rendering. ``source_path`` is deleted once done.
+
+        ``attempt`` is the asset's ``processing_started_at`` when this render
+        was claimed; see ``record``.
+        """
+        out_dir = tempfile.mkdtemp(prefix="kintsugi-media-")
+        finisher = self.finisher
+        future = self.pool.submit(render_variants, source_path, content_type, out_dir)
+        future.add_done_callback(
+            lambda f: finisher.submit(
+                self._finish, f, content_hash, source_path, out_dir, attempt
+            )
+        )
+        return future
+
+    def _finish(
+        self,
+        future: Future,
+        content_hash: str,
+        source_path: str,
+        out_dir: str,
+        attempt: Optional[datetime] = None,
+    ) -> None:
+        try:
+            variants: Optional[Dict[str, dict]] = None
+            try:
+                variants = {}
+                for v in future.result():
+                    key = media_key(content_hash, v["name"], v["path"].rsplit(".", 1)[-1])
+                    variants[v["name"]] = {
+                        "url": self.store.put_file(key, v["path"], v["content_type"]),
+                        "width": v["width"],
+                        "height": v["height"],
+                        "content_type": v["content_type"],
+                        "bytes": v["bytes"],
+                    }
+            except Exception:
+                logger.exception("rendering variants for %s failed", content_hash)
+                variants = None
+
+            self.record(content_hash, variants, attempt)
+        except Exception:
+            logger.exception("recording variants for %s failed", content_hash)
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
+            if os.path.exists(source_path):
+                os.unlink(source_path)
+
+    def record(
+        self,
+        content_hash: str,
+        variants: Optional[Dict[str, dict]],
+        attempt: Optional[datetime] = None,
+    ) -> bool:
+        """Store the outcome of a render; returns whether the asset changed.
+
+        A render can finish after its lease ran out and another upload took
+        the asset over. Variants are rendered from the same bytes, so any
+        attempt's may be stored unless the asset is already READY. A failure
+        only counts for the attempt that currently holds the asset, so a late
+        failure never flips a READY asset (or a newer attempt) to FAILED.
+        """
+        if variants:
+            current = MediaAsset.status != MediaStatus.READY
+        else:
+            current = MediaAsset.status == MediaStatus.PROCESSING
+            if attempt is not None:
+                current = current & (MediaAsset.processing_started_at == attempt)
+
+        with self.session_factory() as db:
+            changed = db.execute(
+                update(MediaAsset)
+                .where(MediaAsset.content_hash == content_hash, current)
+                .values(
+                    status=MediaStatus.READY if variants else MediaStatus.FAILED,
+                    variants=variants,
+                )
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if changed and variants:
+                db.execute(
+                    update(MessageAttachment)
+                    .where(
+                        MessageAttachment.content_hash == content_hash,
+                        MessageAttachment.variants.is_(None),
+                    )
+                    .values(variants=variants)
+                )
+            db.commit()
+
+        if not changed:
+            metrics.inc("kintsugi_media_processed_total", result="superseded")
+            return False
+        metrics.inc(
+            "kintsugi_media_processed_total", result="ready" if variants else "failed"
+        )
+        return True
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        if self._finisher is not None:
+            self._finisher.shutdown(wait=True)
+            self._finisher = None
+
+
+_thumbnailer: Optional[Thumbnailer] = None
+
+
+def get_thumbnailer() -> Thumbnailer:
+    global _thumbnailer
+    if _thumbnailer is None:
+        _thumbnailer = Thumbnailer(get_blob_store(), create_session)
+    return _thumbnailer
+
+
+def shutdown_thumbnailer() -> None:
+    """Wait for queued variants to finish; called on API shutdown."""
+    if _thumbnailer is not None:
+        _thumbnailer.shutdown()
@@ -0,0 +1,171 @@
+"""Login streaks: per-login read-modify-write against an activity log plus a daily batch.
+
+    BENCHMARK_DATABASE_URL=... python -m benchmarks.daily_streaks \\
+        --logins 5000 --concurrency 16 --days 7 --active 50000
+
+Uses users from the loaded benchmark dataset (``benchmarks.run generate``).
+
+- ``login_rmw``: the old ``GamificationService.update_login_streak`` inline:
+  read the progress row, work out the streak and write it back, for
+  ``--logins`` logins from ``--concurrency`` threads. The XP event it
+  published on a continued streak is left out, so this is its floor.
+- ``login_append``: ``ActivityService.record_login`` for the same logins,
+  one insert into ``user_activity``.
+- ``batch_day``: ``--days`` consecutive days with ``--active`` users each
+  (drawn from a pool a quarter larger, so most streaks continue and some
+  break), each rolled forward by one ``ActivityService.process_day``.
+
+``user_gamification`` is snapshotted first and restored afterwards; the
+activity and rollup rows the run adds are deleted.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, delete, func, insert, or_, select, text
+
+from app.schemas.schema import ActivityRollup, UserActivity, UserGamification
+from app.services.user.activity_service import ActivityService, _today
+from app.services.user.gamification_service import GamificationService
+from benchmarks.harness import BenchmarkResult, run_concurrent, save_results
+from benchmarks.scenarios import make_session_factory
+
+SNAPSHOT = "bench_gamification_snapshot"
+
+
+def _login_rmw(db, user_id) -> int:
+    progress = GamificationService(db).get_progress(user_id)
+    now = datetime.now(timezone.utc)
+    if not progress.last_action_date:
+        progress.login_streak = 1
+    else:
+        delta = (now.date() - progress.last_action_date.date()).days
+        if delta == 1:
+            progress.login_streak += 1
+        elif delta > 1:
+            progress.login_streak = 1
+    progress.last_action_date = now
+    db.commit()
+    return progress.login_streak
+
+
+def _snapshot(engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {SNAPSHOT}"))
+        conn.execute(
+            text(
+                f"CREATE TABLE {SNAPSHOT} AS SELECT user_id, current_xp, current_level, "
+                "login_streak, last_action_date, version FROM user_gamification"
+            )
+        )
+
+
+def _restore_progress(engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                f"UPDATE user_gamification g SET current_xp = s.current_xp, "
+                "current_level = s.current_level, login_streak = s.login_streak, "
+                "last_action_date = s.last_action_date, version = s.version "
+                f"FROM {SNAPSHOT} s WHERE s.user_id = g.user_id"
+            )
+        )
+
+
+def _restore(engine, days) -> None:
+    _restore_progress(engine)
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE {SNAPSHOT}"))
+        conn.execute(
+            delete(UserActivity).where(
+                or_(UserActivity.activity_date.in_(days), UserActivity.activity_date == _today())
+            )
+        )
+        conn.execute(delete(ActivityRollup).where(ActivityRollup.activity_date.in_(days)))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.daily_streaks")
+    parser.add_argument("--logins", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--active", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out")
+    args = parser.parse_args(argv)
+
+    url = os.environ.get("BENCHMARK_DATABASE_URL")
+    if not url:
+        raise SystemExit("BENCHMARK_DATABASE_URL is not set")
+    engine = create_engine(url, pool_size=args.concurrency, max_overflow=0)
+    session_factory = make_session_factory(engine)
+    rng = random.Random(args.seed)
+
+    with session_factory() as db:
+        users = db.scalars(
+            select(UserGamification.user_id).order_by(UserGamification.user_id)
+        ).all()
+        last = db.scalar(select(func.max(UserGamification.last_action_date)))
+    pool_size = min(len(users), args.active * 5 // 4)
+    if pool_size < args.active:
+        raise SystemExit(f"dataset only has {len(users)} users, {args.active} needed")
+    start = (last or datetime.now(timezone.utc)).date() + timedelta(days=1)
+    days = [start + timedelta(days=i) for i in range(args.days)]
+    logins = [rng.choice(users) for _ in range(args.logins)]
+    pool = rng.sample(users, pool_size)
+
+    print(f"{len(users)} users, {args.logins} logins, {args.days} days x {args.active} active")
+    results = []
+    _snapshot(engine)
+    try:
+        for name, login in (
+            ("login_rmw", _login_rmw),
+            ("login_append", lambda db, user_id: ActivityService(db).record_login(user_id)),
+        ):
+            def op(i: int, login=login) -> None:
+                with session_factory() as db:
+                    login(db, logins[i])
+
+            result = run_concurrent(name, op, args.logins, args.concurrency)
+            results.append(result)
+            s = result.summary()
+            print(
+                f"{name:<14} {s['throughput_ops']:>9} ops/s p50={s['p50_ms']:>8}ms "
+                f"p99={s['p99_ms']:>9}ms errors={s['errors']}"
+            )
+
+        # The logins stamped today on their users, which the batch would skip.
+        _restore_progress(engine)
+        batch = BenchmarkResult(name="batch_day", iterations=args.days, total_seconds=0.0)
+        for day in days:
+            with session_factory() as db:
+                db.execute(
+                    insert(UserActivity),
+                    [{"activity_date": day, "user_id": u} for u in rng.sample(pool, args.active)],
+                )
+                db.commit()
+                started = time.perf_counter()
+                outcome = ActivityService(db).process_day(day)
+                elapsed = time.perf_counter() - started
+            batch.samples_ms.append(elapsed * 1000)
+            batch.total_seconds += elapsed
+            print(
+                f"batch {day}: {elapsed * 1000:>8.1f}ms active={outcome['active']} "
+                f"continued={outcome['continued']} started={outcome['started']} "
+                f"reset={outcome['reset']} ({args.active / elapsed:,.0f} users/s)"
+            )
+        results.append(batch)
+    finally:
+        _restore(engine, days)
+
+    if args.out:
+        save_results(args.out, results, meta=vars(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
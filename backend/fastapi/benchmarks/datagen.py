@@ -0,0 +1,341 @@
+"""Deterministic synthetic Kintsugi dataset.
+
+The same ``(rows, seed)`` pair always produces the same rows, so results from
+different runs can be compared. Rows are generated and inserted in chunks and
+only the foreign-key bookkeeping (user ids, item owners, job participants) is
+kept in memory.
+"""
+
+import random
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import insert, text
+from sqlalchemy.engine import Engine
+
+from app.schemas.schema import (
+    Item,
+    ItemStatus,
+    Job,
+    JobStatus,
+    Message,
+    MessageStatus,
+    MessageType,
+    Offer,
+    OfferStatus,
+    Review,
+    User,
+    UserBadge,
+    UserGamification,
+    UserReputation,
+    UserStatus,
+    VerificationTier,
+)
+
+MIN_ROWS = 10_000
+MAX_ROWS = 10_000_000
+
+# Share of the total row budget given to each table, in insert order.
+TABLE_WEIGHTS = {
+    "users": 0.05,
+    "user_gamification": 0.05,
+    "user_reputation": 0.05,
+    "items": 0.10,
+    "offers": 0.22,
+    "jobs": 0.06,
+    "messages": 0.38,
+    "reviews": 0.04,
+    "user_badges": 0.05,
+}
+
+CATEGORIES = ["electronics", "furniture", "clothing", "bicycles", "appliances", "toys"]
+BADGES = [
+    ("First Fix", "first-fix"),
+    ("Quick Responder", "quick-responder"),
+    ("Top Rated", "top-rated"),
+    ("Streak Master", "streak-master"),
+]
+# Chat words, most common first; message text draws from them with a skew so
+# full-text search sees both very common and rare terms.
+CHAT_WORDS = (
+    "the it is can you fix when will hinge screen battery cable glue screw "
+    "crack scratch leg drawer zipper seam chain brake spoke tyre motor fuse "
+    "knob handle spring valve seal gasket pump filter display "
+    "keyboard charger pedal wheel stitch leather varnish veneer warranty "
+    "pickup delivery tomorrow friday photo invoice refund deposit rattle squeak "
+    "leak wobble overheating flicker"
+).split()
+CHAT_WORD_WEIGHTS = [1 / (rank + 1) for rank in range(len(CHAT_WORDS))]
+# Share of messages that quote a part number out of PART_NUMBERS, which gives
+# the corpus a long tail of rare terms.
+PART_NUMBER_SHARE = 0.05
+PART_NUMBERS = 100_000
+BASE_TIME = datetime(2025, 1, 1)
+SPAN_SECONDS = 365 * 24 * 3600
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    rows: int = MIN_ROWS
+    seed: int = 42
+
+    def __post_init__(self):
+        if not MIN_ROWS <= self.rows <= MAX_ROWS:
+            raise ValueError(f"rows must be between {MIN_ROWS} and {MAX_ROWS}")
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        users = max(10, int(self.rows * TABLE_WEIGHTS["users"]))
+        counts = {table: max(1, int(self.rows * w)) for table, w in TABLE_WEIGHTS.items()}
+        counts["users"] = counts["user_gamification"] = counts["user_reputation"] = users
+        counts["jobs"] = min(counts["jobs"], counts["items"])
+        return counts
+
+
+class DatasetGenerator:
+    def __init__(self, spec: DatasetSpec):
+        self.spec = spec
+        self.counts = spec.counts
+
+        rng = self._rng("ids")
+        self.user_ids = [
+            uuid.UUID(int=rng.getrandbits(128), version=4)
+            for _ in range(self.counts["users"])
+        ]
+
+        rng = self._rng("item_owners")
+        n_users = len(self.user_ids)
+        self.item_owner = [rng.randrange(n_users) for _ in range(self.counts["items"])]
+
+        # Job i repairs item i; its fixer is anyone but the item owner.
+        rng = self._rng("job_fixers")
+        self.job_fixer = []
+        for i in range(self.counts["jobs"]):
+            fixer = rng.randrange(n_users)
+            if fixer == self.item_owner[i]:
+                fixer = (fixer + 1) % n_users
+            self.job_fixer.append(fixer)
+
+    def _rng(self, stream: str) -> random.Random:
+        return random.Random(f"{self.spec.seed}:{stream}")
+
+    @staticmethod
+    def _timestamp(rng: random.Random) -> datetime:
+        return BASE_TIME + timedelta(seconds=rng.randrange(SPAN_SECONDS))
+
+    def users(self) -> Iterator[dict]:
+        rng = self._rng("users")
+        for i, user_id in enumerate(self.user_ids):
+            created = self._timestamp(rng)
+            yield {
+                "id": user_id,
+                "email": f"user{i}@bench.kintsugi.test",
+                "display_name": f"User {i}",
+                "avatar_url": None,
+                "bio": None,
+                "user_status": rng.choice(list(UserStatus)),
+                "created_at": created,
+                "updated_at": created,
+            }
+
+    def user_gamification(self) -> Iterator[dict]:
+        rng = self._rng("user_gamification")
+        for user_id in self.user_ids:
+            level = rng.randint(1, 20)
+            yield {
+                "user_id": user_id,
+                "current_level": level,
+                "current_xp": rng.randrange(level * 100),
+                "login_streak": rng.randint(0, 60),
+                "last_action_date": self._timestamp(rng),
+            }
+
+    def user_reputation(self) -> Iterator[dict]:
+        rng = self._rng("user_reputation")
+        for user_id in self.user_ids:
+            yield {
+                "user_id": user_id,
+                "average_rating": round(rng.uniform(1, 5), 2),
+                "total_reviews": rng.randint(0, 200),
+                "trust_score": rng.randint(0, 100),
+                "verification_tier": int(rng.choice(list(VerificationTier))),
+            }
+
+    def items(self) -> Iterator[dict]:
+        rng = self._rng("items")
+        n_jobs = self.counts["jobs"]
+        for i, owner in enumerate(self.item_owner):
+            yield {
+                "id": i + 1,
+                "owner_id": self.user_ids[owner],
+                "title": f"Item {i}",
+                "description": None,
+                "category": rng.choice(CATEGORIES),
+                "status": ItemStatus.IN_PROGRESS if i < n_jobs else ItemStatus.OPEN,
+                "images": [],
+            }
+
+    def offers(self) -> Iterator[dict]:
+        rng = self._rng("offers")
+        n_items = self.counts["items"]
+        n_users = len(self.user_ids)
+        statuses = [OfferStatus.PENDING] * 6 + [OfferStatus.REJECTED] * 2 + [
+            OfferStatus.ACCEPTED,
+            OfferStatus.WITHDRAWN,
+        ]
+        for i in range(self.counts["offers"]):
+            yield {
+                "id": i + 1,
+                "item_id": rng.randrange(n_items) + 1,
+                "fixer_id": self.user_ids[rng.randrange(n_users)],
+                "price_bid": round(rng.uniform(5, 500), 2),
+                "status": rng.choice(statuses),
+                "created_at": self._timestamp(rng),
+            }
+
+    def job_status(self, job_index: int) -> JobStatus:
+        rng = self._rng(f"job_status:{job_index}")
+        roll = rng.random()
+        if roll < 0.40:
+            return JobStatus.ACTIVE
+        if roll < 0.70:
+            return JobStatus.COMPLETED
+        if roll < 0.90:
+            return JobStatus.VERIFIED
+        if roll < 0.95:
+            return JobStatus.DISPUTED
+        return JobStatus.CANCELLED
+
+    def jobs(self) -> Iterator[dict]:
+        rng = self._rng("jobs")
+        for i in range(self.counts["jobs"]):
+            job_status = self.job_status(i)
+            started = self._timestamp(rng)
+            done = job_status in (JobStatus.COMPLETED, JobStatus.VERIFIED)
+            yield {
+                "id": i + 1,
+                "item_id": i + 1,
+                "client_id": self.user_ids[self.item_owner[i]],
+                "fixer_id": self.user_ids[self.job_fixer[i]],
+                "agreed_price": round(rng.uniform(5, 500), 2),
+                "status": job_status,
+                "started_at": started,
+                "completed_at": started + timedelta(days=rng.randint(1, 30)) if done else None,
+            }
+
+    def messages(self) -> Iterator[dict]:
+        rng = self._rng("messages")
+        n_jobs = self.counts["jobs"]
+        for i in range(self.counts["messages"]):
+            job = rng.randrange(n_jobs)
+            sender = self.item_owner[job] if rng.random() < 0.5 else self.job_fixer[job]
+            yield {
+                "id": i + 1,
+                "job_id": job + 1,
+                "sender_id": self.user_ids[sender],
+                "message_type": MessageType.TEXT,
+                "message_status": MessageStatus.DELIVERED,
+                "content": self._chat_text(rng),
+                "created_at": self._timestamp(rng),
+            }
+
+    @staticmethod
+    def _chat_text(rng: random.Random) -> str:
+        words = rng.choices(CHAT_WORDS, CHAT_WORD_WEIGHTS, k=rng.randint(4, 16))
+        if rng.random() < PART_NUMBER_SHARE:
+            words.append(f"sku{rng.randrange(PART_NUMBERS)}")
+        return " ".join(words)
+
+    def reviews(self) -> Iterator[dict]:
+        rng = self._rng("reviews")
+        n_jobs = self.counts["jobs"]
+        # One review per job and reviewer (uq_reviews_job_reviewer).
+        jobs = rng.sample(range(n_jobs), min(self.counts["reviews"], n_jobs))
+        for i, job in enumerate(jobs):
+            yield {
+                "id": i + 1,
+                "job_id": job + 1,
+                "reviewer_id": self.user_ids[self.item_owner[job]],
+                "target_id": self.user_ids[self.job_fixer[job]],
+                "rating": rng.randint(1, 5),
+                "comment": None,
+                "created_at": self._timestamp(rng),
+            }
+
+    def user_badges(self) -> Iterator[dict]:
+        rng = self._rng("user_badges")
+        n_users = len(self.user_ids)
+        # A user holds each badge once (uq_user_badges_user_slug).
+        total = min(self.counts["user_badges"], n_users * len(BADGES))
+        seen = set()
+        while len(seen) < total:
+            user, badge = rng.randrange(n_users), rng.randrange(len(BADGES))
+            if (user, badge) in seen:
+                continue
+            seen.add((user, badge))
+            name, slug = BADGES[badge]
+            yield {
+                "id": len(seen),
+                "user_id": self.user_ids[user],
+                "name": name,
+                "badge_slug": slug,
+                "earned_at": self._timestamp(rng),
+            }
+
+
+MODELS = {
+    "users": User,
+    "user_gamification": UserGamification,
+    "user_reputation": UserReputation,
+    "items": Item,
+    "offers": Offer,
+    "jobs": Job,
+    "messages": Message,
+    "reviews": Review,
+    "user_badges": UserBadge,
+}
+
+
+def _chunks(rows: Iterator[dict], size: int) -> Iterator[List[dict]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def load_dataset(
+    engine: Engine,
+    spec: DatasetSpec,
+    chunk_size: int = 5000,
+    progress: Optional[Callable[[str, int, int], None]] = None,
+) -> DatasetGenerator:
+    generator = DatasetGenerator(spec)
+
+    for table, model in MODELS.items():
+        total = generator.counts[table]
+        done = 0
+        for chunk in _chunks(getattr(generator, table)(), chunk_size):
+            with engine.begin() as conn:
+                conn.execute(insert(model.__table__), chunk)
+            done += len(chunk)
+            if progress:
+                progress(table, done, total)
+
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            for table, model in MODELS.items():
+                if "id" in model.__table__.c and table != "users":
+                    conn.execute(
+                        text(
+                            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                            f"(SELECT COALESCE(MAX(id), 1) FROM {table}))"
+                        )
+                    )
+
+    return generator
@@ -0,0 +1,187 @@
+"""Throughput and budget checks for the diagnosis queue with the fake client.
+
+    BENCHMARK_DATABASE_URL=... python -m benchmarks.diagnosis_queue \\
+        --requests 400 --latency-ms 200 --batch-sizes 1,8 --concurrency 4
+
+Queues ``--requests`` diagnoses for items of the loaded benchmark dataset
+(``benchmarks.run generate``) and drains them with ``DiagnosisWorker`` at
+each batch size, reporting requests per second and model calls made. Every
+request must end up done with exactly one diagnosis row.
+
+``--budget-usd`` adds a run where every call costs ``--cost-usd`` and the
+hourly budget must stop the worker before spend goes over it.
+
+Rows created by a run are deleted afterwards.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine, delete, func, insert, select
+
+from app.core.diagnosis_client import FakeDiagnosisClient
+from app.schemas.schema import Diagnosis, DiagnosisRequest, DiagnosisRequestStatus, DiagnosisType, Item
+from app.workers.diagnosis_worker import DiagnosisWorker
+from benchmarks.harness import BenchmarkResult, save_results
+from benchmarks.scenarios import make_session_factory
+
+
+def _enqueue(session_factory, model: str, item_ids, n: int) -> None:
+    now = datetime.now(timezone.utc)
+    with session_factory() as db:
+        db.execute(
+            insert(DiagnosisRequest),
+            [
+                {
+                    "item_id": item_ids[i % len(item_ids)],
+                    "diagnosis_type": DiagnosisType.VISUAL,
+                    "model": model,
+                    "media_urls": [],
+                    "status": DiagnosisRequestStatus.PENDING,
+                    "attempts": 0,
+                    "available_at": now,
+                    "created_at": now,
+                }
+                for i in range(n)
+            ],
+        )
+        db.commit()
+
+
+def _drain(worker: DiagnosisWorker, name: str, concurrency: int) -> BenchmarkResult:
+    """Run ``process_batch`` from ``concurrency`` threads until the queue is
+    empty or the budget stops it; one sample per batch."""
+    lock = threading.Lock()
+    result = BenchmarkResult(name=name, iterations=0, total_seconds=0.0)
+
+    def loop() -> None:
+        while True:
+            started = time.perf_counter()
+            try:
+                handled = worker.process_batch()
+            except Exception:
+                with lock:
+                    result.errors += 1
+                return
+            if not handled:
+                return
+            with lock:
+                result.iterations += handled
+                result.samples_ms.append((time.perf_counter() - started) * 1000)
+
+    threads = [threading.Thread(target=loop) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result.total_seconds = time.perf_counter() - started
+    return result
+
+
+def _cleanup(session_factory, model: str) -> None:
+    with session_factory() as db:
+        db.execute(delete(DiagnosisRequest).where(DiagnosisRequest.model == model))
+        db.execute(delete(Diagnosis).where(Diagnosis.ai_model_used == model))
+        db.commit()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.diagnosis_queue")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--batch-sizes", default="1,8")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--budget-usd", type=float, default=0.5)
+    parser.add_argument("--cost-usd", type=float, default=0.01)
+    parser.add_argument("--out")
+    args = parser.parse_args(argv)
+
+    url = os.environ.get("BENCHMARK_DATABASE_URL")
+    if not url:
+        raise SystemExit("BENCHMARK_DATABASE_URL is not set")
+    engine = create_engine(url, pool_size=args.concurrency + 1, max_overflow=0)
+    session_factory = make_session_factory(engine)
+
+    with session_factory() as db:
+        item_ids = db.scalars(select(Item.id).order_by(Item.id).limit(1000)).all()
+    if not item_ids:
+        raise SystemExit("no items; load the benchmark dataset first")
+
+    results, problems = [], []
+    for batch_size in [int(b) for b in args.batch_sizes.split(",")]:
+        model = f"bench-{uuid.uuid4().hex[:12]}"
+        client = FakeDiagnosisClient(latency_seconds=args.latency_ms / 1000)
+        client.max_batch_size = batch_size
+        worker = DiagnosisWorker(
+            engine, client, batch_size=batch_size, budget_usd_per_hour=0, poll_interval=0
+        )
+        try:
+            _enqueue(session_factory, model, item_ids, args.requests)
+            result = _drain(worker, f"batch_{batch_size}", args.concurrency)
+            results.append(result)
+
+            with session_factory() as db:
+                done = db.scalar(
+                    select(func.count()).where(
+                        DiagnosisRequest.model == model,
+                        DiagnosisRequest.status == DiagnosisRequestStatus.DONE,
+                        DiagnosisRequest.diagnosis_id.is_not(None),
+                    )
+                )
+                diagnoses = db.scalar(
+                    select(func.count()).where(Diagnosis.ai_model_used == model)
+                )
+            if done != args.requests or diagnoses != args.requests:
+                problems.append(
+                    f"batch {batch_size}: {done} done and {diagnoses} diagnoses "
+                    f"for {args.requests} requests"
+                )
+
+            s = result.summary()
+            print(
+                f"batch_size={batch_size:<3} {s['throughput_ops']:>9} req/s "
+                f"{client.calls:>5} model calls, batch p50={s['p50_ms']}ms"
+            )
+        finally:
+            _cleanup(session_factory, model)
+
+    if args.budget_usd > 0:
+        model = f"bench-{uuid.uuid4().hex[:12]}"
+        client = FakeDiagnosisClient(latency_seconds=0.01, cost_usd=args.cost_usd)
+        client.estimated_cost_usd = args.cost_usd
+        worker = DiagnosisWorker(engine, client, budget_usd_per_hour=args.budget_usd)
+        try:
+            _enqueue(session_factory, model, item_ids, args.requests)
+            result = _drain(worker, "budgeted", args.concurrency)
+            results.append(result)
+            with session_factory() as db:
+                spent = db.scalar(
+                    select(func.coalesce(func.sum(DiagnosisRequest.cost_usd), 0.0)).where(
+                        DiagnosisRequest.model == model
+                    )
+                )
+            print(
+                f"budgeted     {result.iterations} of {args.requests} requests ran, "
+                f"spent ${spent:.4f} of ${args.budget_usd:.4f}"
+            )
+            if spent > args.budget_usd + 1e-9:
+                problems.append(f"spent {spent} over budget {args.budget_usd}")
+        finally:
+            _cleanup(session_factory, model)
+
+    if args.out:
+        save_results(args.out, results, meta=vars(args))
+
+    for problem in problems:
+        print(f"INVARIANT VIOLATED: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""Status columns as native Postgres enums against SmallEnum smallint codes.
+
+    BENCHMARK_DATABASE_URL=... python -m benchmarks.enum_storage --repeat 10
+
+Uses ``items``, ``offers``, ``jobs`` and ``messages`` from the loaded
+benchmark dataset (``benchmarks.run generate``), in whichever form the
+database has them. Each table is copied twice, once with its status column as
+a native enum and once as ``smallint`` codes, and both copies get the same
+``(status, id)`` index. Per table it prints:
+
+- heap and index size of each copy;
+- ``count_eq``: a sequential scan counting one status;
+- ``group_by``: a sequential scan counting every status;
+- ``decode``: turning ``--rows`` fetched values into Python members with the
+  column type's result processor, ``SAEnum`` for the native copy and
+  ``SmallEnum`` for the compact one.
+
+Index scans are disabled so both scans read the whole heap; the index is
+there for its size.
+
+The copies and their enum types are dropped afterwards.
+"""
+
+import argparse
+import os
+import sys
+
+from sqlalchemy import Enum as SAEnum
+from sqlalchemy import column, create_engine, select, table, text
+
+from app.schemas.schema import Item, Job, Message, Offer
+from app.schemas.types import SmallEnum
+from benchmarks.harness import run_benchmark, save_results
+
+COLUMNS = (
+    (Item, "status"),
+    (Offer, "status"),
+    (Job, "status"),
+    (Message, "message_status"),
+)
+
+
+def _copies(conn, name: str, col: str, enum_class) -> dict:
+    native, compact = f"bench_enum_{name}_native", f"bench_enum_{name}_compact"
+    enum_type = f"bench_enum_{name}"
+    names = [m.name for m in enum_class]
+    labels = ", ".join(f"'{n}'" for n in names)
+    codes = " ".join(f"WHEN '{n}' THEN {code}" for code, n in enumerate(names))
+
+    conn.execute(text(f"CREATE TYPE {enum_type} AS ENUM ({labels})"))
+    for copy in (native, compact):
+        conn.execute(text(f"CREATE TABLE {copy} AS SELECT * FROM {name}"))
+    stored = conn.scalar(
+        text(
+            "SELECT atttypid::regtype::text FROM pg_attribute "
+            "WHERE attrelid = to_regclass(:t) AND attname = :c"
+        ),
+        {"t": name, "c": col},
+    )
+    if stored == "smallint":
+        conn.execute(
+            text(
+                f"ALTER TABLE {native} ALTER COLUMN {col} TYPE {enum_type} "
+                f"USING (ARRAY[{labels}]::{enum_type}[])[{col} + 1]"
+            )
+        )
+    else:
+        conn.execute(
+            text(
+                f"ALTER TABLE {compact} ALTER COLUMN {col} TYPE smallint "
+                f"USING CASE {col}::text {codes} END"
+            )
+        )
+    for copy in (native, compact):
+        conn.execute(text(f"CREATE INDEX {copy}_status_id ON {copy} ({col}, id)"))
+        conn.execute(text(f"VACUUM ANALYZE {copy}"))
+    return {"native": native, "compact": compact}
+
+
+def _drop(conn, name: str) -> None:
+    for kind in ("native", "compact"):
+        conn.execute(text(f"DROP TABLE IF EXISTS bench_enum_{name}_{kind}"))
+    conn.execute(text(f"DROP TYPE IF EXISTS bench_enum_{name}"))
+
+
+def _sizes(conn, copy: str) -> tuple:
+    return conn.execute(
+        text(
+            "SELECT pg_relation_size(to_regclass(:t)), "
+            "pg_relation_size(to_regclass(:t || '_status_id'))"
+        ),
+        {"t": copy},
+    ).one()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.enum_storage")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--out")
+    args = parser.parse_args(argv)
+
+    url = os.environ.get("BENCHMARK_DATABASE_URL")
+    if not url:
+        raise SystemExit("BENCHMARK_DATABASE_URL is not set")
+    engine = create_engine(url)
+
+    results = []
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        # Single-process heap scans, so the timings compare per-row work.
+        for setting in ("max_parallel_workers_per_gather = 0", "enable_indexscan = off",
+                        "enable_indexonlyscan = off", "enable_bitmapscan = off"):
+            conn.execute(text(f"SET {setting}"))
+        for model, col in COLUMNS:
+            name = model.__tablename__
+            enum_class = model.__table__.c[col].type.enum_class
+            first = next(iter(enum_class))
+            _drop(conn, name)
+            try:
+                copies = _copies(conn, name, col, enum_class)
+                rows = conn.scalar(text(f"SELECT count(*) FROM {copies['native']}"))
+                print(f"{name}.{col}: {rows} rows")
+                for kind, copy in copies.items():
+                    heap, index = _sizes(conn, copy)
+                    value = f"'{first.name}'" if kind == "native" else "0"
+                    decoder = SAEnum(enum_class) if kind == "native" else SmallEnum(enum_class)
+                    process = decoder.result_processor(engine.dialect, None)
+                    raw = conn.scalars(
+                        select(column(col)).select_from(table(copy)).limit(args.rows)
+                    ).all()
+                    scans = {
+                        "count_eq": lambda i, c=copy, v=value: conn.execute(
+                            text(f"SELECT count(*) FROM {c} WHERE {col} = {v}")
+                        ).scalar(),
+                        "group_by": lambda i, c=copy: conn.execute(
+                            text(f"SELECT {col}, count(*) FROM {c} GROUP BY {col}")
+                        ).all(),
+                        "decode": lambda i, p=process, r=raw: [p(v) for v in r],
+                    }
+                    mb = 2**20
+                    line = [f"  {kind:<8} heap={heap / mb:>7.1f}MB index={index / mb:>6.1f}MB"]
+                    for scan, op in scans.items():
+                        result = run_benchmark(
+                            f"{name}_{kind}_{scan}", op, args.repeat, warmup=1
+                        )
+                        results.append(result)
+                        line.append(f"{scan}={result.summary()['p50_ms']:>8}ms")
+                    print(" ".join(line))
+            finally:
+                _drop(conn, name)
+
+    if args.out:
+        save_results(args.out, results, meta=vars(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
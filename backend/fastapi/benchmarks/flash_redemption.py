@@ -0,0 +1,135 @@
+"""Flash redemption load test for RewardService.redeem.
+
+    BENCHMARK_DATABASE_URL=... python -m benchmarks.flash_redemption \\
+        --stock 200 --users 300 --attempts 1000 --concurrency 32
+
+Uses users from the loaded benchmark dataset (``benchmarks.run generate``).
+Each user gets enough XP for ``--xp-per-user`` redemptions, then ``--attempts``
+redemptions of one limited reward are fired from ``--concurrency`` threads at
+once, with the same users hitting it concurrently. Afterwards the stock,
+redemption rows and XP balances are checked against each other; any mismatch
+(oversold stock, double-spent XP) fails the run.
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+from collections import Counter
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, func, select, update
+
+from app.schemas.schema import RewardRedemption, Rewards, UserGamification
+from app.schemas.dtos.reward_dto import RewardCreate
+from app.services.user.reward_service import RewardService
+from benchmarks.harness import run_concurrent, save_results
+from benchmarks.scenarios import make_session_factory
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.flash_redemption")
+    parser.add_argument("--stock", type=int, default=200)
+    parser.add_argument("--cost", type=int, default=50)
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--xp-per-user", type=int, default=2, help="redemptions each user can afford")
+    parser.add_argument("--attempts", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out")
+    args = parser.parse_args(argv)
+
+    url = os.environ.get("BENCHMARK_DATABASE_URL")
+    if not url:
+        raise SystemExit("BENCHMARK_DATABASE_URL is not set")
+    engine = create_engine(url, pool_size=args.concurrency, max_overflow=0)
+    session_factory = make_session_factory(engine)
+
+    with session_factory() as db:
+        users = db.scalars(
+            select(UserGamification.user_id).order_by(UserGamification.user_id).limit(args.users)
+        ).all()
+        if len(users) < args.users:
+            raise SystemExit(f"dataset only has {len(users)} users, {args.users} needed")
+
+        starting_xp = args.cost * args.xp_per_user
+        db.execute(
+            update(UserGamification)
+            .where(UserGamification.user_id.in_(users))
+            .values(current_xp=starting_xp)
+        )
+        db.commit()
+
+        reward_id = RewardService(db).create_reward(
+            RewardCreate(
+                name="Flash sale",
+                description="benchmark reward",
+                cost_xp=args.cost,
+                stock=args.stock,
+            )
+        ).id
+
+    rng = random.Random(args.seed)
+    attempts = [rng.choice(users) for _ in range(args.attempts)]
+    outcomes = Counter()
+    lock = threading.Lock()
+
+    def op(i: int) -> None:
+        with session_factory() as db:
+            try:
+                RewardService(db).redeem(attempts[i], reward_id)
+                outcome = "redeemed"
+            except HTTPException as e:
+                outcome = e.detail
+        with lock:
+            outcomes[outcome] += 1
+
+    result = run_concurrent("flash_redemption", op, args.attempts, args.concurrency)
+
+    with session_factory() as db:
+        stock = db.scalar(select(Rewards.stock).where(Rewards.id == reward_id))
+        per_user = dict(
+            db.execute(
+                select(RewardRedemption.user_id, func.count())
+                .where(RewardRedemption.reward_id == reward_id)
+                .group_by(RewardRedemption.user_id)
+            ).all()
+        )
+        balances = dict(
+            db.execute(
+                select(UserGamification.user_id, UserGamification.current_xp).where(
+                    UserGamification.user_id.in_(users)
+                )
+            ).all()
+        )
+
+    redemptions = sum(per_user.values())
+    problems = []
+    if stock < 0 or redemptions != args.stock - stock:
+        problems.append(f"stock {stock} does not match {redemptions} redemptions")
+    if redemptions != outcomes["redeemed"]:
+        problems.append(f"{outcomes['redeemed']} successes but {redemptions} rows")
+    for user_id, xp in balances.items():
+        if xp < 0 or xp != starting_xp - args.cost * per_user.get(user_id, 0):
+            problems.append(f"user {user_id} has {xp} XP after {per_user.get(user_id, 0)} redemptions")
+
+    s = result.summary()
+    print(
+        f"{s['name']}: {s['iterations']} attempts, {s['throughput_ops']} ops/s, "
+        f"p50={s['p50_ms']}ms p99={s['p99_ms']}ms"
+    )
+    for outcome, count in sorted(outcomes.items()):
+        print(f"    {outcome:<24} {count}")
+    print(f"    stock left               {stock}")
+
+    if args.out:
+        save_results(args.out, [result], meta={**vars(args), "outcomes": dict(outcomes)})
+
+    for problem in problems[:20]:
+        print(f"INVARIANT VIOLATED: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+import json
+import math
+import platform
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    iterations: int
+    total_seconds: float
+    # Latencies of the calls that succeeded; failed calls only count in ``errors``.
+    samples_ms: List[float] = field(default_factory=list, repr=False)
+    errors: int = 0
+
+    @staticmethod
+    def _percentile(sorted_samples: List[float], pct: float) -> float:
+        if not sorted_samples:
+            return 0.0
+        rank = max(0, math.ceil(pct / 100 * len(sorted_samples)) - 1)
+        return sorted_samples[rank]
+
+    def summary(self) -> dict:
+        ordered = sorted(self.samples_ms)
+        return {
+            "name": self.name,
+            "iterations": self.iterations,
+            "errors": self.errors,
+            "throughput_ops": round(self.iterations / self.total_seconds, 2)
+            if self.total_seconds
+            else 0.0,
+            "mean_ms": round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+            "p50_ms": round(self._percentile(ordered, 50), 3),
+            "p90_ms": round(self._percentile(ordered, 90), 3),
+            "p99_ms": round(self._percentile(ordered, 99), 3),
+            "max_ms": round(ordered[-1], 3) if ordered else 0.0,
+        }
+
+
+def run_benchmark(
+    name: str,
+    operation: Callable[[int], None],
+    iterations: int,
+    warmup: int = 0,
+) -> BenchmarkResult:
+    """Time ``operation(i)`` for ``iterations`` calls after ``warmup`` calls.
+    Calls that raise are counted in ``errors`` and left out of the latencies."""
+    for i in range(warmup):
+        operation(i)
+
+    result = BenchmarkResult(name=name, iterations=iterations, total_seconds=0.0)
+    started = time.perf_counter()
+    for i in range(warmup, warmup + iterations):
+        op_started = time.perf_counter()
+        try:
+            operation(i)
+        except Exception:
+            result.errors += 1
+            continue
+        result.samples_ms.append((time.perf_counter() - op_started) * 1000)
+    result.total_seconds = time.perf_counter() - started
+
+    return result
+
+
+def run_concurrent(
+    name: str,
+    operation: Callable[[int], None],
+    iterations: int,
+    concurrency: int,
+) -> BenchmarkResult:
+    """Time ``iterations`` calls of ``operation(i)`` spread over ``concurrency``
+    threads that are released at the same moment."""
+    barrier = threading.Barrier(concurrency)
+    lock = threading.Lock()
+    result = BenchmarkResult(name=name, iterations=iterations, total_seconds=0.0)
+
+    def worker(indexes: range) -> None:
+        barrier.wait()
+        for i in indexes:
+            op_started = time.perf_counter()
+            failed = False
+            try:
+                operation(i)
+            except Exception:
+                failed = True
+            elapsed = (time.perf_counter() - op_started) * 1000
+            with lock:
+                if failed:
+                    result.errors += 1
+                else:
+                    result.samples_ms.append(elapsed)
+
+    threads = [
+        threading.Thread(target=worker, args=(range(t, iterations, concurrency),))
+        for t in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result.total_seconds = time.perf_counter() - started
+
+    return result
+
+
+def save_results(path: str, results: List[BenchmarkResult], meta: Optional[dict] = None) -> dict:
+    payload = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "meta": meta or {},
+        "results": {r.name: r.summary() for r in results},
+    }
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+    return payload
+
+
+def compare_results(
+    baseline: dict, current: dict, metric: str = "p90_ms", threshold: float = 0.10
+) -> Dict[str, dict]:
+    """Return the scenarios whose ``metric`` grew by more than ``threshold``."""
+    regressions = {}
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if not before or not before.get(metric):
+            continue
+        change = (result[metric] - before[metric]) / before[metric]
+        if change > threshold:
+            regressions[name] = {
+                "metric": metric,
+                "baseline": before[metric],
+                "current": result[metric],
+                "change": round(change, 4),
+            }
+    return regressions
+
+
+def load_results(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
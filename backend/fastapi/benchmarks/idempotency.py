@@ -0,0 +1,110 @@
+"""Simultaneous duplicate submissions against the idempotency stores.
+
+    python -m benchmarks.idempotency --keys 200 --duplicates 8
+    BENCHMARK_DATABASE_URL=... python -m benchmarks.idempotency --db
+
+Every key is submitted ``--duplicates`` times from concurrent threads. The
+run fails unless each key's write executed exactly once and every duplicate
+was either replayed with the first response or told to retry (409).
+"""
+
+import argparse
+import os
+import sys
+import threading
+import uuid
+from collections import Counter
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlalchemy import create_engine
+
+from app.core.idempotency import (
+    DatabaseIdempotencyStore,
+    IdempotentRequest,
+    InMemoryIdempotencyStore,
+)
+from benchmarks.harness import run_concurrent, save_results
+
+
+class _Created(BaseModel):
+    key: str
+    execution: int
+
+
+def check_store(name: str, store, keys: int, duplicates: int, concurrency: int):
+    user_id = str(uuid.uuid4())
+    prefix = uuid.uuid4().hex
+    lock = threading.Lock()
+    executions = Counter()
+    outcomes = Counter()
+    bodies = {}
+
+    def op(i: int) -> None:
+        key = f"{prefix}-{i // duplicates}"
+
+        def write(db) -> _Created:
+            with lock:
+                executions[key] += 1
+                return _Created(key=key, execution=executions[key])
+
+        request = IdempotentRequest(store, None, user_id, key, "same-request")
+        try:
+            response = request.execute(write)
+        except HTTPException as e:
+            with lock:
+                outcomes[e.status_code] += 1
+            return
+        with lock:
+            outcomes[response.status_code] += 1
+            bodies.setdefault(key, set()).add(response.body)
+
+    result = run_concurrent(name, op, keys * duplicates, concurrency)
+
+    problems = [f"{key} executed {n} times" for key, n in executions.items() if n != 1]
+    problems += [f"{key} returned different bodies" for key, b in bodies.items() if len(b) > 1]
+    problems += [f"unexpected status {code}" for code in outcomes if code not in (200, 409)]
+
+    s = result.summary()
+    print(
+        f"{name:<10} {s['iterations']} submissions, {s['throughput_ops']} ops/s, "
+        f"p50={s['p50_ms']}ms p99={s['p99_ms']}ms, statuses={dict(outcomes)}"
+    )
+    return result, problems
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.idempotency")
+    parser.add_argument("--keys", type=int, default=200)
+    parser.add_argument("--duplicates", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--db", action="store_true")
+    parser.add_argument("--out")
+    args = parser.parse_args(argv)
+
+    stores = [("memory", InMemoryIdempotencyStore())]
+    if args.db:
+        url = os.environ.get("BENCHMARK_DATABASE_URL")
+        if not url:
+            raise SystemExit("BENCHMARK_DATABASE_URL is not set")
+        engine = create_engine(url, pool_size=args.concurrency, max_overflow=0)
+        stores.append(("database", DatabaseIdempotencyStore(engine)))
+
+    results, problems = [], []
+    for name, store in stores:
+        result, store_problems = check_store(
+            name, store, args.keys, args.duplicates, args.concurrency
+        )
+        results.append(result)
+        problems += [f"{name}: {p}" for p in store_problems]
+
+    if args.out:
+        save_results(args.out, results, meta=vars(args))
+
+    for problem in problems[:20]:
+        print(f"INVARIANT VIOLATED: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
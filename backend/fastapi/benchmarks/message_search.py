@@ -0,0 +1,228 @@
+"""Chat message search: the tsvector/GIN path against a scoped ILIKE scan.
+
+    python -m benchmarks.run generate --rows 10000000 --reset
+    BENCHMARK_DATABASE_URL=... python -m benchmarks.message_search --iterations 200
+
+At 10M rows the dataset holds about 3.8M messages. Each scenario searches as
+a sample of users, either the ones with the most jobs or random ones, for a
+common word, a rare word or a phrase, and times the first page and a page
+three cursors deep.
+
+Dataset users only have a handful of jobs each, so the ``heavy`` scenarios add
+one fixer with ``--heavy-jobs`` jobs of ``--heavy-messages`` messages each for
+the run; that is where the job index alone stops being enough. Those rows are
+deleted afterwards. ``--baseline`` also times the same scoped query with
+``content ILIKE '%word%'`` for comparison. ``--explain`` prints the plan of
+one search per scenario.
+"""
+
+import argparse
+import os
+import random
+import sys
+
+from datetime import datetime, timezone
+
+from sqlalchemy import bindparam, create_engine, delete, func, insert, or_, select, text, union_all
+
+from app.schemas.schema import Item, Job, JobStatus, Message, MessageStatus
+from benchmarks.datagen import CHAT_WORDS, PART_NUMBER_SHARE, PART_NUMBERS
+from app.services.user.message_service import MessageService
+from benchmarks.harness import run_benchmark, save_results
+from benchmarks.scenarios import make_session_factory
+
+TERMS = {
+    "common": ("screen", "screen"),
+    "rare": ("sku4242", "sku4242"),
+    "phrase": ('"battery cable"', "battery cable"),
+}
+
+
+def _users(db, how: str, n: int, seed: int):
+    participants = union_all(
+        select(Job.client_id.label("user_id")), select(Job.fixer_id.label("user_id"))
+    ).subquery()
+    if how == "busiest":
+        return db.scalars(
+            select(participants.c.user_id)
+            .group_by(participants.c.user_id)
+            .order_by(func.count().desc())
+            .limit(n)
+        ).all()
+    users = db.scalars(select(participants.c.user_id).distinct()).all()
+    return random.Random(seed).sample(users, min(n, len(users)))
+
+
+def _add_heavy_user(db, fixer_id, jobs: int, messages_per_job: int):
+    """Give ``fixer_id`` ``jobs`` new jobs on items nobody works on yet, each
+    with ``messages_per_job`` messages spread over the last year."""
+    items = db.execute(
+        select(Item.id, Item.owner_id)
+        .where(~Item.id.in_(select(Job.item_id)))
+        .order_by(Item.id)
+        .limit(jobs)
+    ).all()
+    job_ids = db.scalars(
+        insert(Job).returning(Job.id),
+        [
+            {
+                "item_id": item_id,
+                "client_id": owner_id,
+                "fixer_id": fixer_id,
+                "agreed_price": 50.0,
+                "status": JobStatus.ACTIVE,
+                "started_at": datetime.now(timezone.utc),
+            }
+            for item_id, owner_id in items
+        ],
+    ).all()
+    # Words are drawn with a skew towards the start of CHAT_WORDS, like datagen.
+    db.execute(
+        text(
+            """
+            INSERT INTO messages (job_id, sender_id, message_type, message_status, content, created_at)
+            SELECT j.id, :fixer, 'TEXT', :status,
+                   (SELECT string_agg(pick.word, ' ')
+                      FROM generate_series(1, 4 + g % 13) AS w(n),
+                           LATERAL (SELECT v.words[1 + floor(power(random(), 3) * cardinality(v.words))::int + 0 * w.n] AS word) AS pick)
+                   || CASE WHEN random() < :part_share
+                           THEN ' sku' || floor(random() * :parts)::int ELSE '' END,
+                   now() - random() * interval '365 days'
+              FROM CAST(:words AS text[]) AS v(words),
+                   unnest(CAST(:job_ids AS integer[])) AS j(id),
+                   generate_series(1, :per_job) AS g
+            """
+        ).bindparams(bindparam("status", type_=Message.message_status.type)),
+        {
+            "fixer": fixer_id,
+            "status": MessageStatus.DELIVERED,
+            "words": list(CHAT_WORDS),
+            "job_ids": job_ids,
+            "per_job": messages_per_job,
+            "part_share": PART_NUMBER_SHARE,
+            "parts": PART_NUMBERS,
+        },
+    )
+    db.commit()
+    return job_ids
+
+
+def _ilike_page(db, user_id, word: str, limit: int):
+    user_jobs = select(Job.id).where(or_(Job.client_id == user_id, Job.fixer_id == user_id))
+    return db.execute(
+        select(Message.id, Message.created_at)
+        .where(Message.job_id.in_(user_jobs), Message.content.ilike(f"%{word}%"))
+        .order_by(Message.created_at.desc(), Message.id.desc())
+        .limit(limit + 1)
+    ).all()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.message_search")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--heavy-jobs", type=int, default=2000)
+    parser.add_argument("--heavy-messages", type=int, default=50)
+    parser.add_argument("--baseline", action="store_true")
+    parser.add_argument("--explain", action="store_true")
+    parser.add_argument("--out")
+    args = parser.parse_args(argv)
+
+    url = os.environ.get("BENCHMARK_DATABASE_URL")
+    if not url:
+        raise SystemExit("BENCHMARK_DATABASE_URL is not set")
+    engine = create_engine(url)
+    session_factory = make_session_factory(engine)
+
+    with session_factory() as db:
+        messages = db.scalar(select(func.count()).select_from(Message))
+        samples = {how: _users(db, how, args.users, args.seed) for how in ("busiest", "random")}
+    if not messages:
+        raise SystemExit("no messages; load the benchmark dataset first")
+    print(f"{messages} messages")
+
+    heavy_jobs = []
+    if args.heavy_jobs:
+        with session_factory() as db:
+            heavy_jobs = _add_heavy_user(
+                db, samples["busiest"][0], args.heavy_jobs, args.heavy_messages
+            )
+            db.execute(text("ANALYZE jobs, messages"))
+            db.commit()
+        samples["heavy"] = samples["busiest"][:1]
+
+    try:
+        results = _run(args, session_factory, samples)
+    finally:
+        if heavy_jobs:
+            with session_factory() as db:
+                db.execute(delete(Message).where(Message.job_id.in_(heavy_jobs)))
+                db.execute(delete(Job).where(Job.id.in_(heavy_jobs)))
+                db.commit()
+
+    if args.out:
+        save_results(args.out, results, meta=vars(args))
+    return 0
+
+
+def _run(args, session_factory, samples):
+    results = []
+    for how, users in samples.items():
+        for term, (q, word) in TERMS.items():
+            name = f"{how}_{term}"
+
+            def first_page(i, users=users, q=q):
+                with session_factory() as db:
+                    MessageService(db).search_messages(users[i % len(users)], q, args.limit)
+
+            def deep_page(i, users=users, q=q):
+                with session_factory() as db:
+                    service = MessageService(db)
+                    cursor = None
+                    for _ in range(3):
+                        page = service.search_messages(
+                            users[i % len(users)], q, args.limit, cursor
+                        )
+                        cursor = page.next_cursor
+                        if cursor is None:
+                            break
+
+            runs = [(f"{name}_page1", first_page), (f"{name}_page1to3", deep_page)]
+            if args.baseline:
+
+                def ilike(i, users=users, word=word):
+                    with session_factory() as db:
+                        _ilike_page(db, users[i % len(users)], word, args.limit)
+
+                runs.append((f"{name}_ilike_page1", ilike))
+
+            for run_name, operation in runs:
+                result = run_benchmark(run_name, operation, args.iterations, args.warmup)
+                results.append(result)
+                s = result.summary()
+                print(
+                    f"{run_name:<32} p50={s['p50_ms']:>9}ms p99={s['p99_ms']:>9}ms "
+                    f"errors={s['errors']}"
+                )
+
+            if args.explain:
+                with session_factory() as db:
+                    plan = db.execute(
+                        text(
+                            "EXPLAIN (ANALYZE, BUFFERS, COSTS OFF) "
+                            "SELECT id FROM messages WHERE job_id IN "
+                            "(SELECT id FROM jobs WHERE client_id = :u OR fixer_id = :u) "
+                            "AND search_vector @@ websearch_to_tsquery('english', :q) "
+                            "ORDER BY created_at DESC, id DESC LIMIT :n"
+                        ),
+                        {"u": users[0], "q": q, "n": args.limit + 1},
+                    ).scalars()
+                    print("\n".join(f"    {line}" for line in plan))
+    return results
+
+
+if __name__ == "__main__":
+    sys.exit(main())
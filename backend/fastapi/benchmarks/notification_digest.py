@@ -0,0 +1,152 @@
+"""Pushes saved by the notification digests, and what queueing costs a write.
+
+    BENCHMARK_DATABASE_URL=... python -m benchmarks.notification_digest \\
+        --events 50000 --recipients 2000 --rate 250 --window 60
+
+Uses users and jobs from the loaded benchmark dataset (``benchmarks.run
+generate``).
+
+- ``enqueue``: ``NotificationService.new_message`` plus a commit, the cost a
+  message send now pays to queue its notification.
+- ``digest``: ``--events`` offer and message events for ``--recipients``
+  recipients (skewed, so some get far more than others), arriving at
+  ``--rate`` events per simulated second. Each simulated second the events
+  are inserted into ``notification_queue`` and a ``Notifier`` with a
+  ``FakeNotificationSender`` runs one round. Reports digests sent against
+  one push per event, and the notifier's wall time per event.
+
+Queue rows left by the run are deleted.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, delete, func, insert, select
+
+from app.core.notification_sender import FakeNotificationSender
+from app.schemas.schema import Job, NotificationKind, QueuedNotification
+from app.services.user.notification_service import NotificationService
+from app.workers.notifier import Notifier
+from benchmarks.harness import BenchmarkResult, run_benchmark, save_results
+from benchmarks.scenarios import make_session_factory
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.notification_digest")
+    parser.add_argument("--events", type=int, default=50_000)
+    parser.add_argument("--recipients", type=int, default=2000)
+    parser.add_argument("--subjects", type=int, default=3, help="items/jobs per recipient")
+    parser.add_argument("--rate", type=float, default=250, help="events per simulated second")
+    parser.add_argument("--window", type=float, default=60)
+    parser.add_argument("--max-events", type=int, default=20)
+    parser.add_argument("--enqueue", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out")
+    args = parser.parse_args(argv)
+
+    url = os.environ.get("BENCHMARK_DATABASE_URL")
+    if not url:
+        raise SystemExit("BENCHMARK_DATABASE_URL is not set")
+    engine = create_engine(url)
+    session_factory = make_session_factory(engine)
+    rng = random.Random(args.seed)
+
+    with session_factory() as db:
+        jobs = db.execute(
+            select(Job.id, Job.client_id, Job.fixer_id).order_by(Job.id).limit(args.recipients)
+        ).all()
+        first_id = (db.scalar(select(func.max(QueuedNotification.id))) or 0) + 1
+    if len(jobs) < args.recipients:
+        raise SystemExit(f"dataset only has {len(jobs)} jobs, {args.recipients} needed")
+
+    results = []
+    try:
+        with session_factory() as db:
+            service = NotificationService(db)
+
+            def enqueue(i: int) -> None:
+                job = jobs[i % len(jobs)]
+                service.new_message(job.id, job.fixer_id)
+                db.commit()
+
+            result = run_benchmark("enqueue", enqueue, args.enqueue, warmup=50)
+            results.append(result)
+            s = result.summary()
+            print(f"enqueue        p50={s['p50_ms']:>7}ms p99={s['p99_ms']:>7}ms")
+            db.execute(delete(QueuedNotification).where(QueuedNotification.id >= first_id))
+            db.commit()
+
+        # Recipient popularity falls off steeply, like offers on items.
+        recipients = [job.client_id for job in jobs]
+        weights = [1 / (rank + 1) for rank in range(len(recipients))]
+        kinds = list(NotificationKind)
+        events = [
+            (rng.choices(recipients, weights)[0], rng.choice(kinds), rng.randrange(args.subjects))
+            for _ in range(args.events)
+        ]
+
+        sender = FakeNotificationSender()
+        notifier = Notifier(
+            engine, sender, window_seconds=args.window, max_events=args.max_events
+        )
+        start = datetime(2026, 1, 1)
+        per_second = max(int(args.rate), 1)
+        digest = BenchmarkResult(name="digest", iterations=args.events, total_seconds=0.0)
+        second = 0
+        while second * per_second < args.events or len(notifier.buffer):
+            now = start + timedelta(seconds=second)
+            batch = events[second * per_second : (second + 1) * per_second]
+            started = time.perf_counter()
+            if batch:
+                with engine.begin() as conn:
+                    conn.execute(
+                        insert(QueuedNotification),
+                        [
+                            {
+                                "recipient_id": recipient,
+                                "kind": kind,
+                                "subject_id": subject,
+                                "created_at": now,
+                            }
+                            for recipient, kind, subject in batch
+                        ],
+                    )
+            inserted = time.perf_counter()
+            notifier.run_once(now)
+            digest.samples_ms.append((time.perf_counter() - inserted) * 1000)
+            digest.total_seconds += time.perf_counter() - started
+            second += 1
+        results.append(digest)
+
+        pushes = sum(d.event_count for d in sender.sent)
+        entries = sum(len(d.entries) for d in sender.sent)
+        s = digest.summary()
+        print(
+            f"digest         events={args.events} pushed_events={pushes} "
+            f"digests={len(sender.sent)} "
+            f"({args.events / max(len(sender.sent), 1):.1f} events per push, "
+            f"{entries / max(len(sender.sent), 1):.1f} lines each) sender_calls={sender.calls}"
+        )
+        print(
+            f"notifier       {s['p50_ms']:>7}ms p50 per round, "
+            f"{digest.total_seconds / args.events * 1e6:.1f}us per event incl. queue insert, "
+            f"{second} simulated seconds"
+        )
+        if pushes != args.events:
+            print(f"INVARIANT VIOLATED: {args.events} events queued, {pushes} delivered")
+            return 1
+    finally:
+        with engine.begin() as conn:
+            conn.execute(delete(QueuedNotification).where(QueuedNotification.id >= first_id))
+
+    if args.out:
+        save_results(args.out, results, meta=vars(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
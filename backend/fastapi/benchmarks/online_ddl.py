@@ -0,0 +1,166 @@
+"""Write stalls while migrating a large table, plain DDL against app.alembic.online_ddl.
+
+    BENCHMARK_DATABASE_URL=... python -m benchmarks.online_ddl --writers 4
+
+Uses ``offers`` from the loaded benchmark dataset (``benchmarks.run
+generate``). While ``--writers`` threads keep updating random offers, each
+schema change runs once as plain DDL in a transaction and once through the
+online helpers:
+
+- ``index``: ``CREATE INDEX`` against ``create_index_concurrently``.
+- ``backfill``: one ``UPDATE`` of a new column against ``backfill``.
+- ``constraint``: a validated ``ADD CONSTRAINT ... CHECK`` against ``NOT
+  VALID`` plus ``validate_constraint``.
+
+For each run it prints how long the change took and the write latencies
+while it ran; the slowest write is how long the table was blocked. Everything
+a run adds is dropped afterwards.
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import threading
+import time
+
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, func, select, text
+
+from app.alembic import online_ddl
+from app.schemas.schema import Offer
+from benchmarks.harness import BenchmarkResult, save_results
+
+INDEX = "ix_bench_offers_fixer_created"
+COLUMN = "bench_fill"
+CHECK = "ck_bench_offers_price_bid"
+
+PLAIN = {
+    "index": [f"CREATE INDEX {INDEX} ON offers (fixer_id, created_at)"],
+    "backfill": [f"UPDATE offers SET {COLUMN} = price_bid * 100 WHERE {COLUMN} IS NULL"],
+    "constraint": [f"ALTER TABLE offers ADD CONSTRAINT {CHECK} CHECK (price_bid >= 0)"],
+}
+
+
+def _online(change: str) -> None:
+    if change == "index":
+        online_ddl.create_index_concurrently(INDEX, "offers", ["fixer_id", "created_at"])
+    elif change == "backfill":
+        online_ddl.backfill("offers", f"{COLUMN} = price_bid * 100", where=f"{COLUMN} IS NULL")
+    else:
+        online_ddl.add_check_constraint(CHECK, "offers", "price_bid >= 0")
+        online_ddl.validate_constraint(CHECK, "offers")
+
+
+def _run_change(engine, change: str, online: bool) -> None:
+    with engine.connect() as conn:
+        if not online:
+            with conn.begin():
+                for statement in PLAIN[change]:
+                    conn.execute(text(statement))
+            return
+        ctx = MigrationContext.configure(conn)
+        with Operations.context(ctx), ctx.begin_transaction():
+            _online(change)
+
+
+def _setup(engine, change: str) -> None:
+    if change == "backfill":
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE offers ADD COLUMN {COLUMN} integer"))
+
+
+def _cleanup(engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP INDEX IF EXISTS {INDEX}"))
+        conn.execute(text(f"ALTER TABLE offers DROP CONSTRAINT IF EXISTS {CHECK}"))
+        conn.execute(text(f"ALTER TABLE offers DROP COLUMN IF EXISTS {COLUMN}"))
+
+
+def _measure(engine, change: str, online: bool, offer_ids, writers: int) -> BenchmarkResult:
+    name = f"{change}_{'online' if online else 'plain'}"
+    result = BenchmarkResult(name=name, iterations=0, total_seconds=0.0)
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def write(seed: int) -> None:
+        rng = random.Random(seed)
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    conn.execute(
+                        text("UPDATE offers SET price_bid = price_bid WHERE id = :id"),
+                        {"id": rng.choice(offer_ids)},
+                    )
+                    failed = False
+                except Exception:
+                    failed = True
+                with lock:
+                    if not failed:
+                        result.samples_ms.append((time.perf_counter() - started) * 1000)
+                    result.iterations += 1
+                    result.errors += failed
+
+    _setup(engine, change)
+    threads = [threading.Thread(target=write, args=(seed,)) for seed in range(writers)]
+    for thread in threads:
+        thread.start()
+    try:
+        time.sleep(0.5)
+        with lock:
+            result.samples_ms.clear()
+            result.iterations = result.errors = 0
+        started = time.perf_counter()
+        _run_change(engine, change, online)
+        result.total_seconds = time.perf_counter() - started
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        _cleanup(engine)
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.online_ddl")
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--changes", default="index,backfill,constraint")
+    parser.add_argument("--out")
+    args = parser.parse_args(argv)
+
+    url = os.environ.get("BENCHMARK_DATABASE_URL")
+    if not url:
+        raise SystemExit("BENCHMARK_DATABASE_URL is not set")
+    engine = create_engine(url, pool_size=args.writers + 2, max_overflow=0)
+    logging.basicConfig(level=logging.WARNING)
+
+    with engine.connect() as conn:
+        offers = conn.scalar(select(func.count()).select_from(Offer))
+        offer_ids = conn.scalars(select(Offer.id).order_by(func.random()).limit(10_000)).all()
+    if not offers:
+        raise SystemExit("no offers; load the benchmark dataset first")
+    print(f"{offers} offers, {args.writers} writers")
+    _cleanup(engine)
+
+    results = []
+    for change in args.changes.split(","):
+        for online in (False, True):
+            result = _measure(engine, change, online, offer_ids, args.writers)
+            results.append(result)
+            s = result.summary()
+            print(
+                f"{result.name:<20} took {result.total_seconds:>7.2f}s  "
+                f"writes={s['iterations']:<7} p50={s['p50_ms']:>8}ms p99={s['p99_ms']:>9}ms "
+                f"max={s['max_ms']:>9}ms errors={s['errors']}"
+            )
+
+    if args.out:
+        save_results(args.out, results, meta=vars(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Per-request overhead and memory of the in-process rate limiter.
+
+    python -m benchmarks.rate_limit --users 10000 --requests 200000
+
+Times ``InProcessRateLimiter.acquire`` from one thread and from several,
+and reports the memory held per active bucket. ``--redis`` also times the
+shared Redis limiter against ``REDIS_URL``.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tracemalloc
+
+from app.core.rate_limit import InProcessRateLimiter, Limit, RedisRateLimiter
+from benchmarks.harness import run_benchmark, run_concurrent, save_results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.rate_limit")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--limit", default="30/60")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--redis", action="store_true")
+    parser.add_argument("--out")
+    args = parser.parse_args(argv)
+
+    limit = Limit.parse(args.limit)
+    rng = random.Random(args.seed)
+    users = [f"user-{rng.getrandbits(64):x}" for _ in range(args.users)]
+    picks = [rng.choice(users) for _ in range(args.requests)]
+
+    results = []
+    limiter = InProcessRateLimiter()
+    results.append(
+        run_benchmark(
+            "in_process_acquire",
+            lambda i: limiter.acquire(picks[i % len(picks)], "send_message", limit),
+            args.requests,
+        )
+    )
+
+    shared = InProcessRateLimiter()
+    results.append(
+        run_concurrent(
+            "in_process_acquire_concurrent",
+            lambda i: shared.acquire(picks[i], "send_message", limit),
+            args.requests,
+            args.concurrency,
+        )
+    )
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    measured = InProcessRateLimiter()
+    for user in users:
+        measured.acquire(user, "send_message", limit)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    held = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    per_bucket = held / max(len(measured), 1)
+
+    if args.redis:
+        import redis
+
+        client = redis.Redis.from_url(os.environ.get("REDIS_URL", "redis://localhost:6379/0"))
+        redis_limiter = RedisRateLimiter(client, prefix="ratelimit-bench")
+        results.append(
+            run_benchmark(
+                "redis_acquire",
+                lambda i: redis_limiter.acquire(picks[i % len(picks)], "send_message", limit),
+                min(args.requests, 20_000),
+            )
+        )
+
+    for result in results:
+        s = result.summary()
+        print(
+            f"{s['name']:<32} {s['throughput_ops']:>12} ops/s "
+            f"p50={s['p50_ms'] * 1000:.1f}us p99={s['p99_ms'] * 1000:.1f}us"
+        )
+    print(f"{'memory per active bucket':<32} {per_bucket:>12.0f} bytes ({len(measured)} buckets)")
+
+    if args.out:
+        save_results(args.out, results, meta={**vars(args), "bytes_per_bucket": per_bucket})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
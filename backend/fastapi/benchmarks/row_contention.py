@@ -0,0 +1,215 @@
+"""Optimistic version checks against row locks for concurrent XP awards.
+
+    BENCHMARK_DATABASE_URL=... python -m benchmarks.row_contention \\
+        --awards 2000 --concurrency 16 --hot-rows 1,16,256
+
+Uses users from the loaded benchmark dataset (``benchmarks.run generate``).
+``--awards`` XP awards are spread over ``--hot-rows`` users and fired from
+``--concurrency`` threads, once per strategy:
+
+- ``optimistic``: a plain read and a version-checked write, retried by
+  ``retry_on_conflict`` as in ``GamificationService.add_xp``.
+- ``locking``: the same read-modify-write, reading with ``SELECT ... FOR
+  UPDATE`` so concurrent awards queue on the row lock.
+- ``unguarded`` (with ``--unguarded``): the read-modify-write with neither,
+  which shows how many awards are lost without concurrency control.
+
+The strategies share everything but the concurrency control (the service's
+refresh and leaderboard update are left out), so the numbers compare only
+that. ``--think-ms`` adds a pause between the read and the write, standing in
+for work done in between; a row lock is held through it, a version check is
+not.
+
+After each run the users' total XP is checked against the awards that
+succeeded; a guarded strategy that lost an update fails the run. Awards that
+gave up after ``OCC_MAX_ATTEMPTS`` conflicts count as rejected, not lost.
+Starting XP is restored afterwards.
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from fastapi import HTTPException
+from sqlalchemy import bindparam, create_engine, select, update
+
+from app.core.concurrency import OCC_MAX_ATTEMPTS, retry_on_conflict
+from app.core.metrics import metrics
+from app.schemas.schema import UserGamification
+from app.services.user.gamification_service import XP_PER_LEVEL_BASE
+from benchmarks.harness import run_concurrent, save_results
+from benchmarks.scenarios import make_session_factory
+
+CONFLICTS = ("kintsugi_version_conflicts_total", {"method": "_Awards.optimistic"})
+
+
+def _total_xp(level: int, xp: int) -> int:
+    return XP_PER_LEVEL_BASE * level * (level - 1) // 2 + xp
+
+
+def _level_up(progress, amount: int) -> None:
+    progress.current_xp += amount
+    while progress.current_xp >= progress.current_level * XP_PER_LEVEL_BASE:
+        progress.current_xp -= progress.current_level * XP_PER_LEVEL_BASE
+        progress.current_level += 1
+
+
+class _Awards:
+    def __init__(self, db, think_seconds: float):
+        self.db = db
+        self.think_seconds = think_seconds
+
+    def _award(self, user_id, amount: int, lock: bool) -> None:
+        query = select(UserGamification).where(UserGamification.user_id == user_id)
+        if lock:
+            query = query.with_for_update()
+        progress = self.db.scalar(query)
+        time.sleep(self.think_seconds)
+        _level_up(progress, amount)
+        self.db.commit()
+
+    @retry_on_conflict
+    def optimistic(self, user_id, amount: int) -> None:
+        self._award(user_id, amount, lock=False)
+
+    def locking(self, user_id, amount: int) -> None:
+        self._award(user_id, amount, lock=True)
+
+    def unguarded(self, user_id, amount: int) -> None:
+        # Core statements skip the ORM's version check; the write lands
+        # whatever happened since the read.
+        row = self.db.execute(
+            select(UserGamification.current_level, UserGamification.current_xp).where(
+                UserGamification.user_id == user_id
+            )
+        ).one()
+        time.sleep(self.think_seconds)
+        progress = argparse.Namespace(
+            current_level=row.current_level, current_xp=row.current_xp
+        )
+        _level_up(progress, amount)
+        self.db.execute(
+            update(UserGamification)
+            .where(UserGamification.user_id == user_id)
+            .values(current_level=progress.current_level, current_xp=progress.current_xp)
+        )
+        self.db.commit()
+
+
+def _totals(session_factory, users) -> dict:
+    with session_factory() as db:
+        rows = db.execute(
+            select(
+                UserGamification.user_id,
+                UserGamification.current_level,
+                UserGamification.current_xp,
+            ).where(UserGamification.user_id.in_(users))
+        ).all()
+    return {r.user_id: _total_xp(r.current_level, r.current_xp) for r in rows}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.row_contention")
+    parser.add_argument("--awards", type=int, default=2000)
+    parser.add_argument("--amount", type=int, default=7)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--hot-rows", default="1,16,256")
+    parser.add_argument("--think-ms", type=float, default=0)
+    parser.add_argument("--unguarded", action="store_true")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out")
+    args = parser.parse_args(argv)
+
+    url = os.environ.get("BENCHMARK_DATABASE_URL")
+    if not url:
+        raise SystemExit("BENCHMARK_DATABASE_URL is not set")
+    engine = create_engine(url, pool_size=args.concurrency, max_overflow=0)
+    session_factory = make_session_factory(engine)
+
+    strategies = ["optimistic", "locking"] + (["unguarded"] if args.unguarded else [])
+    hot_rows = [int(n) for n in args.hot_rows.split(",")]
+
+    with session_factory() as db:
+        pool = db.scalars(
+            select(UserGamification.user_id)
+            .order_by(UserGamification.user_id)
+            .limit(max(hot_rows))
+        ).all()
+        if len(pool) < max(hot_rows):
+            raise SystemExit(f"dataset only has {len(pool)} users, {max(hot_rows)} needed")
+        saved = db.execute(
+            select(
+                UserGamification.user_id,
+                UserGamification.current_level,
+                UserGamification.current_xp,
+            ).where(UserGamification.user_id.in_(pool))
+        ).all()
+
+    print(f"OCC_MAX_ATTEMPTS={OCC_MAX_ATTEMPTS}")
+    results, problems = [], []
+    try:
+        for n in hot_rows:
+            users = pool[:n]
+            rng = random.Random(args.seed)
+            targets = [rng.choice(users) for _ in range(args.awards)]
+
+            for strategy in strategies:
+                before = _totals(session_factory, users)
+                conflicts_before = metrics.get(CONFLICTS[0], **CONFLICTS[1])
+                outcomes = Counter()
+                lock = threading.Lock()
+
+                def op(i: int, strategy=strategy, outcomes=outcomes, lock=lock) -> None:
+                    with session_factory() as db:
+                        try:
+                            getattr(_Awards(db, args.think_ms / 1000), strategy)(targets[i], args.amount)
+                            outcome = "awarded"
+                        except HTTPException as e:
+                            outcome = f"rejected ({e.status_code})"
+                    with lock:
+                        outcomes[outcome] += 1
+
+                name = f"{strategy}_rows{n}"
+                result = run_concurrent(name, op, args.awards, args.concurrency)
+                results.append(result)
+
+                gained = sum(_totals(session_factory, users).values()) - sum(before.values())
+                lost = (outcomes["awarded"] * args.amount - gained) // args.amount
+                retries = metrics.get(CONFLICTS[0], **CONFLICTS[1]) - conflicts_before
+                if lost and strategy != "unguarded":
+                    problems.append(f"{name}: {lost} awards lost")
+
+                s = result.summary()
+                rejected = args.awards - outcomes["awarded"]
+                print(
+                    f"{name:<22} {s['throughput_ops']:>9} ops/s p50={s['p50_ms']:>8}ms "
+                    f"p99={s['p99_ms']:>9}ms conflicts={int(retries):<6} "
+                    f"rejected={rejected:<5} lost={lost}"
+                )
+    finally:
+        with session_factory() as db:
+            # Core executemany; ORM bulk updates by primary key would need
+            # each row's current version.
+            table = UserGamification.__table__
+            db.execute(
+                update(table)
+                .where(table.c.user_id == bindparam("uid"))
+                .values(current_level=bindparam("level"), current_xp=bindparam("xp")),
+                [{"uid": r.user_id, "level": r.current_level, "xp": r.current_xp} for r in saved],
+            )
+            db.commit()
+
+    if args.out:
+        save_results(args.out, results, meta=vars(args))
+
+    for problem in problems:
+        print(f"INVARIANT VIOLATED: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""Service-layer benchmarks.
+
+Run from ``backend/fastapi`` against a throwaway Postgres database:
+
+    export BENCHMARK_DATABASE_URL=postgresql://localhost/kintsugi_bench
+    python -m benchmarks.run generate --rows 100000 --seed 42 --reset
+    python -m benchmarks.run run --rows 100000 --seed 42 --out before.json
+    python -m benchmarks.run compare before.json after.json --threshold 0.1
+
+``run`` must use the same ``--rows``/``--seed`` as ``generate`` so the
+scenarios pick targets that exist in the loaded dataset.
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine
+
+from app.schemas.base import Base
+from app.schemas import schema  # noqa: F401  registers the models
+from benchmarks.datagen import DatasetGenerator, DatasetSpec, load_dataset
+from benchmarks.harness import compare_results, load_results, run_benchmark, save_results
+from benchmarks.scenarios import SCENARIOS, make_session_factory
+
+
+def _engine():
+    url = os.environ.get("BENCHMARK_DATABASE_URL")
+    if not url:
+        raise SystemExit("BENCHMARK_DATABASE_URL is not set")
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+    return create_engine(url)
+
+
+def _progress(table: str, done: int, total: int) -> None:
+    print(f"\r{table:<20} {done:>10}/{total}", end="" if done < total else "\n", flush=True)
+
+
+def generate(args) -> int:
+    engine = _engine()
+    if args.reset:
+        Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    spec = DatasetSpec(rows=args.rows, seed=args.seed)
+    load_dataset(engine, spec, chunk_size=args.chunk_size, progress=_progress)
+    return 0
+
+
+def run(args) -> int:
+    engine = _engine()
+    spec = DatasetSpec(rows=args.rows, seed=args.seed)
+    generator = DatasetGenerator(spec)
+    session_factory = make_session_factory(engine)
+
+    results = []
+    for name in args.scenario or list(SCENARIOS):
+        operation = SCENARIOS[name](session_factory, generator, args.warmup + args.iterations)
+        result = run_benchmark(name, operation, args.iterations, warmup=args.warmup)
+        summary = result.summary()
+        print(
+            f"{name:<18} p50={summary['p50_ms']:>8.2f}ms p90={summary['p90_ms']:>8.2f}ms "
+            f"p99={summary['p99_ms']:>8.2f}ms {summary['throughput_ops']:>8.1f} ops/s "
+            f"errors={summary['errors']}"
+        )
+        results.append(result)
+
+    out = args.out or os.path.join(
+        os.path.dirname(__file__),
+        "results",
+        datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ") + ".json",
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    save_results(
+        out,
+        results,
+        meta={
+            "rows": args.rows,
+            "seed": args.seed,
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "counts": spec.counts,
+        },
+    )
+    print(f"results written to {out}")
+    failed = [r.name for r in results if r.errors]
+    if failed:
+        print(f"FAILED: errors in {', '.join(failed)}")
+        return 1
+    return 0
+
+
+def compare(args) -> int:
+    regressions = compare_results(
+        load_results(args.baseline),
+        load_results(args.current),
+        metric=args.metric,
+        threshold=args.threshold,
+    )
+    for name, info in regressions.items():
+        print(
+            f"REGRESSION {name}: {info['metric']} {info['baseline']} -> "
+            f"{info['current']} ({info['change']:+.1%})"
+        )
+    if not regressions:
+        print("no regressions")
+    return 1 if regressions else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gen = sub.add_parser("generate", help="load the synthetic dataset")
+    gen.add_argument("--rows", type=int, default=10_000)
+    gen.add_argument("--seed", type=int, default=42)
+    gen.add_argument("--chunk-size", type=int, default=5000)
+    gen.add_argument("--reset", action="store_true", help="drop and recreate all tables")
+    gen.set_defaults(func=generate)
+
+    bench = sub.add_parser("run", help="run the service scenarios")
+    bench.add_argument("--rows", type=int, default=10_000)
+    bench.add_argument("--seed", type=int, default=42)
+    bench.add_argument("--iterations", type=int, default=200)
+    bench.add_argument("--warmup", type=int, default=20)
+    bench.add_argument("--scenario", action="append", choices=sorted(SCENARIOS))
+    bench.add_argument("--out")
+    bench.set_defaults(func=run)
+
+    cmp = sub.add_parser("compare", help="compare two result files")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current")
+    cmp.add_argument("--metric", default="p90_ms")
+    cmp.add_argument("--threshold", type=float, default=0.10)
+    cmp.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+import random
+from typing import Callable, Dict, List
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.schemas.schema import Job, JobStatus, Offer, OfferStatus
+from app.services.user.badge_service import BadgeService
+from app.services.user.gamification_service import GamificationService
+from app.services.user.job_service import JobService
+from app.services.user.message_service import MessageService
+from app.services.user.offer_service import OfferService
+from app.services.user.reputation_service import ReputationService
+from benchmarks.datagen import DatasetGenerator
+
+
+Operation = Callable[[int], None]
+ScenarioFactory = Callable[[sessionmaker, DatasetGenerator, int], Operation]
+
+
+def _ids(session_factory: sessionmaker, stmt, needed: int) -> List:
+    with session_factory() as db:
+        ids = list(db.scalars(stmt.limit(needed)))
+    if len(ids) < needed:
+        raise RuntimeError(
+            f"dataset only has {len(ids)} rows for this scenario, {needed} needed"
+        )
+    return ids
+
+
+def get_chat_history(session_factory, generator, needed) -> Operation:
+    rng = random.Random(f"{generator.spec.seed}:bench:chat")
+    job_ids = [rng.randrange(generator.counts["jobs"]) + 1 for _ in range(needed)]
+
+    def op(i: int) -> None:
+        # Read as the job's client; job i repairs item i.
+        client_id = generator.user_ids[generator.item_owner[job_ids[i] - 1]]
+        with session_factory() as db:
+            MessageService(db).get_chat_history(job_ids[i], client_id)
+
+    return op
+
+
+def accept_offer(session_factory, generator, needed) -> Operation:
+    # Accepting an offer rejects its siblings, so use one offer per item.
+    stmt = (
+        select(Offer.id)
+        .where(Offer.status == OfferStatus.PENDING)
+        .distinct(Offer.item_id)
+        .order_by(Offer.item_id, Offer.id)
+    )
+    offer_ids = _ids(session_factory, stmt, needed)
+
+    def op(i: int) -> None:
+        with session_factory() as db:
+            OfferService(db).accept_offer(offer_ids[i])
+
+    return op
+
+
+def complete_job(session_factory, generator, needed) -> Operation:
+    stmt = select(Job.id, Job.fixer_id).where(Job.status == JobStatus.ACTIVE).order_by(Job.id)
+    with session_factory() as db:
+        jobs = db.execute(stmt.limit(needed)).all()
+    if len(jobs) < needed:
+        raise RuntimeError(f"dataset only has {len(jobs)} active jobs, {needed} needed")
+
+    def op(i: int) -> None:
+        with session_factory() as db:
+            JobService(db).complete_job(jobs[i].id, jobs[i].fixer_id)
+
+    return op
+
+
+def add_xp(session_factory, generator, needed) -> Operation:
+    rng = random.Random(f"{generator.spec.seed}:bench:xp")
+    users = [rng.choice(generator.user_ids) for _ in range(needed)]
+
+    def op(i: int) -> None:
+        with session_factory() as db:
+            GamificationService(db).add_xp(users[i], 25)
+
+    return op
+
+
+def update_rating(session_factory, generator, needed) -> Operation:
+    rng = random.Random(f"{generator.spec.seed}:bench:rating")
+    ratings = [(rng.choice(generator.user_ids), rng.randint(1, 5)) for _ in range(needed)]
+
+    def op(i: int) -> None:
+        with session_factory() as db:
+            ReputationService(db).update_rating(*ratings[i])
+
+    return op
+
+
+def award_badge(session_factory, generator, needed) -> Operation:
+    rng = random.Random(f"{generator.spec.seed}:bench:badge")
+    users = [rng.choice(generator.user_ids) for _ in range(needed)]
+
+    def op(i: int) -> None:
+        with session_factory() as db:
+            BadgeService(db).award_badge(users[i], "Benchmark", f"bench-{i}")
+
+    return op
+
+
+SCENARIOS: Dict[str, ScenarioFactory] = {
+    "get_chat_history": get_chat_history,
+    "accept_offer": accept_offer,
+    "complete_job": complete_job,
+    "add_xp": add_xp,
+    "update_rating": update_rating,
+    "award_badge": award_badge,
+}
+
+
+def make_session_factory(engine) -> sessionmaker:
+    return sessionmaker(bind=engine, class_=Session)
@@ -0,0 +1,117 @@
+"""Chat history serialization: ORM + MessageResponse vs. the column fast path.
+
+    python -m benchmarks.serialization --messages 5000
+    BENCHMARK_DATABASE_URL=... python -m benchmarks.serialization --db
+
+Without ``--db`` both paths serialize the same in-memory rows, which isolates
+the per-row model cost. With ``--db`` the two ``MessageService`` methods run
+end to end against the chat with the most messages in the benchmark dataset.
+"""
+
+import argparse
+import os
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from app.schemas.dtos.message_dto import (
+    ChatHistoryResponse,
+    MessageResponse,
+    chat_history_serializer,
+)
+from app.schemas.schema import Job, Message, MessageStatus
+from app.services.user.message_service import MessageService
+from benchmarks.harness import run_benchmark, save_results
+
+
+def _in_memory(args):
+    rng = random.Random(args.seed)
+    senders = [uuid.UUID(int=rng.getrandbits(128), version=4) for _ in range(2)]
+    start = datetime(2025, 1, 1)
+    rows = [
+        {
+            "job_id": 1,
+            "content": f"message {i}",
+            "id": i + 1,
+            "sender_id": rng.choice(senders),
+            "message_status": MessageStatus.DELIVERED,
+            "created_at": start + timedelta(seconds=i),
+            "attachments": [],
+        }
+        for i in range(args.messages)
+    ]
+    orm_like = [SimpleNamespace(**row) for row in rows]
+
+    def model_path(_):
+        return ChatHistoryResponse(
+            job_id=1, messages=[MessageResponse.model_validate(m) for m in orm_like]
+        ).model_dump_json()
+
+    def fast_path(_):
+        return chat_history_serializer.dump_json({"job_id": 1, "messages": rows})
+
+    assert model_path(0).encode() == fast_path(0), "wire formats differ"
+    return model_path, fast_path
+
+
+def _database(args):
+    url = os.environ.get("BENCHMARK_DATABASE_URL")
+    if not url:
+        raise SystemExit("BENCHMARK_DATABASE_URL is not set")
+    engine = create_engine(url)
+
+    with Session(engine) as db:
+        job_id = db.execute(
+            select(Message.job_id)
+            .group_by(Message.job_id)
+            .order_by(func.count().desc())
+            .limit(1)
+        ).scalar_one()
+        client_id = db.scalar(select(Job.client_id).where(Job.id == job_id))
+
+    def model_path(_):
+        with Session(engine) as db:
+            return MessageService(db).get_chat_history(job_id, client_id).model_dump_json()
+
+    def fast_path(_):
+        with Session(engine) as db:
+            return MessageService(db).get_chat_history_json(job_id, client_id)
+
+    return model_path, fast_path
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.serialization")
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", action="store_true")
+    parser.add_argument("--out")
+    args = parser.parse_args(argv)
+
+    model_path, fast_path = _database(args) if args.db else _in_memory(args)
+
+    results = [
+        run_benchmark("chat_history_model", model_path, args.iterations, args.warmup),
+        run_benchmark("chat_history_fast_path", fast_path, args.iterations, args.warmup),
+    ]
+    for result in results:
+        s = result.summary()
+        print(f"{s['name']:<24} p50={s['p50_ms']:>8.2f}ms p99={s['p99_ms']:>8.2f}ms")
+
+    speedup = results[0].summary()["p50_ms"] / max(results[1].summary()["p50_ms"], 1e-9)
+    print(f"fast path p50 speedup: {speedup:.1f}x")
+
+    if args.out:
+        save_results(args.out, results, meta={"messages": args.messages, "db": args.db})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
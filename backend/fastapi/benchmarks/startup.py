@@ -0,0 +1,100 @@
+"""Cold import time of the app and tooling entry points, with a budget.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --module main --budget-ms 1500 --runs 5
+
+Each run imports the module in a fresh interpreter under ``python -X importtime``
+and the best run is compared against the budget. The command exits non-zero
+when a module is over budget or imports one of the ``--forbid`` packages.
+``tests/test_startup.py`` enforces the same budgets in the test suite; this
+command adds the per-module breakdown for finding what got slower.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# module -> budget in milliseconds (cumulative import time of the best run)
+BUDGETS = {
+    "main": float(os.environ.get("STARTUP_BUDGET_MS", "1500")),
+    "app.schemas.schema": 800.0,
+    "app.workers.outbox_worker": 1500.0,
+}
+
+# Heavy or network-bound packages that must only be imported on first use.
+FORBIDDEN = ("supabase", "gotrue", "pyarrow", "PIL", "cv2", "numpy", "scipy")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_profile(module: str) -> Tuple[float, Dict[str, Tuple[float, float]]]:
+    """Import ``module`` in a fresh interpreter.
+
+    Returns (total ms, {imported module: (self ms, cumulative ms)}).
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"importing {module} failed:\n{proc.stderr[-2000:]}")
+
+    modules: Dict[str, Tuple[float, float]] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us) / 1000, int(cumulative_us) / 1000)
+
+    total = modules.get(module, (0.0, 0.0))[1]
+    return total, modules
+
+
+def check(module: str, budget_ms: float, runs: int, forbid: List[str], top: int) -> bool:
+    best_total, best_modules = None, {}
+    for _ in range(runs):
+        total, modules = import_profile(module)
+        if best_total is None or total < best_total:
+            best_total, best_modules = total, modules
+
+    status = "ok" if best_total <= budget_ms else "OVER BUDGET"
+    print(f"{module:<28} {best_total:>8.1f}ms / {budget_ms:.0f}ms  {status}")
+
+    slowest = sorted(best_modules.items(), key=lambda item: item[1][0], reverse=True)
+    for name, (self_ms, cumulative_ms) in slowest[:top]:
+        print(f"    {self_ms:>8.1f}ms self {cumulative_ms:>8.1f}ms cumulative  {name}")
+
+    loaded = sorted(
+        {name.split(".")[0] for name in best_modules} & set(forbid)
+    )
+    if loaded:
+        print(f"    imports forbidden packages: {', '.join(loaded)}")
+
+    return best_total <= budget_ms and not loaded
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup")
+    parser.add_argument("--module", action="append", help="defaults to every module in BUDGETS")
+    parser.add_argument("--budget-ms", type=float, help="override the budget for every module")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--forbid", default=",".join(FORBIDDEN))
+    args = parser.parse_args(argv)
+
+    forbid = [name.strip() for name in args.forbid.split(",") if name.strip()]
+    ok = True
+    for module in args.module or list(BUDGETS):
+        budget = args.budget_ms or BUDGETS.get(module, BUDGETS["main"])
+        ok &= check(module, budget, args.runs, forbid, args.top)
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
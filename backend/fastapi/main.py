@@ -0,0 +1,65 @@
+import os
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from fastapi.staticfiles import StaticFiles
+
+from app.api.v1.endpoint import router as v1_router
+from app.core.blob_store import BLOB_BASE_URL, BLOB_STORE_BACKEND, BLOB_STORE_DIR
+from app.core.database import create_session
+from app.core.http_cache import ETagMiddleware
+from app.core.instrumentation import (
+    SQLInstrumentationMiddleware,
+    install_sql_instrumentation,
+)
+from app.core.metrics import metrics
+from app.core.profiling import ProfilingMiddleware
+from app.services.user.leaderboard_service import run_reconciler
+from app.workers.thumbnailer import shutdown_thumbnailer
+
+
+LEADERBOARD_RECONCILE_SECONDS = float(
+    os.environ.get("LEADERBOARD_RECONCILE_SECONDS", "300")
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tasks = []
+    if LEADERBOARD_RECONCILE_SECONDS > 0:
+        tasks.append(
+            asyncio.create_task(
+                run_reconciler(create_session, LEADERBOARD_RECONCILE_SECONDS)
+            )
+        )
+
+    yield
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.to_thread(shutdown_thumbnailer)
+
+
+app = FastAPI(
+    title=os.environ.get("PROJECT_NAME") or "Kintsugi", lifespan=lifespan
+)
+
+install_sql_instrumentation()
+app.add_middleware(ETagMiddleware)
+app.add_middleware(SQLInstrumentationMiddleware)
+app.add_middleware(ProfilingMiddleware)
+
+app.include_router(v1_router, prefix="/api/v1")
+
+if BLOB_STORE_BACKEND == "local" and BLOB_BASE_URL.startswith("/"):
+    os.makedirs(BLOB_STORE_DIR, exist_ok=True)
+    app.mount(BLOB_BASE_URL, StaticFiles(directory=BLOB_STORE_DIR), name="media")
+
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics() -> PlainTextResponse:
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4"
+    )
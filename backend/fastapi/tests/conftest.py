@@ -0,0 +1,38 @@
+"""Shared fixtures.
+
+Tests that need Postgres read their DSNs from the environment and are skipped
+when they are not set:
+
+- ``TEST_DATABASE_URL``: a scratch database; tests create and drop their own
+  tables in it.
+- ``TEST_REPLICA_DATABASE_URL``: a second scratch database standing in for a
+  read replica (``tests/test_database_routing.py``).
+
+    TEST_DATABASE_URL=postgresql://localhost/kintsugi_test \\
+    TEST_REPLICA_DATABASE_URL=postgresql://localhost/kintsugi_test_replica \\
+        python -m pytest
+"""
+
+import os
+
+import pytest
+from sqlalchemy import create_engine
+
+
+def _engine_from_env(name: str):
+    url = os.environ.get(name)
+    if not url:
+        pytest.skip(f"{name} is not set")
+    engine = create_engine(url)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def engine():
+    yield from _engine_from_env("TEST_DATABASE_URL")
+
+
+@pytest.fixture
+def replica_engine():
+    yield from _engine_from_env("TEST_REPLICA_DATABASE_URL")
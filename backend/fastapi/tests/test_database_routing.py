@@ -0,0 +1,158 @@
+"""RoutingSession against two real databases, one playing the replica.
+
+Each database gets a ``routing_probe`` table holding one row that names it,
+so a query's answer shows where it ran.
+"""
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, insert, select, text, update
+from sqlalchemy.orm import registry
+
+from app.core.database import RoutingSession, read_only, snapshot
+
+probe = Table(
+    "routing_probe",
+    MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("source", String, nullable=False),
+)
+
+
+class _ProbeRow:
+    def __init__(self, id, source):
+        self.id = id
+        self.source = source
+
+
+registry().map_imperatively(_ProbeRow, probe)
+
+
+class ProbeService:
+    def __init__(self, db):
+        self.db = db
+
+    @read_only
+    def sources(self):
+        return sorted(self.db.scalars(select(probe.c.source)))
+
+    def sources_on_primary(self):
+        return sorted(self.db.scalars(select(probe.c.source)))
+
+    @read_only
+    def sources_by_sql(self, read_only_sql: bool):
+        statement = text("SELECT source FROM routing_probe ORDER BY source")
+        if read_only_sql:
+            statement = statement.execution_options(read_only=True)
+        return list(self.db.scalars(statement))
+
+    @read_only
+    def touch(self):
+        # A SELECT around an UPDATE ... RETURNING has to run on the primary.
+        touched = update(probe).values(source=probe.c.source).returning(probe.c.source).cte()
+        return sorted(self.db.scalars(select(touched.c.source)))
+
+
+@pytest.fixture
+def databases(engine, replica_engine):
+    for bind, source in ((engine, "primary"), (replica_engine, "replica")):
+        probe.drop(bind, checkfirst=True)
+        probe.create(bind)
+        with bind.begin() as conn:
+            conn.execute(insert(probe).values(id=1, source=source))
+    yield engine, replica_engine
+    for bind in (engine, replica_engine):
+        probe.drop(bind, checkfirst=True)
+
+
+@pytest.fixture
+def session(databases):
+    primary, replica = databases
+    db = RoutingSession(primary=primary, replicas=[replica])
+    yield db
+    db.close()
+
+
+def test_read_only_reads_go_to_the_replica(session):
+    assert ProbeService(session).sources() == ["replica"]
+
+
+def test_other_reads_go_to_the_primary(session):
+    assert ProbeService(session).sources_on_primary() == ["primary"]
+
+
+def test_raw_sql_runs_on_the_primary(session):
+    assert ProbeService(session).sources_by_sql(read_only_sql=False) == ["primary"]
+
+
+def test_raw_sql_marked_read_only_goes_to_the_replica(session):
+    assert ProbeService(session).sources_by_sql(read_only_sql=True) == ["replica"]
+
+
+def test_select_wrapping_dml_runs_on_the_primary(session):
+    assert ProbeService(session).touch() == ["primary"]
+
+
+def test_without_replicas_everything_reads_the_primary(databases):
+    primary, _ = databases
+    with RoutingSession(primary=primary) as db:
+        assert ProbeService(db).sources() == ["primary"]
+
+
+def test_read_only_sees_the_transactions_own_flushed_writes(session):
+    session.execute(insert(probe).values(id=2, source="uncommitted"))
+    assert ProbeService(session).sources() == ["primary", "uncommitted"]
+
+
+def test_read_only_after_autoflush_stays_on_the_primary(session, databases):
+    primary, _ = databases
+    session.add(_ProbeRow(id=3, source="pending"))
+    # The query autoflushes the pending row into the primary transaction.
+    assert ProbeService(session).sources() == ["pending", "primary"]
+    session.rollback()
+    with primary.connect() as conn:
+        assert conn.scalars(select(probe.c.source)).all() == ["primary"]
+
+
+def test_replica_reads_resume_after_a_rollback(session):
+    session.execute(insert(probe).values(id=2, source="uncommitted"))
+    session.rollback()
+    assert ProbeService(session).sources() == ["replica"]
+
+
+def test_committed_write_sticks_the_session_to_the_primary(session):
+    session.execute(insert(probe).values(id=2, source="committed"))
+    session.commit()
+    assert ProbeService(session).sources() == ["committed", "primary"]
+
+
+def test_one_replica_per_transaction(databases):
+    primary, replica = databases
+    replicas = [replica.execution_options(replica=n) for n in range(8)]
+    db = RoutingSession(primary=primary, replicas=replicas)
+    try:
+        with db.use_replica():
+            picked = {db.get_bind(clause=select(probe.c.source)) for _ in range(50)}
+            assert len(picked) == 1
+            db.commit()
+            repicked = {db.get_bind(clause=select(probe.c.source)) for _ in range(50)}
+            assert len(repicked) == 1
+    finally:
+        db.close()
+
+
+
+def test_snapshot_reads_agree_across_concurrent_commits(session, databases):
+    primary, replica = databases
+    with session.use_replica(), snapshot(session) as db:
+        before = db.scalars(select(probe.c.source)).all()
+        with replica.begin() as conn:
+            conn.execute(insert(probe).values(id=2, source="late"))
+        assert db.scalars(select(probe.c.source)).all() == before == ["replica"]
+    assert ProbeService(session).sources() == ["late", "replica"]
+
+
+def test_snapshot_after_a_write_reads_the_transaction(session):
+    session.execute(insert(probe).values(id=2, source="uncommitted"))
+    with session.use_replica(), snapshot(session) as db:
+        assert db is session
+        assert sorted(db.scalars(select(probe.c.source))) == ["primary", "uncommitted"]
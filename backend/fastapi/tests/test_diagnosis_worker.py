@@ -0,0 +1,223 @@
+"""DiagnosisWorker (app.workers.diagnosis_worker) with the fake model client.
+
+The worker's tables are created in a scratch ``diagnosis_test`` schema of the
+test database, so the real schema's enums and tables are never touched.
+"""
+
+import asyncio
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, func, insert, select, text
+
+from app.core.diagnosis_client import FakeDiagnosisClient
+from app.core.metrics import metrics
+from app.schemas.schema import (
+    Base,
+    Diagnosis,
+    DiagnosisRequest,
+    DiagnosisRequestStatus,
+    DiagnosisType,
+    Item,
+    User,
+)
+from app.workers.diagnosis_worker import DiagnosisWorker
+
+SCHEMA = "diagnosis_test"
+TABLES = [User.__table__, Item.__table__, Diagnosis.__table__, DiagnosisRequest.__table__]
+
+
+class RecordingClient(FakeDiagnosisClient):
+    """Fake client that also records each batch and the most calls it saw
+    in flight at once."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.batches = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def diagnose(self, model, inputs):
+        with self._lock:
+            self.batches.append((model, [i.request_id for i in inputs]))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            return super().diagnose(model, inputs)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+@pytest.fixture
+def db(engine):
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    scratch = create_engine(engine.url, connect_args={"options": f"-csearch_path={SCHEMA}"})
+    Base.metadata.create_all(scratch, tables=TABLES)
+    yield scratch
+    scratch.dispose()
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+
+
+@pytest.fixture
+def item_id(db):
+    with db.begin() as conn:
+        owner_id = conn.scalar(
+            insert(User)
+            .values(id=uuid.uuid4(), email="owner@example.com", display_name="Owner")
+            .returning(User.id)
+        )
+        return conn.scalar(
+            insert(Item)
+            .values(owner_id=owner_id, title="Lamp", category="electronics", images=[])
+            .returning(Item.id)
+        )
+
+
+def _enqueue(db, item_id, models):
+    """One pending request per entry of ``models``, ready in that order."""
+    now = datetime.now(timezone.utc) - timedelta(minutes=1)
+    with db.begin() as conn:
+        return conn.scalars(
+            insert(DiagnosisRequest).returning(DiagnosisRequest.id, sort_by_parameter_order=True),
+            [
+                {
+                    "item_id": item_id,
+                    "diagnosis_type": DiagnosisType.VISUAL,
+                    "model": model,
+                    "media_urls": [],
+                    "status": DiagnosisRequestStatus.PENDING,
+                    "attempts": 0,
+                    "available_at": now + timedelta(milliseconds=n),
+                    "created_at": now,
+                }
+                for n, model in enumerate(models)
+            ],
+        ).all()
+
+
+def _statuses(db):
+    with db.connect() as conn:
+        return dict(
+            conn.execute(
+                select(DiagnosisRequest.status, func.count()).group_by(DiagnosisRequest.status)
+            ).all()
+        )
+
+
+def _drain(worker):
+    handled = 0
+    while batch := worker.process_batch():
+        handled += batch
+    return handled
+
+
+def test_batches_hold_one_model_and_start_with_the_oldest(db, item_id):
+    ids = _enqueue(db, item_id, ["flash", "pro", "flash", "pro", "flash", "flash", "flash"])
+    client = RecordingClient(latency_seconds=0)
+    worker = DiagnosisWorker(db, client=client, batch_size=3, budget_usd_per_hour=0)
+
+    assert _drain(worker) == 7
+
+    by_id = dict(zip(ids, ["flash", "pro", "flash", "pro", "flash", "flash", "flash"]))
+    assert client.batches[0] == ("flash", [ids[0], ids[2], ids[4]])
+    for model, batch in client.batches:
+        assert 1 <= len(batch) <= 3
+        assert {by_id[i] for i in batch} == {model}
+    assert sorted(i for _, batch in client.batches for i in batch) == sorted(ids)
+    assert len(client.batches) == 3
+
+    assert _statuses(db) == {DiagnosisRequestStatus.DONE: 7}
+    with db.connect() as conn:
+        assert conn.scalar(select(func.count()).select_from(Diagnosis)) == 7
+        linked = conn.scalar(
+            select(func.count(func.distinct(DiagnosisRequest.diagnosis_id)))
+        )
+    assert linked == 7
+
+
+def test_batch_size_is_capped_by_the_client(db, item_id):
+    _enqueue(db, item_id, ["flash"] * 5)
+    client = RecordingClient(latency_seconds=0)
+    client.max_batch_size = 2
+
+    worker = DiagnosisWorker(db, client=client, batch_size=8, budget_usd_per_hour=0)
+    assert worker.batch_size == 2
+    _drain(worker)
+    assert [len(batch) for _, batch in client.batches] == [2, 2, 1]
+
+
+def test_run_keeps_concurrency_batches_in_flight(db, item_id):
+    _enqueue(db, item_id, ["flash"] * 24)
+    client = RecordingClient(latency_seconds=0.1)
+    worker = DiagnosisWorker(
+        db, client=client, batch_size=2, concurrency=3, poll_interval=0.05, budget_usd_per_hour=0
+    )
+
+    async def run_until_drained():
+        stop = asyncio.Event()
+        task = asyncio.create_task(worker.run(stop))
+        while _statuses(db).get(DiagnosisRequestStatus.DONE, 0) < 24:
+            await asyncio.sleep(0.05)
+        stop.set()
+        await asyncio.wait_for(task, 5)
+
+    asyncio.run(run_until_drained())
+
+    assert client.max_in_flight == 3
+    # Concurrent claims never hand the same request to two batches.
+    assert client.inputs == 24
+    assert _statuses(db) == {DiagnosisRequestStatus.DONE: 24}
+
+
+def test_budget_stops_claims_once_spent(db, item_id):
+    _enqueue(db, item_id, ["flash"] * 20)
+    client = RecordingClient(latency_seconds=0, cost_usd=0.002)
+    client.estimated_cost_usd = 0.002
+    worker = DiagnosisWorker(db, client=client, batch_size=4, budget_usd_per_hour=0.01)
+    exhausted = metrics.get("kintsugi_diagnosis_budget_exhausted_total")
+
+    assert _drain(worker) == 5
+    assert metrics.get("kintsugi_diagnosis_budget_exhausted_total") == exhausted + 1
+
+    with db.connect() as conn:
+        spent = conn.scalar(select(func.sum(DiagnosisRequest.cost_usd)))
+    assert spent == pytest.approx(0.01)
+    assert _statuses(db) == {DiagnosisRequestStatus.DONE: 5, DiagnosisRequestStatus.PENDING: 15}
+
+
+def test_in_flight_requests_count_against_the_budget(db, item_id):
+    _enqueue(db, item_id, ["flash"] * 10)
+    client = RecordingClient(latency_seconds=0)
+    client.estimated_cost_usd = 0.002
+    worker = DiagnosisWorker(db, client=client, batch_size=4, budget_usd_per_hour=0.01)
+
+    first = worker.claim_batch()
+    second = worker.claim_batch()
+    assert len(first.inputs) == 4
+    assert len(second.inputs) == 1
+    assert worker.claim_batch() is None
+
+
+def test_concurrent_workers_stay_within_the_budget(db, item_id):
+    _enqueue(db, item_id, ["flash"] * 40)
+    client = RecordingClient(latency_seconds=0.05, cost_usd=0.002)
+    client.estimated_cost_usd = 0.002
+    workers = [
+        DiagnosisWorker(db, client=client, batch_size=2, budget_usd_per_hour=0.02)
+        for _ in range(4)
+    ]
+
+    threads = [threading.Thread(target=_drain, args=(w,)) for w in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert client.inputs == 10
+    assert _statuses(db)[DiagnosisRequestStatus.DONE] == 10
@@ -0,0 +1,154 @@
+"""DatabaseIdempotencyStore under concurrent duplicates and failed writes.
+
+Writes insert into an ``idempotency_probe`` table and commit through the
+session they are given, the way services do, so the tests can count how many
+writes landed.
+"""
+
+import threading
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlalchemy import Column, Integer, MetaData, String, Table, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.idempotency import DatabaseIdempotencyStore, IdempotentRequest
+from app.schemas.schema import IdempotencyKey
+
+probe = Table(
+    "idempotency_probe",
+    MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("key", String, nullable=False),
+)
+
+
+class _Written(BaseModel):
+    id: int
+
+
+@pytest.fixture
+def store(engine):
+    for table in (probe, IdempotencyKey.__table__):
+        table.drop(engine, checkfirst=True)
+        table.create(engine)
+    yield DatabaseIdempotencyStore(engine)
+    for table in (probe, IdempotencyKey.__table__):
+        table.drop(engine, checkfirst=True)
+
+
+def _write(key: str):
+    def write(db) -> _Written:
+        row_id = db.scalar(insert(probe).values(key=key).returning(probe.c.id))
+        db.commit()
+        return _Written(id=row_id)
+
+    return write
+
+
+def _writes(engine, key: str) -> int:
+    with engine.connect() as conn:
+        return conn.scalar(select(func.count()).where(probe.c.key == key))
+
+
+def _request(store, key: str, user_id: str = "user-1", request_hash: str = "same"):
+    return IdempotentRequest(store, Session(store.engine), user_id, key, request_hash)
+
+
+def test_concurrent_duplicates_write_once(store, engine):
+    key = uuid.uuid4().hex
+    duplicates = 8
+    outcomes, bodies = Counter(), set()
+    lock = threading.Lock()
+
+    def submit(_):
+        try:
+            response = _request(store, key).execute(_write(key), status_code=201)
+        except HTTPException as e:
+            with lock:
+                outcomes[e.status_code] += 1
+            return
+        with lock:
+            outcomes[response.status_code] += 1
+            bodies.add(response.body)
+
+    with ThreadPoolExecutor(duplicates) as pool:
+        list(pool.map(submit, range(duplicates)))
+
+    assert _writes(engine, key) == 1
+    assert set(outcomes) <= {201, 409}
+    assert outcomes[201] >= 1
+    assert len(bodies) == 1
+
+
+def test_duplicate_while_running_gets_409_then_replay(store, engine):
+    key = uuid.uuid4().hex
+    started, finish = threading.Barrier(2), threading.Barrier(2)
+
+    def slow_write(db) -> _Written:
+        row_id = db.scalar(insert(probe).values(key=key).returning(probe.c.id))
+        db.commit()
+        started.wait()
+        finish.wait()
+        return _Written(id=row_id)
+
+    with ThreadPoolExecutor(1) as pool:
+        first = pool.submit(_request(store, key).execute, slow_write)
+        started.wait()
+        with pytest.raises(HTTPException) as in_progress:
+            _request(store, key).execute(_write(key))
+        finish.wait()
+        original = first.result()
+
+    assert in_progress.value.status_code == 409
+    replay = _request(store, key).execute(_write(key))
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert replay.body == original.body
+    assert _writes(engine, key) == 1
+
+
+def test_failure_after_commit_rolls_back_the_write(store, engine):
+    key = uuid.uuid4().hex
+
+    def failing_write(db) -> _Written:
+        db.execute(insert(probe).values(key=key))
+        db.commit()
+        raise RuntimeError("crashed after the service committed")
+
+    with pytest.raises(RuntimeError):
+        _request(store, key).execute(failing_write)
+    assert _writes(engine, key) == 0
+
+    # The key was released, so the retry runs the write.
+    response = _request(store, key).execute(_write(key))
+    assert "Idempotent-Replayed" not in response.headers
+    assert _writes(engine, key) == 1
+
+
+def test_failure_storing_the_response_rolls_back_the_write(store, engine, monkeypatch):
+    key = uuid.uuid4().hex
+
+    def broken_complete(*args, **kwargs):
+        raise RuntimeError("connection lost")
+
+    monkeypatch.setattr(store, "complete", broken_complete)
+    with pytest.raises(RuntimeError):
+        _request(store, key).execute(_write(key))
+    assert _writes(engine, key) == 0
+
+    with engine.connect() as conn:
+        assert conn.scalar(select(func.count()).select_from(IdempotencyKey)) == 0
+
+
+def test_key_reused_for_another_request_is_rejected(store, engine):
+    key = uuid.uuid4().hex
+    _request(store, key).execute(_write(key))
+
+    with pytest.raises(HTTPException) as mismatch:
+        _request(store, key, request_hash="different").execute(_write(key))
+    assert mismatch.value.status_code == 422
+    assert _writes(engine, key) == 1
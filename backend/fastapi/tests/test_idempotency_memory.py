@@ -0,0 +1,178 @@
+"""InMemoryIdempotencyStore and IdempotentRequest without a database."""
+
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from app.core.idempotency import (
+    REPLAYED_HEADER,
+    IdempotentRequest,
+    InMemoryIdempotencyStore,
+    StoredResponse,
+)
+
+
+class _Written(BaseModel):
+    execution: int
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Writes:
+    """Counts executions; each write returns its own execution number."""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, db) -> _Written:
+        with self._lock:
+            self.count += 1
+            return _Written(execution=self.count)
+
+
+def _request(store, key="key-1", request_hash="same", user_id="user-1"):
+    return IdempotentRequest(store, None, user_id, key, request_hash)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def store(clock):
+    return InMemoryIdempotencyStore(ttl_seconds=60, lock_seconds=10, clock=clock)
+
+
+def test_claim_complete_and_replay(store):
+    writes = Writes()
+    first = _request(store).execute(writes, status_code=201)
+    replay = _request(store).execute(writes, status_code=201)
+
+    assert writes.count == 1
+    assert first.status_code == replay.status_code == 201
+    assert replay.body == first.body
+    assert replay.headers[REPLAYED_HEADER] == "true"
+    assert REPLAYED_HEADER not in first.headers
+
+
+def test_without_a_key_every_request_writes(store):
+    writes = Writes()
+    _request(store, key=None).execute(writes)
+    _request(store, key=None).execute(writes)
+    assert writes.count == 2
+
+
+def test_keys_are_per_user(store):
+    writes = Writes()
+    _request(store, user_id="alice").execute(writes)
+    _request(store, user_id="bob").execute(writes)
+    assert writes.count == 2
+
+
+def test_duplicate_while_in_flight_gets_409(store):
+    claim = store.claim("user-1", "key-1", "same")
+    assert claim.acquired
+
+    with pytest.raises(HTTPException) as in_progress:
+        _request(store).execute(Writes())
+    assert in_progress.value.status_code == 409
+    assert in_progress.value.headers["Retry-After"] == "1"
+
+
+def test_abandoned_claim_can_be_taken_over(store, clock):
+    assert store.claim("user-1", "key-1", "same").acquired
+    clock.now += 11
+
+    writes = Writes()
+    response = _request(store).execute(writes)
+    assert writes.count == 1
+    assert REPLAYED_HEADER not in response.headers
+
+
+def test_key_reused_for_a_different_body_gets_422(store):
+    writes = Writes()
+    _request(store).execute(writes)
+
+    with pytest.raises(HTTPException) as mismatch:
+        _request(store, request_hash="other").execute(writes)
+    assert mismatch.value.status_code == 422
+    assert writes.count == 1
+
+
+def test_failed_write_releases_the_key(store):
+    def failing(db):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        _request(store).execute(failing)
+
+    writes = Writes()
+    response = _request(store).execute(writes)
+    assert writes.count == 1
+    assert REPLAYED_HEADER not in response.headers
+
+
+def test_stored_response_expires_after_the_ttl(store, clock):
+    writes = Writes()
+    _request(store).execute(writes)
+    clock.now += 59
+    _request(store).execute(writes)
+    assert writes.count == 1
+
+    clock.now += 2
+    response = _request(store).execute(writes)
+    assert writes.count == 2
+    assert REPLAYED_HEADER not in response.headers
+
+
+def test_purge_expired_drops_old_entries(store, clock):
+    store.claim("user-1", "old", "h")
+    store.complete("user-1", "old", StoredResponse(200, b"{}"))
+    clock.now += 30
+    store.claim("user-1", "new", "h")
+    store.complete("user-1", "new", StoredResponse(200, b"{}"))
+    clock.now += 31
+
+    assert store.purge_expired() == 1
+    assert store.claim("user-1", "new", "h").response == StoredResponse(200, b"{}")
+
+
+def test_concurrent_duplicates_write_once():
+    store = InMemoryIdempotencyStore()
+    writes = Writes()
+    duplicates = 16
+    start = threading.Barrier(duplicates)
+    outcomes, bodies = Counter(), set()
+    lock = threading.Lock()
+
+    def submit(_):
+        start.wait()
+        try:
+            response = _request(store).execute(writes, status_code=201)
+        except HTTPException as e:
+            with lock:
+                outcomes[e.status_code] += 1
+            return
+        with lock:
+            outcomes[response.status_code] += 1
+            bodies.add(response.body)
+
+    with ThreadPoolExecutor(duplicates) as pool:
+        list(pool.map(submit, range(duplicates)))
+
+    assert writes.count == 1
+    assert set(outcomes) <= {201, 409}
+    assert sum(outcomes.values()) == duplicates
+    assert len(bodies) == 1
@@ -0,0 +1,161 @@
+"""SQL instrumentation (app.core.instrumentation) on an in-memory SQLite engine."""
+
+import json
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import StaticPool
+
+from app.core.instrumentation import (
+    QueryBudgetExceeded,
+    SQLInstrumentationMiddleware,
+    assert_query_budget,
+    install_sql_instrumentation,
+    instrument_service,
+    statement_shape,
+)
+from app.core.metrics import metrics
+
+
+@pytest.fixture
+def sqlite():
+    # One shared connection, so the threadpool sees the same in-memory database.
+    engine = create_engine(
+        "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+    install_sql_instrumentation(engine)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE things (id integer PRIMARY KEY, name text)"))
+        conn.execute(text("INSERT INTO things VALUES (1, 'a'), (2, 'b'), (3, 'c')"))
+    yield engine
+    engine.dispose()
+
+
+@instrument_service
+class ThingService:
+    def __init__(self, engine):
+        self.engine = engine
+
+    def names(self, ids):
+        # One statement per id: the N+1 shape the detector looks for.
+        with self.engine.connect() as conn:
+            return [
+                conn.execute(text("SELECT name FROM things WHERE id = :id"), {"id": i}).scalar()
+                for i in ids
+            ]
+
+    def count(self):
+        with self.engine.connect() as conn:
+            return conn.execute(text("SELECT count(*) FROM things")).scalar()
+
+
+def _app(engine) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/things/{thing_id}")
+    def get_thing(thing_id: int):
+        service = ThingService(engine)
+        return {"count": service.count(), "names": service.names([thing_id, thing_id])}
+
+    app.add_middleware(SQLInstrumentationMiddleware)
+    return app
+
+
+def _request_lines(caplog):
+    return [
+        json.loads(r.getMessage())
+        for r in caplog.records
+        if r.name == "kintsugi.sql" and '"sql.request"' in r.getMessage()
+    ]
+
+
+def test_statement_shape_collapses_literals():
+    assert statement_shape("SELECT * FROM t WHERE id = 5 AND name = 'x'") == (
+        "SELECT * FROM t WHERE id = ? AND name = ?"
+    )
+    assert statement_shape("SELECT * FROM t WHERE id IN (1, 2,\n 3)") == (
+        "SELECT * FROM t WHERE id IN (?)"
+    )
+
+
+def test_request_counts_statements_per_route_template(sqlite, caplog):
+    route = "/things/{thing_id}"
+    requests_before = metrics.get("kintsugi_requests_total", route=route)
+    queries_before = metrics.get("kintsugi_request_queries_total", route=route)
+
+    caplog.set_level(logging.INFO, logger="kintsugi.sql")
+    with TestClient(_app(sqlite)) as client:
+        assert client.get("/things/2").json() == {"count": 3, "names": ["b", "b"]}
+
+    assert metrics.get("kintsugi_requests_total", route=route) == requests_before + 1
+    assert metrics.get("kintsugi_request_queries_total", route=route) == queries_before + 3
+
+    (line,) = _request_lines(caplog)
+    assert line["route"] == route
+    assert line["query_count"] == 3
+    methods = {m["name"]: m["query_count"] for m in line["service_methods"]}
+    assert methods == {"ThingService.count": 1, "ThingService.names": 2}
+
+
+def test_unmatched_paths_share_one_route_label(sqlite):
+    before = metrics.get("kintsugi_requests_total", route="unmatched")
+    with TestClient(_app(sqlite)) as client:
+        assert client.get("/no/such/path").status_code == 404
+        assert client.get("/another/missing/path").status_code == 404
+
+    assert metrics.get("kintsugi_requests_total", route="unmatched") == before + 2
+
+
+def test_repeated_statement_shape_is_reported_as_n_plus_one(sqlite, caplog):
+    before = metrics.get("kintsugi_service_n_plus_one_total", method="ThingService.names")
+
+    caplog.set_level(logging.WARNING, logger="kintsugi.sql")
+    assert ThingService(sqlite).names([1, 2, 3, 1, 2, 3]) == ["a", "b", "c"] * 2
+
+    assert (
+        metrics.get("kintsugi_service_n_plus_one_total", method="ThingService.names")
+        == before + 1
+    )
+    (record,) = [r for r in caplog.records if "sql.n_plus_one" in r.getMessage()]
+    report = json.loads(record.getMessage())
+    assert report["name"] == "ThingService.names"
+    assert report["n_plus_one"] == {"SELECT name FROM things WHERE id = ?": 6}
+
+
+def test_few_repeats_are_not_reported(sqlite, caplog):
+    caplog.set_level(logging.WARNING, logger="kintsugi.sql")
+    ThingService(sqlite).names([1, 2])
+    assert not [r for r in caplog.records if "sql.n_plus_one" in r.getMessage()]
+
+
+def test_query_budget_passes_within_budget(sqlite):
+    with assert_query_budget(max_queries=2, max_repeats=2) as stats:
+        ThingService(sqlite).names([1, 2])
+    assert stats.query_count == 2
+
+
+def test_query_budget_fails_over_the_statement_count(sqlite):
+    with pytest.raises(QueryBudgetExceeded, match="4 queries issued, budget is 3"):
+        with assert_query_budget(max_queries=3):
+            ThingService(sqlite).names([1, 2, 3, 1])
+
+
+def test_query_budget_fails_on_repeated_shapes(sqlite):
+    with pytest.raises(QueryBudgetExceeded, match="3x repeated statement"):
+        with assert_query_budget(max_queries=10, max_repeats=2):
+            ThingService(sqlite).names([1, 2, 3])
+
+
+def test_failed_statement_leaves_no_start_time_behind(sqlite):
+    with sqlite.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM missing_table"))
+        assert conn.info.get("query_start_time") == []
+
+        with assert_query_budget(max_queries=1) as stats:
+            conn.execute(text("SELECT 1"))
+    assert stats.query_count == 1
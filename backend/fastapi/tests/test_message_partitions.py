@@ -0,0 +1,107 @@
+"""ensure_message_partitions() against a real Postgres.
+
+The function is installed into a scratch schema, on a cut-down ``messages``
+table partitioned the same way as the real one.
+"""
+
+import importlib.util
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+import pytest
+import sqlalchemy as sa
+
+MIGRATION = (
+    Path(__file__).parents[1]
+    / "app/alembic/versions/b2e7c4a9d1f6_move_default_partition_rows.py"
+)
+SCHEMA = "partition_test"
+
+
+def _ensure_partitions_function() -> str:
+    spec = importlib.util.spec_from_file_location("move_default_partition_rows", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.ENSURE_PARTITIONS_FUNCTION
+
+
+def _month(offset: int) -> date:
+    today = datetime.now(timezone.utc).date()
+    months = today.year * 12 + today.month - 1 + offset
+    return date(months // 12, months % 12 + 1, 1)
+
+
+@pytest.fixture
+def conn(engine):
+    with engine.connect() as conn:
+        conn.execute(sa.text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(sa.text(f"CREATE SCHEMA {SCHEMA}"))
+        conn.execute(sa.text(f"SET search_path TO {SCHEMA}"))
+        conn.execute(
+            sa.text(
+                "CREATE TABLE messages ("
+                "    id integer NOT NULL,"
+                "    content text,"
+                "    created_at timestamp without time zone NOT NULL,"
+                "    PRIMARY KEY (id, created_at)"
+                ") PARTITION BY RANGE (created_at)"
+            )
+        )
+        conn.execute(sa.text("CREATE INDEX ix_messages_created_at ON messages (created_at)"))
+        conn.execute(sa.text("CREATE TABLE messages_default PARTITION OF messages DEFAULT"))
+        conn.execute(sa.text(_ensure_partitions_function()))
+        conn.commit()
+        yield conn
+        conn.rollback()
+        conn.execute(sa.text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+        conn.commit()
+
+
+def _ensure(conn, start: date, months_ahead: int) -> int:
+    created = conn.execute(
+        sa.text("SELECT ensure_message_partitions(:start, :months_ahead)"),
+        {"start": start, "months_ahead": months_ahead},
+    ).scalar()
+    conn.commit()
+    return created
+
+
+def _partition_of(conn, message_id: int) -> str:
+    return conn.execute(
+        sa.text("SELECT tableoid::regclass::text FROM messages WHERE id = :id"),
+        {"id": message_id},
+    ).scalar()
+
+
+def test_creates_each_missing_month_once(conn):
+    assert _ensure(conn, _month(0), 2) == 3
+    assert _ensure(conn, _month(0), 2) == 0
+    assert _ensure(conn, _month(0), 3) == 1
+
+
+def test_rows_in_the_default_partition_move_into_their_new_month(conn):
+    _ensure(conn, _month(0), 1)
+    early = datetime.combine(_month(5), datetime.min.time())
+    later = datetime.combine(_month(6), datetime.min.time())
+    conn.execute(
+        sa.text("INSERT INTO messages VALUES (1, 'early', :early), (2, 'later', :later)"),
+        {"early": early, "later": later},
+    )
+    conn.commit()
+    assert _partition_of(conn, 1) == "messages_default"
+
+    assert _ensure(conn, _month(0), 5) == 4
+
+    month = _month(5)
+    assert _partition_of(conn, 1) == f"messages_y{month:%Y}m{month:%m}"
+    # Rows beyond the new partitions stay where they were.
+    assert _partition_of(conn, 2) == "messages_default"
+    assert conn.execute(sa.text("SELECT content FROM messages WHERE id = 1")).scalar() == "early"
+
+    indexed = conn.execute(
+        sa.text(
+            "SELECT count(*) FROM pg_inherits"
+            " WHERE inhparent = to_regclass('ix_messages_created_at')"
+        )
+    ).scalar()
+    assert indexed == 7
@@ -0,0 +1,218 @@
+"""DigestBuffer and Notifier (app.workers.notifier) with the fake sender.
+
+The queue is a ``notification_queue`` table on an in-memory SQLite engine;
+the notifier's advisory lock (``run``) is Postgres-only and not covered.
+"""
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.pool import StaticPool
+
+from app.core.notification_sender import FakeNotificationSender
+from app.schemas.schema import NotificationKind, QueuedNotification
+from app.workers.notifier import DigestBuffer, Notifier
+
+OFFER, MESSAGE = NotificationKind.NEW_OFFER, NotificationKind.NEW_MESSAGE
+T0 = datetime(2026, 10, 19, 12, 0, 0)
+ALICE, BOB = uuid.uuid4(), uuid.uuid4()
+
+
+def _entries(digest):
+    return sorted((e.kind.value, e.subject_id, e.count) for e in digest.entries)
+
+
+@pytest.fixture
+def queue():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    QueuedNotification.__table__.create(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def sender():
+    return FakeNotificationSender()
+
+
+@pytest.fixture
+def notifier(queue, sender):
+    return Notifier(queue, sender=sender, window_seconds=60, max_events=5, load_batch=2)
+
+
+def _enqueue(engine, event_id, recipient_id, kind, subject_id, created_at=T0):
+    with engine.begin() as conn:
+        conn.execute(
+            insert(QueuedNotification).values(
+                id=event_id,
+                recipient_id=recipient_id,
+                kind=kind,
+                subject_id=subject_id,
+                created_at=created_at,
+            )
+        )
+
+
+def _queued(engine):
+    with engine.connect() as conn:
+        return conn.scalar(select(func.count()).select_from(QueuedNotification))
+
+
+def test_buffer_coalesces_by_recipient_kind_and_subject():
+    buffer = DigestBuffer(window_seconds=60, max_events=20)
+    buffer.add(1, ALICE, OFFER, 17, T0)
+    buffer.add(2, ALICE, OFFER, 17, T0 + timedelta(seconds=5))
+    buffer.add(3, ALICE, OFFER, 18, T0)
+    buffer.add(4, ALICE, MESSAGE, 17, T0)
+    buffer.add(5, BOB, OFFER, 17, T0)
+
+    digest, ids = buffer.digest(ALICE)
+    assert _entries(digest) == [("new_message", 17, 1), ("new_offer", 17, 2), ("new_offer", 18, 1)]
+    assert digest.event_count == 4
+    assert sorted(ids) == [1, 2, 3, 4]
+    offers = next(e for e in digest.entries if (e.kind, e.subject_id) == (OFFER, 17))
+    assert offers.last_at == T0 + timedelta(seconds=5)
+    assert offers.text == "2 new offers on your item #17"
+
+    buffer.remove(ALICE)
+    assert len(buffer) == 1 and 5 in buffer and 1 not in buffer
+
+
+def test_buffer_ignores_an_event_it_already_holds():
+    buffer = DigestBuffer(window_seconds=60, max_events=20)
+    buffer.add(1, ALICE, OFFER, 17, T0)
+    buffer.add(1, ALICE, OFFER, 17, T0)
+
+    digest, ids = buffer.digest(ALICE)
+    assert _entries(digest) == [("new_offer", 17, 1)]
+    assert ids == [1]
+
+
+def test_recipient_is_due_once_the_window_has_passed():
+    buffer = DigestBuffer(window_seconds=60, max_events=20)
+    buffer.add(1, ALICE, OFFER, 17, T0 + timedelta(seconds=30))
+    # A late-loaded older event moves the window's start back.
+    buffer.add(2, ALICE, OFFER, 17, T0)
+    buffer.add(3, BOB, OFFER, 17, T0 + timedelta(seconds=30))
+
+    assert buffer.due(T0 + timedelta(seconds=59)) == []
+    assert buffer.due(T0 + timedelta(seconds=60)) == [ALICE]
+    assert set(buffer.due(T0 + timedelta(seconds=90))) == {ALICE, BOB}
+
+
+def test_recipient_is_due_once_the_buffer_is_full():
+    buffer = DigestBuffer(window_seconds=60, max_events=3)
+    buffer.add(1, ALICE, OFFER, 17, T0)
+    buffer.add(2, ALICE, OFFER, 17, T0)
+    assert buffer.due(T0) == []
+
+    buffer.add(3, ALICE, MESSAGE, 9, T0)
+    assert buffer.due(T0) == [ALICE]
+
+
+def test_flush_sends_due_digests_and_deletes_their_rows(queue, sender, notifier):
+    for event_id in (1, 2, 3):
+        _enqueue(queue, event_id, ALICE, OFFER, 17)
+    _enqueue(queue, 4, BOB, MESSAGE, 9, T0 + timedelta(seconds=30))
+
+    assert notifier.load(T0 + timedelta(seconds=30)) == 4
+    assert notifier.flush(T0 + timedelta(seconds=59)) == 0
+    assert notifier.flush(T0 + timedelta(seconds=60)) == 1
+
+    (digest,) = sender.sent
+    assert digest.recipient_id == ALICE
+    assert _entries(digest) == [("new_offer", 17, 3)]
+    assert _queued(queue) == 1
+    assert len(notifier.buffer) == 1 and 4 in notifier.buffer
+
+
+def test_full_buffer_is_sent_before_the_window(queue, sender, notifier):
+    for event_id in range(1, 6):
+        _enqueue(queue, event_id, ALICE, MESSAGE, 9)
+
+    assert notifier.run_once(T0) == 1
+    assert [d.event_count for d in sender.sent] == [5]
+    assert _queued(queue) == 0
+
+
+def test_digests_go_out_in_sender_sized_batches(queue):
+    sender = FakeNotificationSender(max_batch_size=2)
+    notifier = Notifier(queue, sender=sender, window_seconds=60)
+    recipients = [uuid.uuid4() for _ in range(5)]
+    for event_id, recipient_id in enumerate(recipients, start=1):
+        _enqueue(queue, event_id, recipient_id, OFFER, 17)
+
+    assert notifier.run_once(T0 + timedelta(seconds=60)) == 5
+    assert sender.calls == 3
+    assert {d.recipient_id for d in sender.sent} == set(recipients)
+
+
+def test_rescan_does_not_buffer_rows_twice(queue, notifier):
+    for event_id in (1, 2, 3):
+        _enqueue(queue, event_id, ALICE, OFFER, 17)
+
+    assert notifier.load(T0) == 3
+    assert notifier.load(T0 + timedelta(seconds=1)) == 0
+    # Past the window the whole table is read again.
+    assert notifier.load(T0 + timedelta(seconds=61)) == 0
+
+    digest, ids = notifier.buffer.digest(ALICE)
+    assert _entries(digest) == [("new_offer", 17, 3)]
+    assert sorted(ids) == [1, 2, 3]
+
+
+def test_rescan_finds_a_row_committed_behind_the_last_loaded_id(queue, notifier):
+    _enqueue(queue, 1, ALICE, OFFER, 17)
+    _enqueue(queue, 3, ALICE, OFFER, 17)
+    assert notifier.load(T0) == 2
+
+    # Id 2 was taken before id 3 but its transaction committed after the load.
+    _enqueue(queue, 2, BOB, OFFER, 18)
+    assert notifier.load(T0 + timedelta(seconds=1)) == 0
+    assert notifier.load(T0 + timedelta(seconds=60)) == 1
+    assert 2 in notifier.buffer
+
+
+def test_failed_send_keeps_the_rows_and_retries_after_a_delay(queue, sender, notifier):
+    _enqueue(queue, 1, ALICE, OFFER, 17)
+    _enqueue(queue, 2, BOB, MESSAGE, 9)
+    notifier.load(T0)
+
+    sender.fail_next = 1
+    due = T0 + timedelta(seconds=60)
+    assert notifier.flush(due) == 0
+    assert sender.sent == []
+    assert _queued(queue) == 2
+    assert len(notifier.buffer) == 2
+
+    # retry_delay(1) is two seconds; nothing is sent before then.
+    assert notifier.flush(due + timedelta(seconds=1)) == 0
+    assert notifier.flush(due + timedelta(seconds=2)) == 2
+    assert {d.recipient_id for d in sender.sent} == {ALICE, BOB}
+    assert _queued(queue) == 0
+
+
+def test_repeated_failures_back_off_further(queue, sender, notifier):
+    _enqueue(queue, 1, ALICE, OFFER, 17)
+    notifier.load(T0)
+    sender.fail_next = 2
+    due = T0 + timedelta(seconds=60)
+
+    assert notifier.flush(due) == 0
+    assert notifier.flush(due + timedelta(seconds=2)) == 0
+    # The second failure waits four seconds.
+    assert notifier.flush(due + timedelta(seconds=5)) == 0
+    assert notifier.flush(due + timedelta(seconds=6)) == 1
+
+
+def test_restart_reloads_unsent_rows(queue, sender, notifier):
+    _enqueue(queue, 1, ALICE, OFFER, 17)
+    notifier.load(T0)
+    sender.fail_next = 1
+    notifier.flush(T0 + timedelta(seconds=60))
+
+    restarted = Notifier(queue, sender=sender, window_seconds=60)
+    assert restarted.run_once(T0 + timedelta(seconds=60)) == 1
+    assert [d.recipient_id for d in sender.sent] == [ALICE]
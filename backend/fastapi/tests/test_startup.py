@@ -0,0 +1,35 @@
+"""Import-time budget for the app and worker entry points.
+
+Each module is imported in a fresh interpreter (see ``benchmarks.startup``);
+the best of a few runs has to fit its budget in ``BUDGETS`` and must not pull
+in any of the packages that are only meant to load on first use.
+"""
+
+import pytest
+
+from benchmarks.startup import BUDGETS, FORBIDDEN, import_profile
+
+RUNS = 3
+
+
+@pytest.fixture(scope="module", params=sorted(BUDGETS))
+def profile(request):
+    module = request.param
+    runs = [import_profile(module) for _ in range(RUNS)]
+    total, modules = min(runs, key=lambda run: run[0])
+    return module, total, modules
+
+
+def test_import_time_within_budget(profile):
+    module, total, modules = profile
+    slowest = sorted(modules.items(), key=lambda item: item[1][0], reverse=True)[:5]
+    assert total <= BUDGETS[module], (
+        f"importing {module} took {total:.0f}ms, budget is {BUDGETS[module]:.0f}ms; "
+        f"slowest: {', '.join(f'{name} {self_ms:.0f}ms' for name, (self_ms, _) in slowest)}"
+    )
+
+
+def test_no_heavy_imports_at_startup(profile):
+    module, _, modules = profile
+    loaded = sorted({name.split(".")[0] for name in modules} & set(FORBIDDEN))
+    assert not loaded, f"importing {module} loads {', '.join(loaded)}"
@@ -0,0 +1,123 @@
+"""Thumbnailer.record (app.workers.thumbnailer) against a real Postgres.
+
+``media_assets`` and a cut-down ``message_attachments`` live in a scratch
+``thumbnailer_test`` schema; nothing is rendered, ``record`` is called with
+the outcome a render would report.
+"""
+
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import create_engine, insert, select, text, update
+from sqlalchemy.orm import Session
+
+from app.schemas.schema import MediaAsset, MediaStatus
+from app.workers.thumbnailer import Thumbnailer
+
+SCHEMA = "thumbnailer_test"
+CONTENT_HASH = "ab" * 32
+VARIANTS = {"thumb_96": {"url": "https://cdn.example/thumb_96.webp", "width": 96}}
+
+
+@pytest.fixture
+def db(engine):
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    scratch = create_engine(engine.url, connect_args={"options": f"-csearch_path={SCHEMA}"})
+    MediaAsset.__table__.create(scratch)
+    with scratch.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE message_attachments"
+                " (id serial PRIMARY KEY, content_hash text, variants jsonb)"
+            )
+        )
+        conn.execute(
+            text("INSERT INTO message_attachments (content_hash) VALUES (:h)"),
+            {"h": CONTENT_HASH},
+        )
+        conn.execute(
+            insert(MediaAsset).values(
+                content_hash=CONTENT_HASH,
+                content_type="image/png",
+                size_bytes=1,
+                original_url="https://cdn.example/original.png",
+                status=MediaStatus.PROCESSING,
+            )
+        )
+    yield scratch
+    scratch.dispose()
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+
+
+@pytest.fixture
+def thumbnailer(db):
+    return Thumbnailer(store=None, session_factory=lambda: Session(db))
+
+
+def _asset(db):
+    with db.connect() as conn:
+        return conn.execute(
+            select(MediaAsset.status, MediaAsset.processing_started_at).where(
+                MediaAsset.content_hash == CONTENT_HASH
+            )
+        ).one()
+
+
+def _take_over(db):
+    """What a re-upload does once the lease of the current attempt ran out."""
+    with db.begin() as conn:
+        conn.execute(
+            update(MediaAsset)
+            .where(MediaAsset.content_hash == CONTENT_HASH)
+            .values(
+                status=MediaStatus.PROCESSING,
+                processing_started_at=MediaAsset.processing_started_at + timedelta(hours=1),
+            )
+        )
+    return _asset(db).processing_started_at
+
+
+def test_success_marks_the_asset_and_its_attachments_ready(db, thumbnailer):
+    attempt = _asset(db).processing_started_at
+    assert thumbnailer.record(CONTENT_HASH, VARIANTS, attempt)
+
+    assert _asset(db).status == MediaStatus.READY
+    with db.connect() as conn:
+        assert conn.scalar(text("SELECT variants FROM message_attachments")) == VARIANTS
+
+
+def test_failure_of_the_current_attempt_marks_the_asset_failed(db, thumbnailer):
+    attempt = _asset(db).processing_started_at
+    assert thumbnailer.record(CONTENT_HASH, None, attempt)
+    assert _asset(db).status == MediaStatus.FAILED
+
+
+def test_late_failure_does_not_undo_a_ready_asset(db, thumbnailer):
+    stale = _asset(db).processing_started_at
+    current = _take_over(db)
+    assert thumbnailer.record(CONTENT_HASH, VARIANTS, current)
+
+    assert not thumbnailer.record(CONTENT_HASH, None, stale)
+    assert not thumbnailer.record(CONTENT_HASH, None, current)
+    assert _asset(db).status == MediaStatus.READY
+
+
+def test_late_failure_does_not_fail_a_newer_attempt(db, thumbnailer):
+    stale = _asset(db).processing_started_at
+    current = _take_over(db)
+
+    assert not thumbnailer.record(CONTENT_HASH, None, stale)
+    assert _asset(db) == (MediaStatus.PROCESSING, current)
+
+
+def test_late_success_is_kept_after_the_lease_ran_out(db, thumbnailer):
+    stale = _asset(db).processing_started_at
+    with db.begin() as conn:
+        conn.execute(update(MediaAsset).values(status=MediaStatus.FAILED))
+
+    assert thumbnailer.record(CONTENT_HASH, VARIANTS, stale)
+    assert _asset(db).status == MediaStatus.READY
+    assert not thumbnailer.record(CONTENT_HASH, VARIANTS, stale)